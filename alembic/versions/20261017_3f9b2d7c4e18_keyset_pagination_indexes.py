@@ -0,0 +1,53 @@
+"""(sort column, id) indexes for keyset pagination of the list endpoints
+
+The list endpoints page with WHERE (col, id) < (:col, :id) ORDER BY col DESC,
+id DESC (app/pagination.py). A composite index on exactly that key turns every
+page, however deep, into an index seek. Each one replaces the single-column
+index on the same date column, which it covers for range filters too.
+
+Revision ID: 3f9b2d7c4e18
+Revises: 8e3f6a1b2c45
+Create Date: 2026-10-17 18:22:37.604415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9b2d7c4e18'
+down_revision: Union[str, None] = '8e3f6a1b2c45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (new index, table, columns, single-column index it replaces)
+INDEXES = [
+    ('ix_fuel_created_at_id', 'fuel', ['created_at', 'id'], ('ix_fuel_created_at', ['created_at'])),
+    ('ix_maintenance_maintenance_date_id', 'maintenance', ['maintenance_date', 'id'],
+     ('ix_maintenance_maintenance_date', ['maintenance_date'])),
+    ('ix_panne_panne_date_id', 'panne', ['panne_date', 'id'], ('ix_panne_panne_date', ['panne_date'])),
+    ('ix_reparation_repair_date_id', 'reparation', ['repair_date', 'id'], ('ix_reparation_repair_date', ['repair_date'])),
+    ('ix_trip_start_time_id', 'trip', ['start_time', 'id'], ('ix_trip_start_time', ['start_time'])),
+    ('ix_driver_last_name_first_name_id', 'driver', ['last_name', 'first_name', 'id'], None),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    # The new index is built before the old one is dropped, so the date-range
+    # queries always have an index to use.
+    with op.get_context().autocommit_block():
+        for name, table, columns, replaces in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+            if replaces is not None:
+                op.drop_index(replaces[0], table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _columns, replaces in reversed(INDEXES):
+            if replaces is not None:
+                op.create_index(replaces[0], table, replaces[1], postgresql_concurrently=True, if_not_exists=True)
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
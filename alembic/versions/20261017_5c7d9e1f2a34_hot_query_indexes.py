@@ -0,0 +1,62 @@
+"""time-range and foreign-key indexes for the hot queries
+
+The analytics, dashboard and list endpoints filter or sort on these date
+columns and foreign keys; without them every request was a sequential scan.
+Indexes are built CONCURRENTLY so the migration does not lock the tables
+against writes on a live database.
+
+Revision ID: 5c7d9e1f2a34
+Revises: 1a2b3c4d5e60
+Create Date: 2026-10-17 09:40:51.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c7d9e1f2a34'
+down_revision: Union[str, None] = '1a2b3c4d5e60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns, partial-index predicate)
+INDEXES = [
+    ('ix_fuel_created_at', 'fuel', ['created_at'], None),
+    ('ix_fuel_vehicle_id_created_at', 'fuel', ['vehicle_id', 'created_at'], None),
+    ('ix_fuel_fuel_type_id', 'fuel', ['fuel_type_id'], None),
+    ('ix_vehicle_purchase_date', 'vehicle', ['purchase_date'], None),
+    ('ix_maintenance_maintenance_date', 'maintenance', ['maintenance_date'], None),
+    ('ix_maintenance_vehicle_id', 'maintenance', ['vehicle_id'], None),
+    ('ix_panne_panne_date', 'panne', ['panne_date'], None),
+    ('ix_panne_vehicle_id', 'panne', ['vehicle_id'], None),
+    ('ix_reparation_repair_date', 'reparation', ['repair_date'], None),
+    ('ix_reparation_panne_id', 'reparation', ['panne_id'], None),
+    ('ix_trip_start_time', 'trip', ['start_time'], None),
+    ('ix_trip_vehicle_id_end_time', 'trip', ['vehicle_id', 'end_time'], None),
+    ('ix_trip_driver_id_end_time', 'trip', ['driver_id', 'end_time'], None),
+    ('ix_trip_status', 'trip', ['status'], None),
+    ('ix_trip_planned_start_time', 'trip', ['start_time'], "status = 'planned'"),
+    ('ix_trip_completed_end_time', 'trip', ['end_time'], "status = 'Completed'"),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _columns, _where in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,76 @@
+"""generated search columns with trigram and full-text indexes
+
+Adds search_text (concatenated searchable text, pg_trgm GIN index for
+ILIKE '%term%') and search_vector (tsvector, GIN index) to trip, panne,
+maintenance, reparation and driver, plus a trigram index on vehicle.plate_number
+and a btree index on reparation.cost (numeric search terms).
+The columns are GENERATED ... STORED, so Postgres keeps them current on every
+write. See app/search.py.
+
+Adding a stored generated column rewrites the table under an exclusive lock;
+run this in a maintenance window on large databases. The indexes are then
+built CONCURRENTLY.
+
+Revision ID: 6d1e4a9b7c25
+Revises: 3f9b2d7c4e18
+Create Date: 2026-10-17 19:48:03.117592
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d1e4a9b7c25'
+down_revision: Union[str, None] = '3f9b2d7c4e18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCHED_COLUMNS = {
+    'trip': ['start_location', 'end_location', 'purpose', 'notes', 'status'],
+    'panne': ['description', 'status'],
+    'maintenance': ['receipt', 'status'],
+    'reparation': ['receipt', 'status'],
+    'driver': ['first_name', 'last_name', 'cni_number', 'email', 'matricule'],
+}
+
+
+def _expression(columns):
+    return " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, columns in SEARCHED_COLUMNS.items():
+        expression = _expression(columns)
+        op.add_column(table, sa.Column('search_text', sa.Text(), sa.Computed(expression, persisted=True), nullable=True))
+        op.add_column(table, sa.Column('search_vector', postgresql.TSVECTOR(),
+                                       sa.Computed(f"to_tsvector('simple'::regconfig, {expression})", persisted=True),
+                                       nullable=True))
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for table in SEARCHED_COLUMNS:
+            op.create_index(f'ix_{table}_search_text_trgm', table, ['search_text'], postgresql_using='gin',
+                            postgresql_ops={'search_text': 'gin_trgm_ops'}, postgresql_concurrently=True, if_not_exists=True)
+            op.create_index(f'ix_{table}_search_vector', table, ['search_vector'], postgresql_using='gin',
+                            postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_vehicle_plate_number_trgm', 'vehicle', ['plate_number'], postgresql_using='gin',
+                        postgresql_ops={'plate_number': 'gin_trgm_ops'}, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_reparation_cost', 'reparation', ['cost'], postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_reparation_cost', table_name='reparation', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_vehicle_plate_number_trgm', table_name='vehicle', postgresql_concurrently=True, if_exists=True)
+        for table in reversed(list(SEARCHED_COLUMNS)):
+            op.drop_index(f'ix_{table}_search_vector', table_name=table, postgresql_concurrently=True, if_exists=True)
+            op.drop_index(f'ix_{table}_search_text_trgm', table_name=table, postgresql_concurrently=True, if_exists=True)
+    for table in reversed(list(SEARCHED_COLUMNS)):
+        op.drop_column(table, 'search_vector')
+        op.drop_column(table, 'search_text')
+    # pg_trgm is left installed: other objects may depend on it
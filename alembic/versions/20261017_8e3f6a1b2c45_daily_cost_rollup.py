@@ -0,0 +1,53 @@
+"""daily_cost_rollup table, backfilled from fuel, maintenance and reparation
+
+Analytics reads per-day, per-vehicle cost totals from this table instead of
+scanning the raw tables. The app keeps it current on every write
+(app/rollups.py); `python -m app.rollups rebuild` recomputes it.
+
+Revision ID: 8e3f6a1b2c45
+Revises: 5c7d9e1f2a34
+Create Date: 2026-10-17 14:05:12.530941
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e3f6a1b2c45'
+down_revision: Union[str, None] = '5c7d9e1f2a34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL = """
+INSERT INTO daily_cost_rollup (day, vehicle_id, category, total_cost, record_count, fuel_quantity)
+SELECT created_at::date, vehicle_id, 'fuel', coalesce(sum(cost), 0), count(*), coalesce(sum(quantity), 0)
+  FROM fuel GROUP BY 1, 2
+UNION ALL
+SELECT maintenance_date::date, vehicle_id, 'maintenance', coalesce(sum(maintenance_cost), 0), count(*), 0
+  FROM maintenance GROUP BY 1, 2
+UNION ALL
+SELECT r.repair_date::date, p.vehicle_id, 'reparation', coalesce(sum(r.cost), 0), count(*), 0
+  FROM reparation r JOIN panne p ON p.id = r.panne_id GROUP BY 1, 2
+"""
+
+
+def upgrade() -> None:
+    op.create_table('daily_cost_rollup',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('vehicle_id', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(length=20), nullable=False),
+    sa.Column('total_cost', sa.Float(), server_default=sa.text('0'), nullable=False),
+    sa.Column('record_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('fuel_quantity', sa.Float(), server_default=sa.text('0'), nullable=False),
+    sa.ForeignKeyConstraint(['vehicle_id'], ['vehicle.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('day', 'vehicle_id', 'category')
+    )
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    op.drop_table('daily_cost_rollup')
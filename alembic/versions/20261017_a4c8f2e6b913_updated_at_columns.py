@@ -0,0 +1,45 @@
+"""updated_at row versions for conditional GET
+
+Adds updated_at (timestamptz, default now(), bumped by the ORM on every update)
+to the tables whose records are served with ETag / Last-Modified validators
+(app/conditional.py): vehicle, driver, fuel, panne, reparation, maintenance, and
+garage and category_panne, which panne and reparation responses embed. trip
+already had a nullable updated_at; it gets the same default and NOT NULL.
+
+now() is stable, so ADD COLUMN ... DEFAULT now() stores the value once in the
+catalog instead of rewriting the table: existing rows report the migration
+time as their last modification, which errs on the side of revalidating.
+
+Revision ID: a4c8f2e6b913
+Revises: 6d1e4a9b7c25
+Create Date: 2026-10-17 21:05:44.318026
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c8f2e6b913'
+down_revision: Union[str, None] = '6d1e4a9b7c25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ['vehicle', 'driver', 'fuel', 'panne', 'reparation', 'maintenance', 'garage', 'category_panne']
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False))
+    # Trips never updated have no updated_at yet
+    op.execute('UPDATE trip SET updated_at = coalesce(created_at, now()) WHERE updated_at IS NULL')
+    op.alter_column('trip', 'updated_at', server_default=sa.text('now()'), nullable=False)
+
+
+def downgrade() -> None:
+    op.alter_column('trip', 'updated_at', server_default=None, nullable=True)
+    for table in reversed(TABLES):
+        op.drop_column(table, 'updated_at')
@@ -0,0 +1,93 @@
+"""trip periods with exclusion constraints for vehicle / driver availability
+
+Adds trip.period, GENERATED ALWAYS AS tstzrange(start_time, end_time) STORED
+(unbounded while end_time is null), and two GiST exclusion constraints: a
+vehicle, or a driver, cannot be on two overlapping trips unless one of them is
+cancelled. A partial GiST index on period serves GET /availability
+(app/availability.py).
+
+The constraints compare ids as int4range(id, id, '[]') WITH =, which the
+built-in range_ops GiST operator class supports, so btree_gist is not needed.
+
+The overlap checks this replaces ignored open-ended trips, so existing data may
+already violate the constraints. The upgrade lists the offending trips and
+stops instead of guessing which one to end or cancel. Trips that end before
+they start are reported the same way (tstzrange() rejects them).
+
+Adding a stored generated column rewrites the table and the constraints build
+their indexes under an exclusive lock; run this in a maintenance window on
+large databases.
+
+Revision ID: b7e2d4f6a815
+Revises: a4c8f2e6b913
+Create Date: 2026-10-17 22:14:37.502183
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2d4f6a815'
+down_revision: Union[str, None] = 'a4c8f2e6b913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SCHEDULED = "lower(status) <> 'cancelled'"
+REPORTED = 20
+
+
+def _period(trip: str) -> str:
+    return f"tstzrange({trip}.start_time, {trip}.end_time)"
+
+
+def _check_existing_trips() -> None:
+    bind = op.get_bind()
+    backwards = bind.execute(sa.text(
+        f"SELECT id FROM trip WHERE end_time < start_time ORDER BY id LIMIT {REPORTED}"
+    )).scalars().all()
+    if backwards:
+        raise RuntimeError(
+            f"Trips ending before they start (first {REPORTED} shown), fix them before upgrading: "
+            + ", ".join(map(str, backwards))
+        )
+    overlapping = bind.execute(sa.text(f"""
+        SELECT a.id, b.id FROM trip a JOIN trip b
+          ON a.id < b.id
+         AND (a.vehicle_id = b.vehicle_id OR a.driver_id = b.driver_id)
+         AND {_period('a')} && {_period('b')}
+        WHERE lower(a.status) <> 'cancelled' AND lower(b.status) <> 'cancelled'
+        ORDER BY a.id, b.id LIMIT {REPORTED}
+    """)).all()
+    if overlapping:
+        raise RuntimeError(
+            f"Overlapping trips sharing a vehicle or driver (first {REPORTED} pairs shown), end or cancel "
+            "one of each pair before upgrading: " + ", ".join(f"{a}/{b}" for a, b in overlapping)
+        )
+
+
+def upgrade() -> None:
+    _check_existing_trips()
+    op.add_column('trip', sa.Column('period', postgresql.TSTZRANGE(),
+                                    sa.Computed('tstzrange(start_time, end_time)', persisted=True), nullable=True))
+    for owner in ('vehicle', 'driver'):
+        op.execute(
+            f"ALTER TABLE trip ADD CONSTRAINT trip_{owner}_no_overlap EXCLUDE USING gist "
+            f"(int4range({owner}_id, {owner}_id, '[]') WITH =, period WITH &&) WHERE ({SCHEDULED})"
+        )
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_trip_period_scheduled', 'trip', ['period'], postgresql_using='gist',
+                        postgresql_where=sa.text(SCHEDULED), postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_trip_period_scheduled', table_name='trip', postgresql_concurrently=True, if_exists=True)
+    op.drop_constraint('trip_driver_no_overlap', 'trip')
+    op.drop_constraint('trip_vehicle_no_overlap', 'trip')
+    op.drop_column('trip', 'period')
@@ -0,0 +1,47 @@
+"""vehicle_fuel_state: latest fueling and completed trip per vehicle
+
+Adds vehicle_fuel_state (vehicle_id, last_fueled_at, last_trip_completed_at),
+kept current by the fuel and trip handlers (app/fuel_state.py) so that
+GET /fuel/eligibility answers for the whole fleet with one join, and fills it
+from the existing fuel and trip rows.
+
+Revision ID: c3f8a5d1e927
+Revises: b7e2d4f6a815
+Create Date: 2026-10-17 23:02:11.845390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f8a5d1e927'
+down_revision: Union[str, None] = 'b7e2d4f6a815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'vehicle_fuel_state',
+        sa.Column('vehicle_id', sa.Integer(), nullable=False),
+        sa.Column('last_fueled_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('last_trip_completed_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['vehicle_id'], ['vehicle.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('vehicle_id'),
+    )
+    # Same computation as `python -m app.fuel_state rebuild`
+    op.execute("""
+        INSERT INTO vehicle_fuel_state (vehicle_id, last_fueled_at, last_trip_completed_at)
+        SELECT vehicle.id,
+               (SELECT max(fuel.created_at) FROM fuel WHERE fuel.vehicle_id = vehicle.id),
+               (SELECT max(trip.end_time) FROM trip
+                 WHERE trip.vehicle_id = vehicle.id AND trip.status = 'Completed' AND trip.end_time IS NOT NULL)
+        FROM vehicle
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('vehicle_fuel_state')
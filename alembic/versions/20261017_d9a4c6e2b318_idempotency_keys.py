@@ -0,0 +1,42 @@
+"""idempotency_key: stored responses of create requests by Idempotency-Key
+
+Adds idempotency_key (scope, key, request_hash, status_code, body, expires_at),
+written by POST /fuel/ and POST /panne/ when the client sends an
+Idempotency-Key header (app/idempotency.py), and the expires_at index the
+purge of expired keys uses.
+
+Revision ID: d9a4c6e2b318
+Revises: c3f8a5d1e927
+Create Date: 2026-10-17 23:48:37.102654
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9a4c6e2b318'
+down_revision: Union[str, None] = 'c3f8a5d1e927'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'idempotency_key',
+        sa.Column('scope', sa.String(length=32), nullable=False),
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('request_hash', sa.LargeBinary(), nullable=False),
+        sa.Column('status_code', sa.SmallInteger(), nullable=True),
+        sa.Column('body', sa.LargeBinary(), nullable=True),
+        sa.Column('expires_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('scope', 'key'),
+    )
+    op.create_index('ix_idempotency_key_expires_at', 'idempotency_key', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_idempotency_key_expires_at', table_name='idempotency_key')
+    op.drop_table('idempotency_key')
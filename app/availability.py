@@ -0,0 +1,74 @@
+# app/availability.py
+#
+# Which vehicles and drivers are free in a time window.
+#
+# Every trip has a period, [start_time, end_time) generated by Postgres and
+# unbounded while end_time is null, so an ongoing or open-ended trip holds its
+# vehicle and driver until it is given an end. Two GiST exclusion constraints
+# (trip_vehicle_no_overlap, trip_driver_no_overlap) keep any vehicle or driver
+# from being on two overlapping trips; cancelled trips are left out of both.
+# Trip writes rely on them (app/writes.py) rather than on a query before the
+# insert, which concurrent requests could both pass.
+#
+# Availability is the complement: the trips scheduled in the window come from
+# the partial GiST index on period (ix_trip_period_scheduled), whatever their
+# vehicle or driver, and everything not on one of them is free. The cost grows
+# with the trips in the window, not with the size of the trip table:
+#
+#   vehicles = await db.execute(availability.free_vehicles(start, end))
+#
+# The same predicates back the overlap checks of POST /trip/bulk, where the
+# rows are staged first and the constraints must not fire on the INSERT.
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Select, func, literal_column, select
+from sqlalchemy.sql import ColumnElement
+
+from . import models
+
+CANCELLED = "cancelled"
+
+
+def scheduled(status: ColumnElement) -> ColumnElement:
+    """The trip occupies its vehicle and driver (models.TRIP_SCHEDULED)."""
+    # A literal rather than a bound parameter, so prepared statements still match the partial index
+    return func.lower(status) != literal_column(f"'{CANCELLED}'")
+
+
+def period(start, end) -> ColumnElement:
+    """[start, end) as a tstzrange; unbounded when end is None / NULL."""
+    return func.tstzrange(start, end)
+
+
+def overlaps(trip_period: ColumnElement, start, end) -> ColumnElement:
+    return trip_period.op("&&")(period(start, end))
+
+
+def _scheduled_in(start: datetime, end: Optional[datetime], exclude_trip_id: Optional[int]) -> list:
+    conditions = [scheduled(models.Trip.status), overlaps(models.Trip.period, start, end)]
+    if exclude_trip_id is not None:
+        conditions.append(models.Trip.id != exclude_trip_id)
+    return conditions
+
+
+def free_vehicles(start: datetime, end: Optional[datetime] = None, exclude_trip_id: Optional[int] = None) -> Select:
+    """Vehicles on no scheduled trip in [start, end), by plate number."""
+    busy = select(models.Trip.vehicle_id).where(*_scheduled_in(start, end, exclude_trip_id))
+    return (
+        select(models.Vehicle.id, models.Vehicle.plate_number, models.Vehicle.status, models.Vehicle.make, models.Vehicle.model)
+        .where(models.Vehicle.id.not_in(busy))
+        .order_by(models.Vehicle.plate_number)
+    )
+
+
+def free_drivers(start: datetime, end: Optional[datetime] = None, exclude_trip_id: Optional[int] = None) -> Select:
+    """Drivers on no scheduled trip in [start, end), by name."""
+    busy = select(models.Trip.driver_id).where(*_scheduled_in(start, end, exclude_trip_id))
+    return (
+        select(models.Driver.id, models.Driver.first_name, models.Driver.last_name)
+        .where(models.Driver.id.not_in(busy))
+        .order_by(models.Driver.last_name, models.Driver.first_name, models.Driver.id)
+    )
+
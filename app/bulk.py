@@ -0,0 +1,271 @@
+# app/bulk.py
+#
+# Bulk ingestion (POST /fuel/bulk, POST /trip/bulk): thousands of records per
+# request as NDJSON (one JSON object per line) or CSV with a header row.
+#
+# Instead of a lookup, insert and commit per record, a load is set-based:
+#
+#   1. every line is parsed and validated against the row schema
+#   2. foreign keys are checked with one `id = ANY(...)` query per referenced table
+#   3. the remaining rows are COPYed into a temporary staging table
+#   4. conflict queries (e.g. overlapping trips) run against the staging table
+#      as a whole and drop the lines they reject
+#   5. one INSERT ... SELECT moves the staged rows into the real table
+#
+# all in a single transaction. Lines that fail any step are reported with their
+# line number and the rest are loaded:
+#
+#   FUEL_BULK = bulk.BulkTarget("fuel", models.Fuel, schemas.FuelBulkRow, ...)
+#   result = bulk.load(db, FUEL_BULK, upload)
+#
+# The report carries the load's throughput in records per second, and the
+# bulk.<name>.* metrics keep the totals.
+
+import csv
+import io
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional, Tuple, Type
+
+import orjson
+from fastapi import HTTPException, Query, Request, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import ARRAY, Integer, Select, any_, bindparam, column, delete, func, insert, select, table, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement, TableClause
+
+from . import metrics, schemas
+from .config import settings
+
+CSV_TYPES = ("text/csv", "application/csv")
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines")
+
+
+@dataclass(frozen=True)
+class Upload:
+    format: str      # csv | ndjson
+    body: bytes
+
+
+async def read_upload(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$",
+                                  description="csv or ndjson; defaults to what the Content-Type says"),
+) -> Upload:
+    """Dependency: the raw request body and its format."""
+    if format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type in CSV_TYPES:
+            format = "csv"
+        elif content_type in NDJSON_TYPES:
+            format = "ndjson"
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"Send CSV ({', '.join(CSV_TYPES)}) or NDJSON ({', '.join(NDJSON_TYPES)}), or pass ?format=",
+            )
+    return Upload(format, await request.body())
+
+
+@dataclass(frozen=True)
+class Reference:
+    field: str                 # row schema field holding the id
+    key: ColumnElement         # referenced primary key, e.g. models.Vehicle.id
+    label: str                 # "Vehicle" -> "Vehicle with ID 7 not found."
+
+
+@dataclass(frozen=True)
+class Conflict:
+    message: str
+    # staging table -> SELECT of the staged lines to reject
+    lines: Callable[[TableClause], Select]
+
+
+@dataclass(frozen=True)
+class BulkTarget:
+    name: str                  # metrics prefix and staging table name
+    model: type
+    row_schema: Type[BaseModel]
+    columns: Tuple[str, ...]   # model columns filled from each row, in COPY order
+    values: Callable[[BaseModel], tuple]   # validated row -> values for `columns`
+    references: Tuple[Reference, ...] = ()
+    check: Optional[Callable[[BaseModel], Optional[str]]] = None   # per-row rule; returns an error message
+    conflicts: Tuple[Conflict, ...] = ()
+    # (session, ANY(<inserted ids>) to compare the id column with) -> bookkeeping in the
+    # same transaction, e.g. rollups
+    after_insert: Optional[Callable[[Session, ColumnElement], None]] = None
+
+
+@dataclass
+class _Report:
+    received: int = 0
+    errors: dict = field(default_factory=dict)   # line -> [messages]
+
+    def reject(self, line: int, message: str):
+        self.errors.setdefault(line, []).append(message)
+
+
+def _records(upload: Upload, report: _Report) -> Iterator[Tuple[int, dict]]:
+    """(line number, raw record) for every record in the body; unreadable lines go to the report."""
+    try:
+        text_body = upload.body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be UTF-8 encoded")
+
+    if upload.format == "csv":
+        reader = csv.DictReader(io.StringIO(text_body, newline=""))
+        for record in reader:
+            line = reader.line_num
+            report.received += 1
+            if None in record:
+                report.reject(line, "More values than header columns")
+                continue
+            # Empty cells are missing values
+            yield line, {key: value for key, value in record.items() if value not in ("", None)}
+        return
+
+    for line, raw in enumerate(text_body.splitlines(), start=1):
+        if not raw.strip():
+            continue
+        report.received += 1
+        try:
+            record = orjson.loads(raw)
+        except orjson.JSONDecodeError as error:
+            report.reject(line, f"Invalid JSON: {error}")
+            continue
+        if not isinstance(record, dict):
+            report.reject(line, "Each line must be a JSON object")
+            continue
+        yield line, record
+
+
+def _validate(target: BulkTarget, upload: Upload, report: _Report) -> List[Tuple[int, BaseModel]]:
+    rows = []
+    for line, record in _records(upload, report):
+        if report.received > settings.bulk_max_rows:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"At most {settings.bulk_max_rows} records per request",
+            )
+        try:
+            row = target.row_schema.model_validate(record)
+        except ValidationError as error:
+            for problem in error.errors():
+                where = ".".join(str(part) for part in problem["loc"])
+                report.reject(line, f"{where}: {problem['msg']}" if where else problem["msg"])
+            continue
+        message = target.check(row) if target.check else None
+        if message:
+            report.reject(line, message)
+            continue
+        rows.append((line, row))
+    return rows
+
+
+def _check_references(db: Session, target: BulkTarget, rows, report: _Report):
+    """One query per referenced table for all the ids the rows use."""
+    if not rows:
+        return rows
+    missing = set()
+    for reference in target.references:
+        wanted = {getattr(row, reference.field) for _, row in rows}
+        found = set(db.scalars(select(reference.key).where(reference.key == any_(_int_array(wanted)))))
+        for line, row in rows:
+            value = getattr(row, reference.field)
+            if value not in found:
+                report.reject(line, f"{reference.label} with ID {value} not found.")
+                missing.add(line)
+    return [(line, row) for line, row in rows if line not in missing]
+
+
+def _int_array(values) -> ColumnElement:
+    return bindparam(None, list(values), type_=ARRAY(Integer), expanding=False)
+
+
+def _copy_field(value) -> str:
+    """One COPY CSV field: NULL is an empty field, text is always quoted (so "" stays an empty string)."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return '"' + value.replace('"', '""') + '"'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _stage(db: Session, target: BulkTarget, rows) -> TableClause:
+    """COPY the rows into a temporary table shaped like the target columns (dropped on commit)."""
+    staging_name = f"bulk_{target.name}"
+    db.execute(text(
+        f"CREATE TEMPORARY TABLE {staging_name} ON COMMIT DROP AS "
+        f"SELECT 0 AS line, {', '.join(target.columns)} FROM {target.model.__tablename__} WITH NO DATA"
+    ))
+    buffer = io.StringIO()
+    for line, row in rows:
+        buffer.write(",".join(_copy_field(value) for value in (line, *target.values(row))))
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {staging_name} (line, {', '.join(target.columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+    return table(staging_name, column("line"), *(column(name) for name in target.columns))
+
+
+def _apply_conflicts(db: Session, target: BulkTarget, staging: TableClause, report: _Report):
+    for conflict in target.conflicts:
+        rejected = conflict.lines(staging).subquery()
+        lines = db.scalars(
+            delete(staging).where(staging.c.line.in_(select(rejected.c.line))).returning(staging.c.line)
+        ).all()
+        for line in lines:
+            report.reject(line, conflict.message)
+
+
+def _insert(db: Session, target: BulkTarget, staging: TableClause) -> List[int]:
+    model_table = target.model.__table__
+    selected = []
+    for name in target.columns:
+        value = staging.c[name]
+        default = model_table.c[name].server_default
+        if default is not None:
+            # An optional value left out of the record gets the column's default
+            value = func.coalesce(value, default.arg)
+        selected.append(value)
+    stmt = (
+        insert(model_table)
+        .from_select(list(target.columns), select(*selected).order_by(staging.c.line))
+        .returning(model_table.c.id)
+    )
+    return list(db.scalars(stmt))
+
+
+def load(db: Session, target: BulkTarget, upload: Upload) -> schemas.BulkLoadResult:
+    """Validate, check and load `upload` into `target` in one transaction. Commits."""
+    started = time.perf_counter()
+    report = _Report()
+    rows = _check_references(db, target, _validate(target, upload, report), report)
+
+    ids: List[int] = []
+    if rows:
+        staging = _stage(db, target, rows)
+        _apply_conflicts(db, target, staging, report)
+        ids = _insert(db, target, staging)
+        if ids and target.after_insert is not None:
+            target.after_insert(db, any_(_int_array(ids)))
+    db.commit()
+
+    seconds = time.perf_counter() - started
+    metrics.counter(f"bulk.{target.name}.inserted").inc(len(ids))
+    metrics.counter(f"bulk.{target.name}.rejected").inc(len(report.errors))
+    metrics.histogram(f"bulk.{target.name}.seconds").observe(seconds)
+    return schemas.BulkLoadResult(
+        received=report.received,
+        inserted=len(ids),
+        rejected=len(report.errors),
+        seconds=round(seconds, 3),
+        records_per_second=round(report.received / seconds, 1) if seconds > 0 else 0.0,
+        errors=[schemas.BulkRowError(line=line, errors=messages) for line, messages in sorted(report.errors.items())],
+    )
@@ -0,0 +1,105 @@
+# app/conditional.py
+#
+# Conditional GET for the CRUD routers: ETag / Last-Modified validators and the
+# 304 Not Modified answer.
+#
+# A record's version is its updated_at, or the latest updated_at among it and
+# the rows its response embeds (a trip shows its vehicle and driver):
+#
+#   TRIP_VERSION = conditional.version_of(models.Trip.updated_at,
+#       (models.Vehicle.updated_at, models.Vehicle.id == models.Trip.vehicle_id), ...)
+#
+# Detail endpoints read only that version first. When the client's copy is
+# current they return 304 without loading or serializing the record:
+#
+#   not_modified = conditional.check_row(db, request, response, "trip", TRIP_VERSION, models.Trip.id, trip_id)
+#   if not_modified:
+#       return not_modified
+#
+# List pages are validated by the (id, version) pairs of their rows, see
+# pagination.paginate.
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+
+# Clients may keep the response but must revalidate it before every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def version_of(updated_at: ColumnElement, *embedded) -> ColumnElement:
+    """Latest of `updated_at` and each (embedded updated_at, join condition) row, looked up by key."""
+    if not embedded:
+        return updated_at
+    lookups = [select(column).where(condition).scalar_subquery() for column, condition in embedded]
+    return func.greatest(updated_at, *lookups)   # greatest() ignores NULLs (a missing embedded row)
+
+
+def etag(*parts) -> str:
+    # Weak: equal tags mean the same data, not necessarily byte-identical bodies
+    return f'W/"{hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], current: str) -> bool:
+    """If-None-Match uses weak comparison: W/"x" and "x" are the same tag."""
+    if not if_none_match:
+        return False
+    current = current.removeprefix("W/")
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == current for candidate in candidates)
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _not_modified_since(if_modified_since: Optional[str], last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:   # "-0000" zone
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have whole seconds
+    return last_modified.astimezone(timezone.utc).replace(microsecond=0) <= since
+
+
+def validators(current_etag: str, last_modified: Optional[datetime] = None) -> dict:
+    headers = {"ETag": current_etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def is_fresh(request: Request, current_etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """True when the client's cached copy is current. If-None-Match wins over If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, current_etag)
+    if last_modified is not None and request.headers.get("if-modified-since"):
+        return _not_modified_since(request.headers["if-modified-since"], last_modified)
+    return False
+
+
+def check(request: Request, response: Response, current_etag: str, last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """Set the validators on `response`; return a 304 response if the client's copy is current."""
+    headers = validators(current_etag, last_modified)
+    if is_fresh(request, current_etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def check_row(db: Session, request: Request, response: Response, name: str, version: ColumnElement,
+              key_column: ColumnElement, key) -> Optional[Response]:
+    """check() for one record, reading only its version. None too when the record does not exist."""
+    current = db.query(version).filter(key_column == key).scalar()
+    if current is None:
+        return None
+    return check(request, response, etag(name, key, current), current)
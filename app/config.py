@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -9,6 +10,51 @@ class Settings(BaseSettings):
     secret_key : str
     algorithm : str
     access_token_expire_minutes : int
+    user_cache_ttl_seconds : float = 30   # authenticated-user context cache; 0 disables it
+    # bcrypt runs on its own pool (app/utils.py). Requests beyond
+    # workers + queue_limit get 503 with Retry-After instead of waiting.
+    password_hash_workers : int = 4
+    password_hash_queue_limit : int = 32
+    password_hash_retry_after : int = 2   # seconds, sent in Retry-After
+    # Analytics / dashboard result cache (app/result_cache.py). Writes in this worker
+    # invalidate immediately; other workers see them within the TTL.
+    result_cache_max_entries : int = 512
+    result_cache_ttl_seconds : float = 60   # 0 disables the cache
+    # Background jobs (app/jobs.py), e.g. PDF expense reports.
+    export_job_workers : int = 2            # jobs running at once per worker process
+    job_retention_seconds : float = 3600    # finished jobs and their files are kept this long
+    job_dir : Optional[str] = None          # where job output files go; None = system temp dir
+    # Global search (GET /search): each entity's query is cancelled after this long
+    # and reported as timed out, so one slow table cannot hold up the response.
+    search_statement_timeout_ms : int = 1500
+    # Bulk ingestion (POST /fuel/bulk, /trip/bulk): larger uploads are refused with 413.
+    bulk_max_rows : int = 100000
+    # Idempotency-Key on POST /fuel/ and /panne/ (app/idempotency.py): how long a key's
+    # response is replayed, and how often a worker deletes the expired keys.
+    idempotency_ttl_seconds : float = 86400
+    idempotency_purge_interval_seconds : float = 300
+
+    # Logging (see app/logging_config.py). Per-request auth tracing lives on the
+    # app.oauth2 logger at DEBUG, so it is off unless LOG_LEVELS enables it.
+    log_level : str = "INFO"
+    log_levels : str = ""      # e.g. "app.oauth2=DEBUG,sqlalchemy.engine=WARNING"
+    log_sampling : str = ""    # e.g. "app.main=0.1" keeps 10% of app.main DEBUG/INFO records
+
+    # Connection pool (per engine, per worker process). Each worker has a sync
+    # and an async engine on the primary (and the same pair on the replica), so
+    # keep workers * 2 * (db_pool_size + db_max_overflow) below max_connections.
+    db_pool_size : int = 10
+    db_max_overflow : int = 20
+    db_pool_timeout : float = 30     # seconds to wait for a connection before failing
+    db_pool_recycle : int = 1800     # seconds; -1 disables recycling
+    db_pool_pre_ping : bool = True
+
+    # Optional streaming read replica used by GET list endpoints and analytics.
+    # When unset (or lagging more than replica_max_lag_seconds) reads go to the primary.
+    database_replica_hostname : Optional[str] = None
+    database_replica_port : Optional[str] = None   # defaults to database_port
+    replica_max_lag_seconds : float = 5.0
+    replica_lag_check_interval : float = 2.0      # seconds between lag probes
     class Config :
         env_file = ".env"
         extra = "allow"
@@ -0,0 +1,303 @@
+# app/exports.py
+#
+# Row sources for the detailed expense exports (CSV, XLSX and PDF).
+#
+# Each category is a flat column select (no ORM objects, no joinedload) read
+# through a server-side cursor, so an export holds one batch of rows at a time
+# no matter how many records the period covers:
+#
+#   async for row in iter_rows(db, "fuel", start, end):
+#       ...  # tuple in EXPORTS["fuel"].columns order
+#
+# csv_chunks / xlsx_chunks feed StreamingResponse. They take a session factory
+# rather than a session: the request's own session is closed before a streamed
+# body is produced.
+#
+# The PDF is a background job (pdf_job). Its layout and file writes are CPU
+# and blocking I/O, so write_pdf is synchronous and runs in a worker thread
+# with a synchronous session, keeping the event loop free for requests.
+#
+# The columns match the sheets the analytics page used to build in the browser.
+
+import asyncio
+import csv
+import io
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, Iterator, Sequence, Tuple
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from . import models
+from .database import get_read_session_factory
+from .pdf import TableReport
+from .xlsx import StreamingWorkbook
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 2000
+# Bytes buffered before a chunk is handed to the response
+CHUNK_SIZE = 64 * 1024
+
+# PDF column widths in points; text columns share what is left of the page
+_PDF_WIDTHS = {"int": 40, "number": 65, "date": 60, "datetime": 80}
+_PDF_TABLE_WIDTH = 523
+
+
+@dataclass(frozen=True)
+class Column:
+    header: str
+    kind: str = "text"     # text | int | number | date | datetime
+
+
+@dataclass(frozen=True)
+class Export:
+    title: str             # sheet / section title
+    columns: Tuple[Column, ...]
+    total_column: int      # index of the cost column summed in the PDF footer
+    query: Callable[[datetime, datetime], Select]
+
+
+def _fuel(start: datetime, end: datetime) -> Select:
+    return (
+        select(
+            models.Fuel.id,
+            func.coalesce(models.Vehicle.plate_number, "N/A"),
+            models.Fuel.created_at,
+            models.Fuel.quantity,
+            models.Fuel.cost,
+        )
+        .outerjoin(models.Vehicle, models.Fuel.vehicle_id == models.Vehicle.id)
+        .where(models.Fuel.created_at >= start, models.Fuel.created_at <= end)
+        .order_by(models.Fuel.created_at.asc(), models.Fuel.id.asc())
+    )
+
+
+def _reparation(start: datetime, end: datetime) -> Select:
+    return (
+        select(
+            models.Reparation.id,
+            func.coalesce(models.Vehicle.plate_number, "N/A"),
+            models.Reparation.repair_date,
+            func.coalesce(func.nullif(models.Panne.description, ""), "N/A"),
+            models.Garage.nom_garage,
+            func.coalesce(models.Reparation.cost, 0.0),
+        )
+        .outerjoin(models.Panne, models.Reparation.panne_id == models.Panne.id)
+        .outerjoin(models.Vehicle, models.Panne.vehicle_id == models.Vehicle.id)
+        .outerjoin(models.Garage, models.Reparation.garage_id == models.Garage.id)
+        .where(models.Reparation.repair_date >= start, models.Reparation.repair_date <= end)
+        .order_by(models.Reparation.repair_date.asc(), models.Reparation.id.asc())
+    )
+
+
+def _maintenance(start: datetime, end: datetime) -> Select:
+    return (
+        select(
+            models.Maintenance.id,
+            func.coalesce(models.Vehicle.plate_number, "N/A"),
+            models.Maintenance.maintenance_date,
+            func.coalesce(func.nullif(models.CategoryMaintenance.cat_maintenance, ""), "N/A"),
+            models.Garage.nom_garage,
+            models.Maintenance.maintenance_cost,
+        )
+        .outerjoin(models.Vehicle, models.Maintenance.vehicle_id == models.Vehicle.id)
+        .outerjoin(models.CategoryMaintenance, models.Maintenance.cat_maintenance_id == models.CategoryMaintenance.id)
+        .outerjoin(models.Garage, models.Maintenance.garage_id == models.Garage.id)
+        .where(models.Maintenance.maintenance_date >= start, models.Maintenance.maintenance_date <= end)
+        .order_by(models.Maintenance.maintenance_date.asc(), models.Maintenance.id.asc())
+    )
+
+
+def _purchases(start: datetime, end: datetime) -> Select:
+    return (
+        select(
+            models.Vehicle.id,
+            models.Vehicle.plate_number,
+            func.coalesce(models.VehicleMake.vehicle_make, "N/A"),
+            func.coalesce(models.VehicleModel.vehicle_model, "N/A"),
+            models.Vehicle.purchase_date,
+            func.coalesce(models.Vehicle.purchase_price, 0.0),
+        )
+        .outerjoin(models.VehicleMake, models.Vehicle.make == models.VehicleMake.id)
+        .outerjoin(models.VehicleModel, models.Vehicle.model == models.VehicleModel.id)
+        .where(
+            models.Vehicle.purchase_date >= start,
+            models.Vehicle.purchase_date <= end,
+            models.Vehicle.purchase_price > 0,
+        )
+        .order_by(models.Vehicle.purchase_date.asc(), models.Vehicle.id.asc())
+    )
+
+
+EXPORTS = {
+    "fuel": Export(
+        "Fuel Details",
+        (Column("ID", "int"), Column("Vehicle"), Column("Date", "datetime"),
+         Column("Quantity", "number"), Column("Cost", "number")),
+        total_column=4,
+        query=_fuel,
+    ),
+    "reparation": Export(
+        "Reparation Details",
+        (Column("ID", "int"), Column("Vehicle"), Column("Date", "date"),
+         Column("Description"), Column("Provider"), Column("Cost", "number")),
+        total_column=5,
+        query=_reparation,
+    ),
+    "maintenance": Export(
+        "Maintenance Details",
+        (Column("ID", "int"), Column("Vehicle"), Column("Date", "date"),
+         Column("Description"), Column("Provider"), Column("Cost", "number")),
+        total_column=5,
+        query=_maintenance,
+    ),
+    "purchases": Export(
+        "Vehicle Purchases",
+        (Column("ID", "int"), Column("Plate Number"), Column("Make"), Column("Model"),
+         Column("Purchase Date", "date"), Column("Purchase Price", "number")),
+        total_column=5,
+        query=_purchases,
+    ),
+}
+
+
+def csv_value(value, kind: str) -> str:
+    if value is None:
+        return ""
+    if kind == "date" and isinstance(value, datetime):
+        return value.date().isoformat()
+    if kind in ("date", "datetime"):
+        return value.isoformat()
+    return str(value)
+
+
+def display_value(value, kind: str) -> str:
+    """Human-readable cell text (PDF)."""
+    if value is None:
+        return "N/A" if kind in ("date", "datetime") else ""
+    if kind == "number":
+        return f"{value:,.2f}"
+    if kind == "date":
+        return (value.date() if isinstance(value, datetime) else value).isoformat()
+    if kind == "datetime":
+        return value.strftime("%Y-%m-%d %H:%M")
+    return str(value)
+
+
+def parse_categories(categories) -> list:
+    """Validated categories in EXPORTS order (all of them when none are given)."""
+    if not categories:
+        return list(EXPORTS)
+    unknown = sorted(set(categories) - set(EXPORTS))
+    if unknown:
+        raise ValueError(f"Unknown categories: {', '.join(unknown)}. Use: {', '.join(EXPORTS)}")
+    return [name for name in EXPORTS if name in categories]
+
+
+async def iter_rows(db: AsyncSession, category: str, start: datetime, end: datetime) -> AsyncIterator[tuple]:
+    """Stream the rows of one category from a server-side cursor."""
+    stmt = EXPORTS[category].query(start, end).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        for row in partition:
+            yield tuple(row)
+
+
+def read_rows(db: Session, category: str, start: datetime, end: datetime) -> Iterator[tuple]:
+    """iter_rows for a synchronous session."""
+    stmt = EXPORTS[category].query(start, end).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    for partition in db.execute(stmt).partitions():
+        for row in partition:
+            yield tuple(row)
+
+
+async def csv_chunks(session_factory: async_sessionmaker, category: str, start: datetime, end: datetime) -> AsyncIterator[bytes]:
+    export = EXPORTS[category]
+    kinds = [column.kind for column in export.columns]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff") # BOM, so Excel opens the file as UTF-8
+    writer.writerow([column.header for column in export.columns])
+    async with session_factory() as db:
+        async for row in iter_rows(db, category, start, end):
+            writer.writerow([csv_value(value, kind) for value, kind in zip(row, kinds)])
+            if buffer.tell() >= CHUNK_SIZE:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+async def xlsx_chunks(session_factory: async_sessionmaker, categories: Sequence[str], start: datetime, end: datetime) -> AsyncIterator[bytes]:
+    """One worksheet per category."""
+    book = StreamingWorkbook()
+    pending = 0
+    async with session_factory() as db:
+        for category in categories:
+            export = EXPORTS[category]
+            book.begin_sheet(export.title, [(column.header, column.kind) for column in export.columns])
+            async for row in iter_rows(db, category, start, end):
+                book.write_row(row)
+                pending += 1
+                if pending >= EXPORT_BATCH_SIZE:
+                    pending = 0
+                    chunk = book.drain()
+                    if chunk:
+                        yield chunk
+    yield book.close()
+
+
+def _pdf_columns(export: Export):
+    fixed = sum(_PDF_WIDTHS.get(column.kind, 0) for column in export.columns)
+    text_columns = sum(1 for column in export.columns if column.kind not in _PDF_WIDTHS)
+    text_width = (_PDF_TABLE_WIDTH - fixed) / max(1, text_columns)
+    return [
+        (column.header, _PDF_WIDTHS.get(column.kind, text_width), "right" if column.kind in ("int", "number") else "left")
+        for column in export.columns
+    ]
+
+
+def write_pdf(
+    session_factory: sessionmaker, fp, categories: Sequence[str], start: datetime, end: datetime,
+    progress: Dict[str, int],
+) -> Dict[str, object]:
+    """Write the detailed expense report to `fp`; returns row counts and totals per category. Blocking."""
+    report = TableReport(fp, "Detailed Expense Report", f"Period: {start.date()} to {end.date()}")
+    summary = {}
+    progress["rows"] = 0
+    with session_factory() as db:
+        for category in categories:
+            export = EXPORTS[category]
+            kinds = [column.kind for column in export.columns]
+            count, total = 0, 0.0
+            report.begin_section(export.title, _pdf_columns(export))
+            for row in read_rows(db, category, start, end):
+                report.add_row([display_value(value, kind) for value, kind in zip(row, kinds)])
+                count += 1
+                total += row[export.total_column] or 0.0
+                progress["rows"] += 1
+            if count:
+                footer = [""] * len(kinds)
+                footer[export.total_column - 1] = "Total:"
+                footer[export.total_column] = display_value(total, "number")
+                report.end_section(footer)
+            else:
+                report.add_note("No records for this period.")
+                report.end_section()
+            summary[category] = {"rows": count, "total": round(total, 2)}
+    report.close()
+    return summary
+
+
+def _pdf_job(path: str, categories: Sequence[str], start: datetime, end: datetime, progress: Dict[str, int]):
+    with open(path, "wb") as fp:
+        return write_pdf(get_read_session_factory(), fp, categories, start, end, progress)
+
+
+async def pdf_job(path: str, categories: Sequence[str], start: datetime, end: datetime,
+                  progress: Dict[str, int]) -> Dict[str, object]:
+    """Job body: write the report to `path`."""
+    # Layout, file writes and the synchronous session stay off the event loop
+    return await asyncio.to_thread(_pdf_job, path, categories, start, end, progress)
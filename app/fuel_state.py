@@ -0,0 +1,133 @@
+# app/fuel_state.py
+#
+# Keeps models.VehicleFuelState (per vehicle: latest fueling, latest completed
+# trip) in step with the fuel and trip tables, for fuel eligibility: a vehicle
+# may be fueled when it is 'available' and, unless it was never fueled, a
+# 'Completed' trip ended after its last fueling.
+#
+# The write handlers call these in the SAME session/transaction as their own
+# change, after a flush, so the state commits or rolls back together with it:
+#
+#   fuel / trip insert:  advance(db, "fuel", models.Fuel.id == row.id)
+#   bulk insert:         advance(db, "trip", models.Trip.id == any_(ids))
+#   update / delete:     recompute(db, {old_vehicle_id, new_vehicle_id})
+#
+# advance() only ever moves the timestamps forward (GREATEST), so concurrent
+# inserts for the same vehicle cannot undo each other. An update or delete can
+# move them back, so it recomputes the vehicle's state from the raw tables.
+#
+# Eligibility is then one query for the whole fleet (eligibility_query) instead
+# of three per vehicle.
+#
+# Backfill / repair:  python -m app.fuel_state rebuild
+
+import argparse
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+
+from . import models
+
+COMPLETED = "Completed"
+AVAILABLE = "available"
+
+# kind -> (state column, vehicle column, timestamp, conditions every counted record meets)
+_SOURCES = {
+    "fuel": ("last_fueled_at", models.Fuel.vehicle_id, models.Fuel.created_at, ()),
+    "trip": ("last_trip_completed_at", models.Trip.vehicle_id, models.Trip.end_time,
+             (models.Trip.status == COMPLETED, models.Trip.end_time.is_not(None))),
+}
+
+
+def advance(db: Session, kind: str, *where):
+    """Move the state forward to the `kind` ("fuel" / "trip") records matching `where`, e.g. just inserted."""
+    state = models.VehicleFuelState
+    column, vehicle_id, timestamp, conditions = _SOURCES[kind]
+    latest = select(vehicle_id, func.max(timestamp)).where(*conditions, *where).group_by(vehicle_id)
+    stmt = insert(state).from_select(["vehicle_id", column], latest)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[state.vehicle_id],
+        # GREATEST ignores NULLs: the first record of a vehicle sets the column
+        set_={column: func.greatest(getattr(state, column), getattr(stmt.excluded, column))},
+    )
+    db.execute(stmt)
+
+
+def _latest_of_vehicle(kind: str):
+    # Correlated, so each vehicle is one backward scan of (vehicle_id, <timestamp>) indexes
+    _, vehicle_id, timestamp, conditions = _SOURCES[kind]
+    return select(func.max(timestamp)).where(vehicle_id == models.Vehicle.id, *conditions).scalar_subquery()
+
+
+def _recompute_statement(*where) -> Select:
+    return select(models.Vehicle.id, _latest_of_vehicle("fuel"), _latest_of_vehicle("trip")).where(*where)
+
+
+def recompute(db: Session, vehicle_ids: Iterable[Optional[int]]):
+    """Recompute the state of these vehicles from the fuel and trip tables (after an update or delete)."""
+    vehicle_ids = sorted({vehicle_id for vehicle_id in vehicle_ids if vehicle_id is not None})
+    if not vehicle_ids:
+        return
+    state = models.VehicleFuelState
+    stmt = insert(state).from_select(
+        ["vehicle_id", "last_fueled_at", "last_trip_completed_at"],
+        _recompute_statement(models.Vehicle.id.in_(vehicle_ids)),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[state.vehicle_id],
+        set_={"last_fueled_at": stmt.excluded.last_fueled_at,
+              "last_trip_completed_at": stmt.excluded.last_trip_completed_at},
+    )
+    db.execute(stmt)
+
+
+def rebuild(db: Session):
+    """Recompute the state of every vehicle. Commits."""
+    state = models.VehicleFuelState
+    db.execute(state.__table__.delete())
+    db.execute(insert(state).from_select(
+        ["vehicle_id", "last_fueled_at", "last_trip_completed_at"], _recompute_statement(),
+    ))
+    db.commit()
+
+
+def eligibility_query(*where: ColumnElement) -> Select:
+    """(id, plate_number, status, last_fueled_at, last_trip_completed_at) per vehicle, by plate number."""
+    state = models.VehicleFuelState
+    return (
+        select(models.Vehicle.id, models.Vehicle.plate_number, models.Vehicle.status,
+               state.last_fueled_at, state.last_trip_completed_at)
+        .outerjoin(state, state.vehicle_id == models.Vehicle.id)
+        .where(*where)
+        .order_by(models.Vehicle.plate_number)
+    )
+
+
+def assess(status: Optional[str], last_fueled_at: Optional[datetime],
+           last_trip_completed_at: Optional[datetime]) -> Tuple[bool, str]:
+    """(eligible, message) for one row of eligibility_query."""
+    if status != AVAILABLE:
+        return False, f"Vehicle is not eligible for fueling. Its current status is '{status}'."
+    if last_fueled_at is not None and (last_trip_completed_at is None or last_trip_completed_at <= last_fueled_at):
+        return False, "A completed trip is required since the last refueling on " + last_fueled_at.strftime('%Y-%m-%d %H:%M')
+    return True, "Vehicle is eligible for fueling."
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(prog="python -m app.fuel_state", description="Maintain the vehicle_fuel_state table.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild", help="Recompute every vehicle's state from the fuel and trip tables.")
+    parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        rebuild(session)
+        print("vehicle_fuel_state rebuilt.")
+    finally:
+        session.close()
@@ -0,0 +1,175 @@
+# app/idempotency.py
+#
+# Idempotency-Key support for create endpoints: a client that retries a POST
+# with the same key gets the first response back instead of a second record.
+#
+# The key is claimed with an INSERT into idempotency_key in the handler's own
+# transaction, and the response is stored in that row before the same commit
+# that creates the record. So the record and its stored response commit or
+# roll back together, and a concurrent retry with the same key waits on the
+# claim until the first request is done, then replays its response. A retry
+# reads one row: the entity tables are not touched.
+#
+#   claim = idempotency.claim(db, "fuel", idempotency_key, fuel_payload)
+#   if claim.replay is not None:
+#       return claim.replay
+#   <validate, db.add(row), flush, rollups ...>
+#   response = claim.commit(db, row, FUEL_SERIALIZER, status.HTTP_201_CREATED)
+#
+# Without the header claim() does nothing and commit() is db.commit() +
+# db.refresh(). Requests that fail (4xx) roll the claim back, so the key can be
+# retried once the problem is fixed. Reusing a key with a different payload is
+# a 422. Keys expire after settings.idempotency_ttl_seconds; each worker
+# deletes expired keys at most every idempotency_purge_interval_seconds, and
+#
+#   python -m app.idempotency purge
+#
+# does it on demand.
+
+import argparse
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import orjson
+from fastapi import Header, HTTPException, Response, status
+from pydantic import BaseModel
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.orm import Session
+
+from . import metrics, models
+from .config import settings
+from .serialization import RowSerializer, dumps
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotency-Replayed"
+# Expired keys deleted per purge statement
+PURGE_BATCH = 1000
+
+_next_purge = 0.0
+
+# Hand-written rather than postgresql.insert(): SQLAlchemy compiles those on every call (no cache
+# key), which cost more than the round trip itself. An expired key is taken over as if it were new.
+_CLAIM = text("""
+    INSERT INTO idempotency_key (scope, key, request_hash, expires_at)
+    VALUES (:scope, :key, :request_hash, now() + make_interval(secs => :ttl))
+    ON CONFLICT (scope, key) DO UPDATE
+        SET request_hash = excluded.request_hash, status_code = NULL, body = NULL, expires_at = excluded.expires_at
+        WHERE idempotency_key.expires_at < now()
+    RETURNING key
+""")
+
+
+def key_header(
+    idempotency_key: Optional[str] = Header(
+        default=None, alias=HEADER, min_length=1, max_length=255,
+        description="Retrying with the same key returns the first response instead of creating another record",
+    ),
+) -> Optional[str]:
+    """Dependency: the request's Idempotency-Key, if any."""
+    return idempotency_key
+
+
+def _request_hash(payload: BaseModel) -> bytes:
+    return hashlib.sha256(orjson.dumps(payload.model_dump(mode="json"), option=orjson.OPT_SORT_KEYS)).digest()
+
+
+@dataclass
+class Claim:
+    scope: str
+    key: Optional[str]                  # None: the request has no Idempotency-Key
+    replay: Optional[Response] = None   # the stored response, when the key was used before
+
+    def commit(self, db: Session, obj, serializer: RowSerializer, status_code: int):
+        """Commit the handler's transaction with the response stored under the key; returns the response."""
+        if self.key is None:
+            db.commit()
+            db.refresh(obj)
+            return obj
+        db.refresh(obj)   # server defaults, inside the transaction
+        body = dumps(serializer(obj))
+        key = models.IdempotencyKey
+        db.execute(
+            key.__table__.update()
+            .where(key.scope == self.scope, key.key == self.key)
+            .values(status_code=status_code, body=body)
+        )
+        db.commit()
+        return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+def _replay(row) -> Response:
+    metrics.counter("idempotency.replayed").inc()
+    return Response(content=row.body, status_code=row.status_code, media_type="application/json",
+                    headers={REPLAYED_HEADER: "true"})
+
+
+def claim(db: Session, scope: str, idempotency_key: Optional[str], payload: BaseModel) -> Claim:
+    """Claim `idempotency_key` for this request, or find the response of the request that used it first."""
+    if idempotency_key is None:
+        return Claim(scope, None)
+    _purge_if_due(db)
+    request_hash = _request_hash(payload)
+    key = models.IdempotencyKey
+    while True:
+        # Blocks while another transaction holds a claim on the same key
+        claimed = db.execute(_CLAIM, {"scope": scope, "key": idempotency_key, "request_hash": request_hash,
+                                      "ttl": settings.idempotency_ttl_seconds}).first()
+        if claimed is not None:
+            metrics.counter("idempotency.claimed").inc()
+            return Claim(scope, idempotency_key)
+        row = db.execute(
+            select(key.request_hash, key.status_code, key.body).where(key.scope == scope, key.key == idempotency_key)
+        ).first()
+        if row is not None:
+            break
+        # The claim locks the row it conflicted with, so a purge should not get in between; if the
+        # row is gone all the same, the key is free: claim it again
+    db.rollback()
+    if row.request_hash != request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{HEADER} '{idempotency_key}' was already used with a different request.",
+        )
+    return Claim(scope, idempotency_key, replay=_replay(row))
+
+
+def purge(db: Session) -> int:
+    """Delete the expired keys, PURGE_BATCH at a time. Commits; returns the number deleted."""
+    key = models.IdempotencyKey
+    deleted = 0
+    while True:
+        expired = select(key.scope, key.key).where(key.expires_at < func.now()).limit(PURGE_BATCH)
+        count = db.execute(delete(key).where(func.row(key.scope, key.key).in_(expired))).rowcount
+        db.commit()
+        deleted += count
+        if count < PURGE_BATCH:
+            return deleted
+
+
+def _purge_if_due(db: Session):
+    # One batch inside the request's transaction; a backlog is worked off over the following intervals
+    global _next_purge
+    now = time.monotonic()
+    if now < _next_purge:
+        return
+    _next_purge = now + settings.idempotency_purge_interval_seconds
+    key = models.IdempotencyKey
+    expired = select(key.scope, key.key).where(key.expires_at < func.now()).limit(PURGE_BATCH)
+    db.execute(delete(key).where(func.row(key.scope, key.key).in_(expired)))
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(prog="python -m app.idempotency", description="Maintain the idempotency_key table.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("purge", help="Delete the expired idempotency keys.")
+    parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        print(f"{purge(session)} expired idempotency keys deleted.")
+    finally:
+        session.close()
@@ -0,0 +1,251 @@
+# app/imports.py
+#
+# Fleet onboarding: vehicles and drivers imported from an uploaded CSV or XLSX
+# file as a background job (app/jobs.py).
+#
+# The upload is saved to a temporary file and read back as a stream (csv
+# module / xlsx.read_rows), IMPORT_CHUNK_ROWS records at a time. Each chunk is
+#
+#   1. validated against the row schema
+#   2. resolved: names such as "Toyota" become ids, one query per lookup table
+#      for the names not seen in an earlier chunk
+#   3. checked for duplicates: one `column = ANY(...)` query per unique column,
+#      plus the duplicates inside the chunk itself (earlier chunks are already
+#      committed, so the query sees them)
+#   4. inserted with one multi-row INSERT and committed
+#
+# so memory holds one chunk and the lookup names, whatever the size of the
+# file. Rejected lines go to an error report (CSV, the job's download) and the
+# job's progress counts rows, imported and rejected as it goes:
+#
+#   job = jobs.submit("vehicle_import", user.id, run, output=("vehicle_import_errors.csv", "text/csv"))
+#   async def run(job):
+#       return await imports.run(VEHICLE_IMPORT, upload, job)
+
+import asyncio
+import csv
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, UploadFile, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import ARRAY, String, any_, bindparam, exc, func, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+
+from . import result_cache, xlsx
+from .config import settings
+from .database import SessionLocal
+from .jobs import Job
+
+# Records validated, checked and committed together
+IMPORT_CHUNK_ROWS = 500
+# Bytes copied at a time from the upload to the temporary file
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Rejected lines kept in the job result; the error report has all of them
+ERROR_SAMPLE_SIZE = 20
+
+FORMATS = {".csv": "csv", ".xlsx": "xlsx"}
+CONTENT_TYPES = {"text/csv": "csv", "application/csv": "csv", xlsx.CONTENT_TYPE: "xlsx"}
+
+
+@dataclass(frozen=True)
+class Lookup:
+    field: str                 # row field holding the name, replaced by the id
+    name: ColumnElement        # e.g. models.VehicleMake.vehicle_make
+    key: ColumnElement         # e.g. models.VehicleMake.id
+    label: str                 # "vehicle make" -> "Unknown vehicle make 'Toyta'."
+
+
+@dataclass(frozen=True)
+class Unique:
+    field: str
+    column: ColumnElement
+    label: str                 # "CNI number" -> "Driver with CNI number 'X' already exists."
+
+
+@dataclass(frozen=True)
+class ImportTarget:
+    name: str                  # "vehicle": job kind, result cache table, messages
+    model: type
+    row_schema: Type[BaseModel]
+    lookups: Tuple[Lookup, ...] = ()
+    unique: Tuple[Unique, ...] = ()
+
+
+@dataclass(frozen=True)
+class Upload:
+    path: str
+    format: str                # csv | xlsx
+
+
+async def save_upload(file: UploadFile) -> Upload:
+    """Copy the uploaded file to a temporary file the job can read after the request is over."""
+    extension = os.path.splitext(file.filename or "")[1].lower()
+    format = FORMATS.get(extension) or CONTENT_TYPES.get((file.content_type or "").split(";")[0].strip().lower())
+    if format is None:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Upload a .csv or .xlsx file")
+    fd, path = tempfile.mkstemp(prefix="import-", suffix=f".{format}", dir=settings.job_dir)
+    with os.fdopen(fd, "wb") as fp:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            fp.write(chunk)
+    return Upload(path, format)
+
+
+def _records(upload: Upload) -> Iterator[Tuple[int, dict]]:
+    """(line number, record) for every data row; header names are matched case-insensitively."""
+    if upload.format == "csv":
+        with open(upload.path, newline="", encoding="utf-8-sig") as fp:
+            reader = csv.reader(fp)
+            header = [name.strip().lower() for name in next(reader, [])]
+            for values in reader:
+                yield reader.line_num, _record(header, values)
+        return
+    with open(upload.path, "rb") as fp:
+        rows = xlsx.read_rows(fp)
+        header = [(name or "").strip().lower() for name in next(rows, [])]
+        for line, values in enumerate(rows, start=2):
+            yield line, _record(header, values)
+
+
+def _record(header: List[str], values: List[Optional[str]]) -> dict:
+    # Empty cells are missing values
+    return {
+        name: value.strip() for name, value in zip(header, values)
+        if name and value is not None and value.strip() != ""
+    }
+
+
+def _chunks(records: Iterator[Tuple[int, dict]]) -> Iterator[List[Tuple[int, dict]]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == IMPORT_CHUNK_ROWS:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _Importer:
+    def __init__(self, db: Session, target: ImportTarget, errors: Any, progress: dict):
+        self.db = db
+        self.target = target
+        self.errors = errors
+        self.progress = progress
+        self.resolved: Dict[str, Dict[str, int]] = {lookup.field: {} for lookup in target.lookups}
+        self.sample: List[dict] = []
+        for key in ("rows", "imported", "rejected"):
+            progress[key] = 0
+
+    def reject(self, line: int, messages: List[str]):
+        self.errors.writerow((line, "; ".join(messages)))
+        self.progress["rejected"] += 1
+        if len(self.sample) < ERROR_SAMPLE_SIZE:
+            self.sample.append({"line": line, "errors": messages})
+
+    def chunk(self, records: List[Tuple[int, dict]]):
+        self.progress["rows"] += len(records)
+        rows = []
+        for line, record in records:
+            try:
+                rows.append((line, self.target.row_schema.model_validate(record).model_dump()))
+            except ValidationError as error:
+                self.reject(line, [
+                    f"{'.'.join(str(part) for part in problem['loc'])}: {problem['msg']}" for problem in error.errors()
+                ])
+        rows = self._resolve(rows)
+        rows = self._unique(rows)
+        if rows:
+            self._insert(rows)
+
+    def _resolve(self, rows):
+        problems: Dict[int, List[str]] = {}
+        for lookup in self.target.lookups:
+            known = self.resolved[lookup.field]
+            wanted = {row[lookup.field].lower() for _, row in rows} - known.keys()
+            if wanted:
+                matches = self.db.execute(
+                    select(func.lower(lookup.name), lookup.key)
+                    .where(func.lower(lookup.name) == any_(_text_array(wanted)))
+                    .order_by(lookup.key)
+                ).all()
+                for name, key in reversed(matches):   # the oldest row wins when names repeat
+                    known[name] = key
+            for line, row in rows:
+                key = known.get(row[lookup.field].lower())
+                if key is None:
+                    problems.setdefault(line, []).append(f"Unknown {lookup.label} '{row[lookup.field]}'.")
+                else:
+                    row[lookup.field] = key
+        return self._drop(rows, problems)
+
+    def _unique(self, rows):
+        problems: Dict[int, List[str]] = {}
+        for unique in self.target.unique:
+            values = {row[unique.field] for _, row in rows}
+            taken = set(self.db.scalars(select(unique.column).where(unique.column == any_(_text_array(values)))))
+            seen = set()
+            for line, row in rows:
+                value = row[unique.field]
+                if value in taken:
+                    problems.setdefault(line, []).append(
+                        f"{self.target.name.capitalize()} with {unique.label} '{value}' already exists."
+                    )
+                elif value in seen:
+                    problems.setdefault(line, []).append(f"Duplicate {unique.label} '{value}' earlier in the file.")
+                seen.add(value)
+        return self._drop(rows, problems)
+
+    def _drop(self, rows, problems: Dict[int, List[str]]):
+        for line, messages in problems.items():
+            self.reject(line, messages)
+        return [(line, row) for line, row in rows if line not in problems]
+
+    def _insert(self, rows):
+        try:
+            self.db.execute(insert(self.target.model), [row for _, row in rows])
+            self.db.commit()
+            imported = len(rows)
+        except exc.IntegrityError:
+            # Someone else inserted a conflicting record since the checks: retry the rows one by one
+            self.db.rollback()
+            imported = 0
+            for line, row in rows:
+                try:
+                    with self.db.begin_nested():
+                        self.db.execute(insert(self.target.model), [row])
+                    imported += 1
+                except exc.IntegrityError as error:
+                    self.reject(line, [f"Rejected by the database: {str(error.orig).splitlines()[0]}"])
+            self.db.commit()
+        if imported:
+            self.progress["imported"] += imported
+            result_cache.bump(self.target.name)
+
+
+def _text_array(values) -> ColumnElement:
+    return bindparam(None, list(values), type_=ARRAY(String), expanding=False)
+
+
+def _run(target: ImportTarget, upload: Upload, report_path: str, progress: dict) -> dict:
+    db = SessionLocal()
+    try:
+        with open(report_path, "w", newline="", encoding="utf-8") as report:
+            errors = csv.writer(report)
+            errors.writerow(("line", "errors"))
+            importer = _Importer(db, target, errors, progress)
+            for chunk in _chunks(_records(upload)):
+                importer.chunk(chunk)
+        return {**progress, "errors": importer.sample}
+    finally:
+        db.close()
+        os.remove(upload.path)
+
+
+async def run(target: ImportTarget, upload: Upload, job: Job) -> dict:
+    """Job body: import `upload` into `target`, writing rejected lines to the job's file."""
+    # Parsing and the synchronous session stay off the event loop
+    return await asyncio.to_thread(_run, target, upload, job.result_path, job.progress)
@@ -0,0 +1,141 @@
+# app/jobs.py
+#
+# In-process registry for background jobs (report generation, imports).
+#
+# A handler submits a coroutine function and answers 202 straight away; the
+# client polls GET /jobs/{id} and, for jobs that produce a file, downloads it
+# from GET /jobs/{id}/download once the status is "done":
+#
+#   async def run(job):
+#       with open(job.result_path, "wb") as fp: ...
+#       job.progress["rows"] = n
+#       return {"rows": n}                     # optional summary, stored in job.result
+#
+#   job = jobs.submit("expense_pdf", current_user.id, run, output=("report.pdf", "application/pdf"))
+#
+# At most EXPORT_JOB_WORKERS jobs run at once per worker process; the others wait
+# as "pending". Finished jobs (and their files) are dropped JOB_RETENTION_SECONDS
+# after they finish. Jobs live in this process only: with several workers the
+# client must poll the worker that accepted the job (or use a sticky session).
+
+import asyncio
+import logging
+import os
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from . import metrics
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    owner_id: int
+    status: str = PENDING
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: Dict[str, Any] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    result_path: Optional[str] = None
+    filename: Optional[str] = None
+    media_type: Optional[str] = None
+
+    @property
+    def downloadable(self) -> bool:
+        return self.status == DONE and self.result_path is not None
+
+
+class JobRegistry:
+    def __init__(self, max_concurrent: int, retention_seconds: float):
+        self._jobs: Dict[str, Job] = {}
+        self._tasks: Set[asyncio.Task] = set()   # strong refs so running tasks are not collected
+        self._max_concurrent = max_concurrent
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._retention_seconds = retention_seconds
+        self._submitted = metrics.counter("jobs.submitted")
+        self._failed = metrics.counter("jobs.failed")
+        self._seconds = metrics.histogram("jobs.seconds")
+
+    def submit(
+        self,
+        kind: str,
+        owner_id: int,
+        run: Callable[[Job], Awaitable[Optional[Dict[str, Any]]]],
+        output: Optional[Tuple[str, str]] = None,
+    ) -> Job:
+        """Schedule `run(job)` in the background. `output` is (filename, media_type) for file results."""
+        self.purge()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._max_concurrent)
+        job = Job(id=uuid.uuid4().hex, kind=kind, owner_id=owner_id)
+        if output is not None:
+            job.filename, job.media_type = output
+            fd, job.result_path = tempfile.mkstemp(prefix=f"{kind}-", dir=settings.job_dir)
+            os.close(fd)
+        self._jobs[job.id] = job
+        self._submitted.inc()
+        task = asyncio.get_running_loop().create_task(self._run(job, run))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str, owner_id: int) -> Optional[Job]:
+        """The job, if it exists and belongs to `owner_id`."""
+        self.purge()
+        job = self._jobs.get(job_id)
+        if job is None or job.owner_id != owner_id:
+            return None
+        return job
+
+    def purge(self):
+        cutoff = time.time() - self._retention_seconds
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and job.finished_at < cutoff:
+                del self._jobs[job_id]
+                self._remove_file(job)
+
+    async def _run(self, job: Job, run):
+        async with self._slots:
+            job.status, job.started_at = RUNNING, time.time()
+            try:
+                job.result = await run(job)
+            except Exception as exc:
+                self._failed.inc()
+                job.status, job.error = FAILED, str(exc) or exc.__class__.__name__
+                self._remove_file(job)
+                logger.exception("background job failed", extra={"job_id": job.id, "kind": job.kind})
+            else:
+                job.status = DONE
+            finally:
+                job.finished_at = time.time()
+                self._seconds.observe(job.finished_at - job.started_at)
+
+    @staticmethod
+    def _remove_file(job: Job):
+        if job.result_path is not None:
+            try:
+                os.remove(job.result_path)
+            except FileNotFoundError:
+                pass
+            job.result_path = None
+
+    def stats(self) -> dict:
+        by_status: Dict[str, int] = {}
+        for job in self._jobs.values():
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+        return {"tracked": len(self._jobs), "by_status": by_status}
+
+
+jobs = JobRegistry(settings.export_job_workers, settings.job_retention_seconds)
+metrics.register_collector("jobs", jobs.stats)
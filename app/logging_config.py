@@ -0,0 +1,105 @@
+# app/logging_config.py
+#
+# Logging setup for the whole app. Request handlers only push records onto an
+# in-memory queue (QueueHandler); a background QueueListener thread formats
+# them as JSON lines and writes them to stdout, so no request blocks on I/O.
+#
+# Configured from Settings / .env:
+#   LOG_LEVEL=INFO                                   root level
+#   LOG_LEVELS=app.oauth2=DEBUG,sqlalchemy.engine=WARNING   per-logger levels
+#   LOG_SAMPLING=app.main=0.1                        keep 10% of app.main DEBUG/INFO records
+# WARNING and above are never sampled away.
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from .config import settings
+
+# Attributes every LogRecord has; anything else came in through `extra=` and is
+# emitted as a top-level JSON field.
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of DEBUG/INFO records per logger prefix (longest prefix wins)."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix first so "app.routers.trip" beats "app"
+        self._rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self._rates:
+            return True
+        for prefix, rate in self._rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                return random.random() < rate
+        return True
+
+
+def _parse_pairs(spec: str) -> Dict[str, str]:
+    """'a=1, b.c=2' -> {'a': '1', 'b.c': '2'}; malformed items are ignored."""
+    pairs = {}
+    for item in (spec or "").split(","):
+        name, sep, value = item.partition("=")
+        if sep and name.strip() and value.strip():
+            pairs[name.strip()] = value.strip()
+    return pairs
+
+
+def setup_logging():
+    """Install the queue-based JSON logging. Safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    # Sample on the producer side so dropped records never reach the queue.
+    rates = {name: float(rate) for name, rate in _parse_pairs(settings.log_sampling).items()}
+    queue_handler.addFilter(SamplingFilter(rates))
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(settings.log_level.upper())
+
+    for name, level in _parse_pairs(settings.log_levels).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    # uvicorn installs its own stdout handlers; route its records through the queue too.
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers[:] = []
+        uvicorn_logger.propagate = True
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop) # flush whatever is still queued on shutdown
@@ -1,26 +1,28 @@
 #HERE WE USE FASTAPI WITH SQLALCHEMY :USING ORM
 import os
+import logging
+from .logging_config import setup_logging
+
+# Before anything else logs: queue-based JSON logging (see app/logging_config.py)
+setup_logging()
+logger = logging.getLogger(__name__)
+
 from fastapi import FastAPI,Request,HTTPException
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from . import models 
+from . import models, utils
+from .serialization import ORJSONResponse
 from .database import engine
-from .routers import  dashboard_data_api,analytics_api,user, auth,category_document,vehicle_make,vehicle_model,vehicle_type,vehicle_transmission,category_maintenance,category_panne,document_vehicle,driver,vehicle,fuel,garage,panne,reparation,trip,fuel_type
+from .routers import  metrics,dashboard_data_api,analytics_api,user, auth,category_document,vehicle_make,vehicle_model,vehicle_type,vehicle_transmission,category_maintenance,category_panne,document_vehicle,driver,vehicle,fuel,garage,panne,reparation,trip,fuel_type,jobs,search,reference_data,availability
 from .config import settings
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-models.Base.metadata.create_all(bind = engine)
 
-
-try:
-    print("Attempting to create database tables if they don't exist...")
-    models.Base.metadata.create_all(bind=engine)
-    print("Database tables checked/created successfully.")
-except Exception as e:
-    print(f"CRITICAL ERROR during table creation: {e}")
+# The schema is owned by Alembic (see alembic/): run `alembic upgrade head`
+# before starting the app instead of calling create_all() at import time.
 
 # --- Import Your API Router for Authentication ---
 try:
@@ -28,9 +30,10 @@ try:
     from .routers import  dashboard_data_api,analytics_api,user, auth,category_document,vehicle_make,vehicle_model,vehicle_type,vehicle_transmission,category_maintenance,category_panne,document_vehicle,driver,vehicle,fuel,garage,panne,reparation,trip,fuel_type,fuel,maintenance
 
 except ImportError as e:
-    print(f"CRITICAL ERROR: Could not import router from app.routers.auth: {e}.")
-    print("Ensure 'app/routers/auth.py' exists in the 'app/routers/' package,")
-    print("and defines 'router = APIRouter(...)'.")
+    logger.critical(
+        "Could not import routers: %s. Ensure each module exists in app/routers/ "
+        "and defines 'router = APIRouter(...)'.", e,
+    )
     raise
 
 # Create the FastAPI application instance
@@ -38,6 +41,7 @@ app = FastAPI(
     title="FleetDash Application",
     description="Main application providing API and Frontend for fleet management.",
     version="1.0.3", # Updated version example
+    default_response_class=ORJSONResponse, # orjson encoding for every endpoint (app/serialization.py)
 )
 
 # --- Define Base Directory and Paths ---
@@ -45,25 +49,31 @@ APP_DIR = os.path.dirname(os.path.abspath(__file__))  # 'your_project/app'
 TEMPLATES_DIR = os.path.join(APP_DIR, "templates")    # 'your_project/app/templates'
 STATIC_DIR = os.path.join(APP_DIR, "static")          # 'your_project/app/static'
 
-print(f"--- Application Paths (app/main.py) ---")
-print(f"APP_DIR (location of main.py): {APP_DIR}")
-print(f"TEMPLATES_DIR (for Jinja2): {TEMPLATES_DIR}")
-print(f"STATIC_DIR (for CSS/JS): {STATIC_DIR}")
+logger.info("application paths", extra={"app_dir": APP_DIR, "templates_dir": TEMPLATES_DIR, "static_dir": STATIC_DIR})
 
 # --- Setup Jinja2 Templating ---
 if not os.path.isdir(TEMPLATES_DIR):
-    print(f"CRITICAL ERROR: Templates directory NOT FOUND at: {TEMPLATES_DIR}")
+    logger.critical("Templates directory NOT FOUND at: %s", TEMPLATES_DIR)
     templates = None # To prevent NameError if routes are called before this check fully stops app
 else:
     templates = Jinja2Templates(directory=TEMPLATES_DIR)
-    print(f"Jinja2 templates initialized from: {TEMPLATES_DIR}")
+    logger.info("Jinja2 templates initialized from: %s", TEMPLATES_DIR)
 
 # --- Mount Static Files (from app/static/) ---
 if not os.path.isdir(STATIC_DIR):
-    print(f"WARNING: Static files directory NOT FOUND at: {STATIC_DIR}. /static paths will not work.")
+    logger.warning("Static files directory NOT FOUND at: %s. /static paths will not work.", STATIC_DIR)
 else:
     app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
-    print(f"Mounted static files from {STATIC_DIR} at /static")
+    logger.info("Mounted static files from %s at /static", STATIC_DIR)
+
+# --- Password hashing pool saturated (see app/utils.py) ---
+@app.exception_handler(utils.PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: utils.PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Authentication service is busy, please retry shortly."},
+        headers={"Retry-After": str(settings.password_hash_retry_after)},
+    )
 
 # --- Include Your Authentication API Router FIRST ---
 # This ensures its specific path (POST /login/) takes precedence.
@@ -95,6 +105,11 @@ app.include_router(vehicle_transmission.router)
 app.include_router(vehicle_type.router)
 app.include_router(dashboard_data_api.router)
 app.include_router(analytics_api.router)
+app.include_router(metrics.router)
+app.include_router(jobs.router)
+app.include_router(search.router)
+app.include_router(reference_data.router)
+app.include_router(availability.router)
 
 # --- Helper function to serve Jinja2 templates from app/templates ---
 async def serve_html_template(template_name: str, request: Request, context: dict = None):
@@ -104,14 +119,14 @@ async def serve_html_template(template_name: str, request: Request, context: dic
     
     full_template_path = os.path.join(TEMPLATES_DIR, template_name)
     if not os.path.exists(full_template_path):
-        print(f"ERROR: Template file '{template_name}' not found at {full_template_path}")
+        logger.error("Template file '%s' not found at %s", template_name, full_template_path)
         raise HTTPException(status_code=404, detail=f"Page template '{template_name}' could not be found.")
     
     if context is None:
         context = {}
     context.update({"request": request}) # Always include request in context for url_for etc.
     
-    print(f"Serving template '{template_name}' for request path: {request.url.path}")
+    logger.debug("serving template %s for %s", template_name, request.url.path)
     return templates.TemplateResponse(template_name, context)
 
 # --- HTML Page Serving Routes (All handled in main.py) ---
@@ -0,0 +1,95 @@
+# app/metrics.py
+#
+# Small in-process metrics registry (counters, histograms and "collectors").
+# Values are per worker process; GET /metrics/ returns a snapshot of everything
+# registered here.
+
+import bisect
+import threading
+from typing import Callable, Dict, Sequence
+
+# Seconds. Tuned for DB pool waits and request-level timings.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Counter:
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self._buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self._buckets) + 1) # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        # Cumulative buckets, Prometheus style ("le" = less than or equal)
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip(self._buckets, counts):
+            running += bucket_count
+            cumulative[f"le_{bound}"] = running
+        cumulative["le_inf"] = running + counts[-1]
+        return {"buckets": cumulative, "count": count, "sum": round(total, 6)}
+
+
+_lock = threading.Lock()
+_counters: Dict[str, Counter] = {}
+_histograms: Dict[str, Histogram] = {}
+_collectors: Dict[str, Callable[[], dict]] = {}
+
+
+def counter(name: str) -> Counter:
+    """Get or create the counter called `name`."""
+    with _lock:
+        if name not in _counters:
+            _counters[name] = Counter()
+        return _counters[name]
+
+
+def histogram(name: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    """Get or create the histogram called `name`."""
+    with _lock:
+        if name not in _histograms:
+            _histograms[name] = Histogram(buckets)
+        return _histograms[name]
+
+
+def register_collector(name: str, collect: Callable[[], dict]):
+    """Register a callable that returns live values (e.g. pool state) at snapshot time."""
+    with _lock:
+        _collectors[name] = collect
+
+
+def snapshot() -> dict:
+    with _lock:
+        counters = dict(_counters)
+        histograms = dict(_histograms)
+        collectors = dict(_collectors)
+    return {
+        "counters": {name: c.value for name, c in sorted(counters.items())},
+        "histograms": {name: h.snapshot() for name, h in sorted(histograms.items())},
+        "gauges": {name: collect() for name, collect in sorted(collectors.items())},
+    }
@@ -1,16 +1,38 @@
-from sqlalchemy import Column, DateTime, Integer, String,Float, ForeignKey, TIMESTAMP, text, Enum as DBEnum # Added DBEnum
+from sqlalchemy import Column, Computed, Date, DateTime, Integer, LargeBinary, SmallInteger, String,Float, ForeignKey, TIMESTAMP, Text, text, Index, Enum as DBEnum # Added DBEnum
+from sqlalchemy.dialects.postgresql import TSTZRANGE, TSVECTOR, ExcludeConstraint
 from datetime import datetime # For default values or type hinting if needed
 import enum # For Python enum
 from typing import List, Optional
 from datetime import datetime, date , timedelta
 from pydantic import BaseModel, EmailStr, Field
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql.sqltypes import TIMESTAMP
 from sqlalchemy.sql.expression import text
 from sqlalchemy.sql import func # For default timestamps
 from .database import Base
 
 
+# --- Search columns (see app/search.py) ---
+# search_text concatenates a row's searchable text columns and carries a trigram
+# index (ILIKE '%term%'); search_vector is the same text as a tsvector for
+# word / phrase matching and ranking. Both are generated by Postgres, so they
+# can never be stale. Deferred: they are only read inside SQL.
+def search_columns(*columns: str):
+    expression = " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+    return (
+        deferred(Column(Text, Computed(expression, persisted=True))),
+        deferred(Column(TSVECTOR, Computed(f"to_tsvector('simple'::regconfig, {expression})", persisted=True))),
+    )
+
+
+def search_indexes(table: str):
+    return (
+        Index(f"ix_{table}_search_text_trgm", "search_text", postgresql_using="gin",
+              postgresql_ops={"search_text": "gin_trgm_ops"}),
+        Index(f"ix_{table}_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+
 class User(Base):
     __tablename__ = "user"
 
@@ -40,6 +62,10 @@ class User(Base):
 
 class Driver(Base):
     __tablename__ = "driver"
+    __table_args__ = (
+        Index("ix_driver_last_name_first_name_id", "last_name", "first_name", "id"), # list order, keyset pages
+        *search_indexes("driver"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     last_name = Column(String, nullable=False)
     first_name = Column(String, nullable=False)
@@ -47,6 +73,8 @@ class Driver(Base):
     email = Column(String, nullable=False, unique=True)
     matricule = Column(String, nullable=False, unique=True)
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    search_text, search_vector = search_columns("first_name", "last_name", "cni_number", "email", "matricule")
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'), onupdate=text('now()'))
 ##################################################################################################################
 
 
@@ -86,6 +114,11 @@ class FuelType(Base):
 
 class Fuel(Base):
     __tablename__ = "fuel" # This table name can be singular or plural as you prefer
+    __table_args__ = (
+        Index("ix_fuel_created_at_id", "created_at", "id"),             # date-range analytics / KPIs, keyset pages
+        Index("ix_fuel_vehicle_id_created_at", "vehicle_id", "created_at"), # FK + "last fueling of vehicle X"
+        Index("ix_fuel_fuel_type_id", "fuel_type_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -98,7 +131,7 @@ class Fuel(Base):
     cost = Column(Float, nullable=False)         # Total cost (quantity * price_little)
 
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
-    # updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'), onupdate=text('now()'))
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'), onupdate=text('now()'))
 
     vehicle = relationship("Vehicle")
     #fuel_type=relationship("fuel_type")
@@ -106,6 +139,11 @@ class Fuel(Base):
 ##################################################################################################################################
 class Vehicle(Base):
     __tablename__ = "vehicle"
+    __table_args__ = (
+        Index("ix_vehicle_purchase_date", "purchase_date"),
+        Index("ix_vehicle_plate_number_trgm", "plate_number", postgresql_using="gin",
+              postgresql_ops={"plate_number": "gin_trgm_ops"}), # plate lookups from the list searches
+    )
     id = Column(Integer, primary_key=True, index=True)
     make = Column(Integer, ForeignKey("vehicle_make.id"))
     model = Column(Integer, ForeignKey("vehicle_model.id"))
@@ -122,6 +160,7 @@ class Vehicle(Base):
     purchase_date = Column(TIMESTAMP(timezone=True), nullable=True)
     status = Column(String, default="available")
     registration_date = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()')) 
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'), onupdate=text('now()'))
 
      
     make_ref = relationship("VehicleMake") # Points to VehicleMake class
@@ -151,6 +190,7 @@ class Garage(Base):
     __tablename__ = "garage"
     id = Column(Integer, primary_key=True, index=True)
     nom_garage = Column(String, nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'), onupdate=text('now()'))
 ##################################################################################################################
 
 class CategoryMaintenance(Base):
@@ -161,6 +201,11 @@ class CategoryMaintenance(Base):
   
 class Maintenance(Base):
     __tablename__ = "maintenance"
+    __table_args__ = (
+        Index("ix_maintenance_maintenance_date_id", "maintenance_date", "id"),
+        Index("ix_maintenance_vehicle_id", "vehicle_id"),
+        *search_indexes("maintenance"),
+    )
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     # Foreign Keys
     cat_maintenance_id = Column(Integer, ForeignKey("category_maintenance.id", ondelete="SET NULL"), nullable=True)
@@ -171,7 +216,8 @@ class Maintenance(Base):
     maintenance_date = Column(TIMESTAMP(timezone=True), nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
     status = Column(String(50), default="active", nullable=False) # Added max length, nullable=False
-    
+    search_text, search_vector = search_columns("receipt", "status")
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'), onupdate=text('now()'))
     
   
     vehicle = relationship("Vehicle") 
@@ -185,10 +231,16 @@ class CategoryPanne(Base):
     __tablename__ = "category_panne"
     id = Column(Integer, primary_key=True, index=True)
     panne_name = Column(String, nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'), onupdate=text('now()'))
 ##################################################################################################################
 
 class Panne(Base):
     __tablename__ = "panne"
+    __table_args__ = (
+        Index("ix_panne_panne_date_id", "panne_date", "id"),
+        Index("ix_panne_vehicle_id", "vehicle_id"),
+        *search_indexes("panne"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     vehicle_id = Column(Integer, ForeignKey("vehicle.id"), nullable=False) # Make nullable=False explicit
@@ -197,6 +249,8 @@ class Panne(Base):
     status = Column(String(50), default="active", nullable=False) # Added max length, nullable=False
     panne_date = Column(TIMESTAMP(timezone=True), nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    search_text, search_vector = search_columns("description", "status")
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'), onupdate=text('now()'))
 
     # Define relationships for joinedload to work effectively for PanneOut
     # Ensure 'Vehicle' and 'CategoryPanne' are the correct class names of your SQLAlchemy models
@@ -209,6 +263,12 @@ class Panne(Base):
 
 class Reparation(Base):
     __tablename__ = "reparation"
+    __table_args__ = (
+        Index("ix_reparation_repair_date_id", "repair_date", "id"),
+        Index("ix_reparation_panne_id", "panne_id"),
+        Index("ix_reparation_cost", "cost"),  # numeric search terms match the exact cost
+        *search_indexes("reparation"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     panne_id = Column(Integer, ForeignKey("panne.id"))
     cost = Column(Float, default=0.0)
@@ -216,6 +276,8 @@ class Reparation(Base):
     garage_id = Column(Integer, ForeignKey("garage.id"))
     repair_date = Column(TIMESTAMP(timezone=True), nullable=False)
     status = Column(String, default="Inprogress")
+    search_text, search_vector = search_columns("receipt", "status")
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'), onupdate=text('now()'))
 
     panne = relationship("Panne") # backref can be added in Panne if needed
     garage = relationship("Garage") # backref can be added in Garage if needed
@@ -223,8 +285,31 @@ class Reparation(Base):
 
 #########################################################################################################################
 
+# Trips that occupy their vehicle and driver
+TRIP_SCHEDULED = "lower(status) <> 'cancelled'"
+
+
 class Trip(Base):
     __tablename__ = "trip"
+    __table_args__ = (
+        Index("ix_trip_start_time_id", "start_time", "id"),
+        Index("ix_trip_vehicle_id_end_time", "vehicle_id", "end_time"), # overlap checks, fuel eligibility
+        Index("ix_trip_driver_id_end_time", "driver_id", "end_time"),
+        Index("ix_trip_status", "status"),
+        # Partial indexes for the dashboard: planned count / upcoming trips, and completed trips per driver
+        Index("ix_trip_planned_start_time", "start_time", postgresql_where=text("status = 'planned'")),
+        Index("ix_trip_completed_end_time", "end_time", postgresql_where=text("status = 'Completed'")),
+        *search_indexes("trip"),
+        # Availability (app/availability.py): no vehicle or driver is on two scheduled trips at
+        # once. int4range(id, id, '[]') WITH = stands in for btree_gist's `id WITH =`, so the
+        # GiST indexes need no extension. Cancelled trips do not hold their vehicle or driver.
+        ExcludeConstraint((text("int4range(vehicle_id, vehicle_id, '[]')"), "="), ("period", "&&"),
+                          name="trip_vehicle_no_overlap", using="gist", where=text(TRIP_SCHEDULED)),
+        ExcludeConstraint((text("int4range(driver_id, driver_id, '[]')"), "="), ("period", "&&"),
+                          name="trip_driver_no_overlap", using="gist", where=text(TRIP_SCHEDULED)),
+        # Everything scheduled in a window, whoever it belongs to: GET /availability
+        Index("ix_trip_period_scheduled", "period", postgresql_using="gist", postgresql_where=text(TRIP_SCHEDULED)),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     vehicle_id = Column(Integer, ForeignKey("vehicle.id"), nullable=False)
@@ -233,6 +318,9 @@ class Trip(Base):
     end_location = Column(String, nullable=False)
     start_time = Column(DateTime(timezone=True), nullable=False)
     end_time = Column(DateTime(timezone=True), nullable=True) # Can be null if trip is ongoing/planned
+    # [start_time, end_time), unbounded while end_time is null: an open-ended trip holds its
+    # vehicle and driver until it gets an end time
+    period = deferred(Column(TSTZRANGE, Computed("tstzrange(start_time, end_time)", persisted=True)))
 
     # --- NEW FIELDS ---
     purpose = Column(String, nullable=True)
@@ -240,11 +328,12 @@ class Trip(Base):
     # --- END NEW FIELDS ---
 
     status = Column(String, nullable=False, default="planned") # e.g., planned, ongoing, completed, cancelled
+    search_text, search_vector = search_columns("start_location", "end_location", "purpose", "notes", "status")
 
     # Assuming you have a way to track when the trip record was created
     # This is good practice but not strictly related to 'purpose' and 'notes'
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
 
     # Relationships (if not already defined)
     vehicle = relationship("Vehicle") # Replace "Vehicle" with your actual Vehicle model name
@@ -253,9 +342,50 @@ class Trip(Base):
     # If you have other fields like distance, estimated_duration, etc., keep them.
 
 
+#########################################################################################################################
+# Pre-aggregated costs per (day, vehicle, category), maintained by app/rollups.py in the same
+# transaction as every fuel / maintenance / reparation write. Analytics sums these rows
+# instead of scanning the raw tables. Rebuild with: python -m app.rollups rebuild
+class DailyCostRollup(Base):
+    __tablename__ = "daily_cost_rollup"
+
+    day = Column(Date, primary_key=True)
+    vehicle_id = Column(Integer, ForeignKey("vehicle.id", ondelete="CASCADE"), primary_key=True)
+    category = Column(String(20), primary_key=True) # "fuel", "maintenance", "reparation"
+    total_cost = Column(Float, nullable=False, server_default=text("0"))
+    record_count = Column(Integer, nullable=False, server_default=text("0"))
+    fuel_quantity = Column(Float, nullable=False, server_default=text("0")) # litres; only set for "fuel"
+
+
 
 
 
+# Latest fueling and latest completed trip per vehicle, maintained by app/fuel_state.py in the
+# same transaction as the fuel and trip writes, so fuel eligibility for the whole fleet is one
+# join. Rebuild with: python -m app.fuel_state rebuild
+class VehicleFuelState(Base):
+    __tablename__ = "vehicle_fuel_state"
+
+    vehicle_id = Column(Integer, ForeignKey("vehicle.id", ondelete="CASCADE"), primary_key=True)
+    last_fueled_at = Column(TIMESTAMP(timezone=True), nullable=True)          # max(fuel.created_at)
+    last_trip_completed_at = Column(TIMESTAMP(timezone=True), nullable=True)  # max(trip.end_time) of 'Completed' trips
+
+
+# Responses of create requests sent with an Idempotency-Key header, replayed when the client
+# retries with the same key (app/idempotency.py). Rows expire after settings.idempotency_ttl_seconds.
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_key"
+    __table_args__ = (
+        Index("ix_idempotency_key_expires_at", "expires_at"), # purge of expired keys
+    )
+
+    scope = Column(String(32), primary_key=True)    # the endpoint: "fuel", "panne"
+    key = Column(String(255), primary_key=True)     # the client's Idempotency-Key
+    request_hash = Column(LargeBinary, nullable=False)   # SHA-256 of the request payload
+    status_code = Column(SmallInteger, nullable=True)    # null only inside the claiming transaction
+    body = Column(LargeBinary, nullable=True)            # the JSON response
+    expires_at = Column(TIMESTAMP(timezone=True), nullable=False)
+
 
 
 # Add these to your analytics_api.py, likely near other Pydantic models
@@ -0,0 +1,165 @@
+# app/pagination.py
+#
+# Keyset ("cursor") pagination for the list endpoints.
+#
+# OFFSET n makes Postgres read and throw away n rows, so deep pages get slower
+# as history grows. A cursor instead remembers the sort key of the last row
+# served, and the next page starts with an index seek past it:
+#
+#   WHERE (start_time, id) < (:last_start_time, :last_id)
+#   ORDER BY start_time DESC, id DESC LIMIT :limit
+#
+# Every keyset ends with the primary key, so rows sharing a timestamp are never
+# skipped or repeated. Each sort order has a matching (columns..., id) index.
+#
+#   TRIP_KEYSET = pagination.Keyset("trip", models.Trip.start_time, models.Trip.id, descending=True)
+#   return pagination.paginate(query, TRIP_KEYSET, response, limit=limit, skip=skip, cursor=cursor)
+#
+# The list body is unchanged; the cursors travel in the X-Next-Cursor /
+# X-Prev-Cursor response headers (absent on the last / first page). Without a
+# `cursor` parameter the endpoint still honours `skip`, so existing clients keep
+# working and can switch to the cursor from their first response.
+#
+# Search results (app/search.py) are ordered by relevance first, which has no
+# stable key to resume from; they page with `skip` and carry no cursors.
+#
+# With a `version` expression (app/conditional.py) the page also gets an ETag
+# built from its rows' (id, version) pairs. A request that sends If-None-Match
+# first reads just those pairs for the page; if the tag still matches it gets a
+# 304 without the rows being loaded or serialized.
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Optional
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+from sqlalchemy.sql import ColumnElement
+
+from . import conditional
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREV_CURSOR_HEADER = "X-Prev-Cursor"
+
+
+class Keyset:
+    def __init__(self, name: str, *columns, descending: bool = False):
+        self.name = name              # stored in the cursor so it cannot be replayed on another list
+        self.columns = columns        # sort columns, primary key last
+        self.descending = descending
+
+    def order_by(self, reverse: bool = False):
+        descending = self.descending != reverse
+        return [column.desc() if descending else column.asc() for column in self.columns]
+
+    def after(self, values, reverse: bool = False):
+        """Rows strictly after `values` in this order (before them if `reverse`)."""
+        key, bound = tuple_(*self.columns), tuple_(*values)
+        return key < bound if self.descending != reverse else key > bound
+
+    def page(self, query: Query, values=None, reverse: bool = False) -> Query:
+        """`query` in this order, starting after `values` (a decoded cursor) if given."""
+        page = query.order_by(*self.order_by(reverse=reverse))
+        if values is not None:
+            page = page.filter(self.after(values, reverse=reverse))
+        return page
+
+    def values_of(self, row) -> list:
+        return [getattr(row, column.key) for column in self.columns]
+
+    def encode(self, row, direction: str) -> str:
+        payload = {"k": self.name, "d": direction, "v": [_dump(value) for value in self.values_of(row)]}
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode(self, cursor: str):
+        """(direction, values) or 400 for a cursor that was not issued for this list."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            if payload["k"] != self.name or payload["d"] not in ("next", "prev") or len(payload["v"]) != len(self.columns):
+                raise ValueError("cursor does not match this list")
+            values = [_load(value, column) for value, column in zip(payload["v"], self.columns)]
+        except (binascii.Error, ValueError, TypeError, KeyError) as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid cursor: {exc}")
+        return payload["d"], values
+
+
+def _dump(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _load(value, column):
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if not isinstance(value, python_type):
+        raise ValueError(f"bad value for {column.key}")
+    return value
+
+
+def paginate(
+    query: Query, keyset: Keyset, response: Response, limit: int, skip: int = 0, cursor: Optional[str] = None,
+    rank: Optional[ColumnElement] = None, request: Optional[Request] = None, version: Optional[ColumnElement] = None,
+):
+    """One page of `query` in keyset order; sets the cursor headers on `response`.
+
+    With `rank` (a search relevance expression) rows come best match first,
+    ties in keyset order, paged by `skip`. With `request` and `version` the page
+    is validated by ETag, and a 304 response is returned in place of the rows
+    when the client's copy is current.
+    """
+    backwards, values = False, None
+    if rank is not None:
+        if cursor:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="cursor cannot be combined with search; page search results with skip")
+        page = query.order_by(rank.desc(), *keyset.order_by()).offset(skip)
+    else:
+        direction, values = keyset.decode(cursor) if cursor else ("next", None)
+        backwards = direction == "prev"
+        page = keyset.page(query, values, reverse=backwards)
+        if values is None and skip:
+            page = page.offset(skip)
+
+    def fetch(page_query):
+        rows = page_query.limit(limit + 1).all()   # one extra row tells us whether there is more
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if backwards:
+            rows.reverse()
+        return rows, has_more
+
+    validate = version is not None and request is not None
+    if validate and request.headers.get("if-none-match") is not None:
+        keys, _ = fetch(page.with_entities(keyset.columns[-1], version))
+        not_modified = conditional.check(request, response, conditional.etag(keyset.name, [tuple(key) for key in keys]))
+        if not_modified:
+            return not_modified
+
+    if validate:
+        rows, has_more = fetch(page.add_columns(version))
+        page_etag = conditional.etag(keyset.name, [(getattr(row[0], keyset.columns[-1].key), row[1]) for row in rows])
+        response.headers.update(conditional.validators(page_etag))
+        rows = [row[0] for row in rows]
+    else:
+        rows, has_more = fetch(page)
+    if rank is not None:
+        return rows
+
+    # Going forwards there is a previous page when we started past the beginning;
+    # coming back, there is always a next page (the one we came from).
+    has_next = has_more if not backwards else True
+    has_prev = (values is not None or skip > 0) if not backwards else has_more
+    if rows and has_next:
+        response.headers[NEXT_CURSOR_HEADER] = keyset.encode(rows[-1], "next")
+    if rows and has_prev:
+        response.headers[PREV_CURSOR_HEADER] = keyset.encode(rows[0], "prev")
+    return rows
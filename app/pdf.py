@@ -0,0 +1,184 @@
+# app/pdf.py
+#
+# Minimal streaming PDF writer for tabular reports.
+#
+# Pages are written to the output file as soon as they are full; only the byte
+# offsets of the objects (two per page) are kept until the cross-reference table
+# is written at the end. Text uses the standard Helvetica fonts, which every
+# viewer ships, so nothing is embedded.
+#
+#   with open(path, "wb") as fp:
+#       report = TableReport(fp, "Detailed Expense Report", "Period: 2024-01-01 to 2024-12-31")
+#       report.begin_section("Fuel Records", [("Vehicle", 90, "left"), ("Cost ($)", 70, "right")])
+#       for row in rows:
+#           report.add_row(["ABC-123", "1,234.00"])
+#       report.end_section(["Total:", "98,765.00"])
+#       report.close()
+
+import zlib
+from typing import BinaryIO, List, Optional, Sequence, Tuple
+
+A4 = (595.0, 842.0)
+
+_FONTS = {"regular": "F1", "bold": "F2"}
+
+
+def _escape(text: str) -> bytes:
+    raw = text.encode("cp1252", errors="replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def fit(text: str, width: float, size: float) -> str:
+    """Truncate `text` to roughly fit `width` points (Helvetica averages ~0.5em per glyph)."""
+    max_chars = max(1, int(width / (size * 0.5)))
+    if len(text) <= max_chars:
+        return text
+    return text[:max(1, max_chars - 3)] + "..."
+
+
+class PdfWriter:
+    def __init__(self, fp: BinaryIO, page_size: Tuple[float, float] = A4):
+        self._fp = fp
+        self._position = 0
+        self._offsets: List[Optional[int]] = [None, None, None, None] # 1 catalog, 2 pages, 3-4 fonts
+        self._pages: List[int] = []
+        self.page_size = page_size
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        self._object(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pages)
+
+    def add_page(self, content: bytes):
+        """Write one page whose content stream is `content` (PDF drawing operators)."""
+        stream = zlib.compress(content)
+        content_id = self._reserve()
+        self._object(content_id, b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_id = self._reserve()
+        width, height = self.page_size
+        self._object(page_id, (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] "
+            b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>"
+        ) % (width, height, content_id))
+        self._pages.append(page_id)
+
+    def close(self):
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self._pages)
+        self._object(2, b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(self._pages))
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref_at = self._position
+        lines = [b"xref\n0 %d\n" % (len(self._offsets) + 1), b"0000000000 65535 f \n"]
+        lines.extend(b"%010d 00000 n \n" % offset for offset in self._offsets)
+        lines.append(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(self._offsets) + 1, xref_at))
+        self._write(b"".join(lines))
+
+    def _reserve(self) -> int:
+        self._offsets.append(None)
+        return len(self._offsets)
+
+    def _object(self, object_id: int, body: bytes):
+        self._offsets[object_id - 1] = self._position
+        self._write(b"%d 0 obj\n" % object_id + body + b"\nendobj\n")
+
+    def _write(self, data: bytes):
+        self._fp.write(data)
+        self._position += len(data)
+
+
+class TableReport:
+    """Paginates titled sections of fixed-width columns onto a PdfWriter."""
+
+    margin = 36.0
+    font_size = 7.5
+    row_height = 11.0
+
+    def __init__(self, fp: BinaryIO, title: str, subtitle: str = ""):
+        self._pdf = PdfWriter(fp)
+        self._ops: List[bytes] = []
+        self._y = 0.0
+        self._columns: Sequence[Tuple[str, float, str]] = ()
+        self._section = ""
+        self._new_page()
+        self._text(self.margin, self._y, title, 14, bold=True)
+        self._y -= 18
+        if subtitle:
+            self._text(self.margin, self._y, subtitle, 9)
+            self._y -= 14
+        self._y -= 6
+
+    def begin_section(self, title: str, columns: Sequence[Tuple[str, float, str]]):
+        """`columns` is a sequence of (label, width in points, "left" | "right")."""
+        self._section, self._columns = title, columns
+        if self._y < self.margin + 4 * self.row_height:
+            self._new_page()
+        self._y -= 4
+        self._text(self.margin, self._y, title, 10, bold=True)
+        self._y -= 14
+        self._header_row()
+
+    def add_row(self, cells: Sequence[str], bold: bool = False):
+        if self._y < self.margin + self.row_height:
+            self._new_page()
+            self._text(self.margin, self._y, f"{self._section} (continued)", 8, bold=True)
+            self._y -= 12
+            self._header_row()
+        self._cells(cells, bold=bold)
+
+    def add_note(self, text: str):
+        """A line of plain text across the whole table width."""
+        if self._y < self.margin + self.row_height:
+            self._new_page()
+        self._text(self.margin + 2, self._y, text, self.font_size)
+        self._y -= self.row_height
+
+    def end_section(self, footer: Optional[Sequence[str]] = None):
+        if footer is not None:
+            self._rule()
+            self.add_row(footer, bold=True)
+        self._y -= 10
+
+    def close(self):
+        self._finish_page()
+        self._pdf.close()
+
+    def _header_row(self):
+        width = sum(column[1] for column in self._columns)
+        top = self._y + self.font_size + 2
+        self._ops.append(b"0.231 0.51 0.965 rg %.2f %.2f %.2f %.2f re f" % (self.margin, top - self.row_height, width, self.row_height))
+        self._ops.append(b"1 g")
+        self._cells([column[0] for column in self._columns], bold=True)
+        self._ops.append(b"0 g")
+
+    def _cells(self, cells: Sequence[str], bold: bool = False):
+        x = self.margin
+        for cell, (_, width, align) in zip(cells, self._columns):
+            text = fit(cell or "", width - 4, self.font_size)
+            if align == "right":
+                text_x = x + width - 2 - len(text) * self.font_size * 0.5
+            else:
+                text_x = x + 2
+            self._text(text_x, self._y, text, self.font_size, bold=bold)
+            x += width
+        self._y -= self.row_height
+
+    def _rule(self):
+        width = sum(column[1] for column in self._columns)
+        y = self._y + self.font_size + 1
+        self._ops.append(b"0.5 w %.2f %.2f m %.2f %.2f l S" % (self.margin, y, self.margin + width, y))
+
+    def _text(self, x: float, y: float, text: str, size: float, bold: bool = False):
+        font = _FONTS["bold" if bold else "regular"].encode()
+        self._ops.append(b"BT /%s %.1f Tf %.2f %.2f Td (%s) Tj ET" % (font, size, x, y, _escape(text)))
+
+    def _new_page(self):
+        if self._ops:
+            self._finish_page()
+        self._y = self._pdf.page_size[1] - self.margin
+
+    def _finish_page(self):
+        number = self._pdf.page_count + 1
+        self._text(self._pdf.page_size[0] - self.margin - 40, self.margin / 2, f"Page {number}", 7)
+        self._pdf.add_page(b"\n".join(self._ops))
+        self._ops = []
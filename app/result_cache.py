@@ -0,0 +1,183 @@
+# app/result_cache.py
+#
+# In-process cache for analytics / dashboard results.
+#
+# Every cached function declares the tables it reads. Each table has a version
+# counter; the CRUD routers call bump("fuel", ...) after committing a write, and
+# any entry computed against an older version of one of its tables is treated as
+# a miss. Entries also expire after RESULT_CACHE_TTL_SECONDS, which bounds how
+# stale another worker process (whose counters were not bumped) can be.
+#
+#   @result_cache.cached("trip", "maintenance", "panne")
+#   async def _compute_monthly_activity(db, months_to_display=12, granularity="month"): ...
+#
+# The key is the function plus its normalized arguments; sessions are skipped.
+# The cache bounds the number of entries, not their size: only cache results
+# whose size does not grow with the data (aggregates, lookups), not record lists.
+# Concurrent misses for the same key are coalesced into one computation
+# (app/single_flight.py).
+#
+# A result read through a replica session is not stored while one of its
+# tables was bumped less than replica_max_lag_seconds + replica_lag_check_interval
+# ago: the replica may not have replayed that write yet, and the stale result
+# would be kept under the new versions. It is still returned; the next miss
+# after the window computes it again and stores it.
+
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import database, metrics
+from .config import settings
+from .single_flight import single_flight
+
+_versions: Dict[str, int] = {}
+_bumped_at: Dict[str, float] = {}   # table -> time.monotonic() of its last bump
+_versions_lock = threading.Lock()
+_replica_skips = metrics.counter("result_cache.replica_skips")
+
+
+def bump(*tables: str):
+    """Invalidate every cached result that read any of `tables`. Call after commit."""
+    now = time.monotonic()
+    with _versions_lock:
+        for table in tables:
+            _versions[table] = _versions.get(table, 0) + 1
+            _bumped_at[table] = now
+
+
+def table_versions(tables) -> Tuple[int, ...]:
+    with _versions_lock:
+        return tuple(_versions.get(table, 0) for table in tables)
+
+
+class ResultCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (expires_at, versions, value); order = least recently used first
+        self._entries: "OrderedDict[Hashable, Tuple[float, Tuple[int, ...], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = metrics.counter("result_cache.hits")
+        self._misses = metrics.counter("result_cache.misses")
+        self._evictions = metrics.counter("result_cache.evictions")
+
+    def get(self, key: Hashable, versions: Tuple[int, ...]):
+        """Return (True, value) for a fresh entry computed at `versions`, else (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] <= time.monotonic() or entry[1] != versions):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            self._misses.inc()
+            return False, None
+        self._hits.inc()
+        return True, entry[2]
+
+    def put(self, key: Hashable, versions: Tuple[int, ...], value: Any, ttl_seconds: Optional[float] = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, versions, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions.inc()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        hits, misses = self._hits.value, self._misses.value
+        lookups = hits + misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": hits,
+            "misses": misses,
+            "evictions": self._evictions.value,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "table_versions": dict(_versions),
+        }
+
+
+result_cache = ResultCache(settings.result_cache_max_entries, settings.result_cache_ttl_seconds)
+metrics.register_collector("result_cache", result_cache.stats)
+
+
+def _normalize(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(sorted((_normalize(item) for item in value), key=repr))
+    if isinstance(value, dict):
+        return tuple(sorted((key, _normalize(item)) for key, item in value.items()))
+    if hasattr(value, "model_dump"): # pydantic models (e.g. enum-bearing query objects)
+        return _normalize(value.model_dump())
+    return value
+
+
+def make_key(func, bound_arguments: Dict[str, Any]) -> Hashable:
+    params = tuple(sorted(
+        (name, _normalize(value)) for name, value in bound_arguments.items()
+        if not isinstance(value, (Session, AsyncSession))
+    ))
+    return (func.__module__, func.__qualname__, params)
+
+
+def _may_predate_writes(bound_arguments: Dict[str, Any], tables) -> bool:
+    """Whether a result read through a replica session may miss a write bumped in this worker."""
+    if not any(isinstance(value, (Session, AsyncSession)) and database.is_replica(value)
+               for value in bound_arguments.values()):
+        return False
+    since = time.monotonic() - (settings.replica_max_lag_seconds + settings.replica_lag_check_interval)
+    with _versions_lock:
+        return any(_bumped_at.get(table, float("-inf")) > since for table in tables)
+
+
+def _label(func, key) -> str:
+    params = ", ".join(f"{name}={value!r}" for name, value in key[2])
+    return f"{func.__name__}({params})"
+
+
+def cached(*tables: str, ttl_seconds: Optional[float] = None):
+    """Cache an async function's result until one of `tables` is bumped (or the TTL passes)."""
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = make_key(func, bound.arguments)
+            # Versions are read BEFORE computing: if a write commits meanwhile, the
+            # entry is stored under the old versions and the next lookup misses.
+            versions = table_versions(tables)
+            hit, value = result_cache.get(key, versions)
+            if hit:
+                return value
+
+            async def compute():
+                result = await func(*args, **kwargs)
+                if _may_predate_writes(bound.arguments, tables):
+                    _replica_skips.inc()
+                else:
+                    result_cache.put(key, versions, result, ttl_seconds)
+                return result
+
+            # versions are part of the flight key: a caller that arrives after a
+            # write never joins a computation that started before it
+            return await single_flight.do((key, versions), compute, label=_label(func, key))
+
+        wrapper.cache_tables = tables
+        return wrapper
+    return decorator
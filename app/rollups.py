@@ -0,0 +1,140 @@
+# app/rollups.py
+#
+# Keeps models.DailyCostRollup (one row per day, vehicle and cost category) in
+# step with the fuel, maintenance and reparation tables.
+#
+# The write handlers call these in the SAME session/transaction as their own
+# change, so the rollup commits or rolls back together with it:
+#
+#   create:  db.add(row); db.flush(); rollups.add(db, "fuel", row.id)
+#   update:  rollups.remove(db, "fuel", row.id); <apply changes>; db.flush(); rollups.add(db, "fuel", row.id)
+#   delete:  rollups.remove(db, "fuel", row.id); db.delete(row)
+#   bulk:    <INSERT ... RETURNING id>; rollups.add_many(db, "fuel", any_(ids))
+#
+# add/remove read the record back with SQL (INSERT ... SELECT ... ON CONFLICT
+# DO UPDATE), so the day is always cast(<date column> AS date) in the database,
+# exactly as the rebuild computes it.
+#
+# Backfill / repair:  python -m app.rollups rebuild [--since YYYY-MM-DD]
+
+import argparse
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Date, cast, delete, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from . import models
+
+CATEGORIES = ("fuel", "maintenance", "reparation")
+
+
+def _source(category: str):
+    """(day, vehicle_id, cost, quantity, id) for each raw record of `category`."""
+    if category == "fuel":
+        return select(
+            cast(models.Fuel.created_at, Date).label("day"),
+            models.Fuel.vehicle_id.label("vehicle_id"),
+            models.Fuel.cost.label("cost"),
+            models.Fuel.quantity.label("quantity"),
+        )
+    if category == "maintenance":
+        return select(
+            cast(models.Maintenance.maintenance_date, Date).label("day"),
+            models.Maintenance.vehicle_id.label("vehicle_id"),
+            models.Maintenance.maintenance_cost.label("cost"),
+            literal(0.0).label("quantity"),
+        )
+    if category == "reparation":
+        # Reparations reach their vehicle through the panne they fix
+        return select(
+            cast(models.Reparation.repair_date, Date).label("day"),
+            models.Panne.vehicle_id.label("vehicle_id"),
+            models.Reparation.cost.label("cost"),
+            literal(0.0).label("quantity"),
+        ).join(models.Panne, models.Reparation.panne_id == models.Panne.id)
+    raise ValueError(f"Unknown rollup category '{category}'")
+
+
+def _grouped(category: str, *where, sign: int = 1):
+    records = _source(category).where(*where).subquery()
+    return select(
+        records.c.day,
+        records.c.vehicle_id,
+        literal(category).label("category"),
+        (func.coalesce(func.sum(records.c.cost), 0) * sign).label("total_cost"),
+        (func.count() * sign).label("record_count"),
+        (func.coalesce(func.sum(records.c.quantity), 0) * sign).label("fuel_quantity"),
+    ).group_by(records.c.day, records.c.vehicle_id)
+
+
+def apply_delta(db: Session, category: str, *where, sign: int = 1):
+    """Add (sign=1) or subtract (sign=-1) the records matching `where` to/from the rollup."""
+    rollup = models.DailyCostRollup
+    stmt = insert(rollup).from_select(
+        ["day", "vehicle_id", "category", "total_cost", "record_count", "fuel_quantity"],
+        _grouped(category, *where, sign=sign),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[rollup.day, rollup.vehicle_id, rollup.category],
+        set_={
+            "total_cost": rollup.total_cost + stmt.excluded.total_cost,
+            "record_count": rollup.record_count + stmt.excluded.record_count,
+            "fuel_quantity": rollup.fuel_quantity + stmt.excluded.fuel_quantity,
+        },
+    )
+    db.execute(stmt)
+
+
+_ID_COLUMNS = {
+    "fuel": models.Fuel.id,
+    "maintenance": models.Maintenance.id,
+    "reparation": models.Reparation.id,
+}
+
+
+def add(db: Session, category: str, record_id: int):
+    apply_delta(db, category, _ID_COLUMNS[category] == record_id, sign=1)
+
+
+def remove(db: Session, category: str, record_id: int):
+    apply_delta(db, category, _ID_COLUMNS[category] == record_id, sign=-1)
+
+
+def add_many(db: Session, category: str, record_ids):
+    """add() for a whole batch; `record_ids` is anything the id column compares with, e.g. any_(array)."""
+    apply_delta(db, category, _ID_COLUMNS[category] == record_ids, sign=1)
+
+
+def rebuild(db: Session, since: Optional[date] = None):
+    """Recompute the rollup from the raw tables (all days, or days >= `since`). Commits."""
+    rollup = models.DailyCostRollup
+    clear = delete(rollup)
+    if since is not None:
+        clear = clear.where(rollup.day >= since)
+    db.execute(clear)
+    for category in CATEGORIES:
+        where = ()
+        if since is not None:
+            where = (_source(category).selected_columns.day >= since,)
+        apply_delta(db, category, *where)
+    db.commit()
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(prog="python -m app.rollups", description="Maintain the daily_cost_rollup table.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rebuild_cmd = commands.add_parser("rebuild", help="Recompute rollups from the fuel, maintenance and reparation tables.")
+    rebuild_cmd.add_argument("--since", type=date.fromisoformat, default=None,
+                             help="Only rebuild days on or after this date (YYYY-MM-DD).")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        rebuild(session, since=args.since)
+        print(f"daily_cost_rollup rebuilt{f' from {args.since}' if args.since else ''}.")
+    finally:
+        session.close()
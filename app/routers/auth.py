@@ -2,7 +2,8 @@
 
 from fastapi import APIRouter, Depends, status, HTTPException, Response
 from fastapi.security.oauth2 import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 # from datetime import timedelta # Not needed here anymore for this function
 
 from .. import database, schemas, models, utils, oauth2 
@@ -13,18 +14,22 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=schemas.Token)
-def login_for_access_token(
+async def login_for_access_token(
     user_credentials_form: OAuth2PasswordRequestForm = Depends(), 
-    db: Session = Depends(database.get_db)
+    db: AsyncSession = Depends(database.get_async_db)
 ):
     identifier = user_credentials_form.username 
     password = user_credentials_form.password
 
-    db_user = db.query(models.User).filter(
-        (models.User.email == identifier) | (models.User.username == identifier)
-    ).first()
+    result = await db.execute(
+        select(models.User).filter(
+            (models.User.email == identifier) | (models.User.username == identifier)
+        )
+    )
+    db_user = result.scalars().first()
 
-    if not db_user or not utils.verify(password, db_user.password):
+    # bcrypt runs on the bounded hashing pool, not the event loop or the shared threadpool
+    if not db_user or not await utils.verify_async(password, db_user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, 
             detail="Incorrect email or password",
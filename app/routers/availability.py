@@ -0,0 +1,48 @@
+# app/routers/availability.py
+#
+# GET /availability?start=...&end=... : the vehicles and drivers on no
+# scheduled trip in [start, end), for the trip form's pickers. Without end the
+# window is open-ended, as for a trip with no end time yet. See
+# app/availability.py.
+#
+# The answer is advisory: it comes from the read replica and a trip booked a
+# moment later can take a vehicle it lists. POST /trip/ still answers 409 then.
+
+import time
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import availability, metrics, oauth2, schemas
+from ..database import get_async_read_db
+
+router = APIRouter(
+    prefix="/availability",
+    tags=["Availability"],
+    dependencies=[Depends(oauth2.get_current_user)],
+)
+
+
+@router.get("", response_model=schemas.AvailabilityResponse)
+async def get_availability(
+    start: datetime = Query(..., description="Window start (ISO 8601, with a UTC offset)"),
+    end: Optional[datetime] = Query(default=None, description="Window end, exclusive; omit for an open-ended window"),
+    exclude_trip_id: Optional[int] = Query(default=None, description="Ignore this trip, e.g. the one being rescheduled"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    # A bound without a UTC offset is UTC, as for trip times; mixing the two must not raise TypeError
+    start, end = schemas.as_utc(start), schemas.as_utc(end)
+    if end is not None and end <= start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end must be after start")
+    started = time.perf_counter()
+    vehicles = (await db.execute(availability.free_vehicles(start, end, exclude_trip_id))).all()
+    drivers = (await db.execute(availability.free_drivers(start, end, exclude_trip_id))).all()
+    metrics.histogram("availability.seconds").observe(time.perf_counter() - started)
+    return schemas.AvailabilityResponse(
+        start=start,
+        end=end,
+        vehicles=[schemas.ReferenceVehicle.model_validate(row) for row in vehicles],
+        drivers=[schemas.ReferenceDriver.model_validate(row) for row in drivers],
+    )
@@ -3,7 +3,7 @@ from typing import Optional,List, Dict
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from .. import models ,schemas,oauth2,utils
+from .. import models ,schemas,oauth2,utils,result_cache
 from ..database import  get_db
 
 router = APIRouter(prefix="/category_maintenance", tags=['Category aintenance'])
@@ -15,6 +15,7 @@ def create_cat_maintenance(cat_maintenance: schemas.CategoryMaintenanceCreate, d
     new_cat_maintenance = models.CategoryMaintenance(**cat_maintenance.dict())
     db.add(new_cat_maintenance)
     db.commit()
+    result_cache.bump("category_maintenance")
     db.refresh(new_cat_maintenance)
     return new_cat_maintenance
 
@@ -52,6 +53,7 @@ def delete_cat_maintenance(id:int,db:Session = Depends(get_db), current_user : s
          
    cat_maintenance_query.delete(synchronize_session = False) 
    db.commit()  
+   result_cache.bump("category_maintenance")
    return Response(status_code=status.HTTP_204_NO_CONTENT)
 ############################################################################################################################
 
@@ -67,5 +69,6 @@ def update_cat_maintenance(id:int,updated_cat_maintenance:schemas.CategoryMainte
    
     cat_maintenance_query.update(updated_cat_maintenance.dict(),synchronize_session = False)
     db.commit()
+    result_cache.bump("category_maintenance")
     return cat_maintenance_query.first()  
 ############################################################################################################################
\ No newline at end of file
@@ -3,7 +3,7 @@ from typing import Optional,List, Dict
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from .. import models ,schemas,oauth2,utils
+from .. import models ,schemas,oauth2,utils,result_cache
 from ..database import  get_db
 
 router = APIRouter(prefix="/category_panne", tags=['Category Panne'])
@@ -14,6 +14,7 @@ def create_category_panne(cat_panne : schemas.CategoryPanneCreate, db:Session =
     new_Cat_panne= models.CategoryPanne(**cat_panne.dict())
     db.add(new_Cat_panne)
     db.commit()
+    result_cache.bump("category_panne")
     db.refresh(new_Cat_panne)
     return new_Cat_panne
 
@@ -51,6 +52,7 @@ def delete_cat_panne(id:int,db:Session = Depends(get_db), current_user : str = D
          
    cat_panne_query.delete(synchronize_session = False) 
    db.commit()  
+   result_cache.bump("category_panne")
    return Response(status_code=status.HTTP_204_NO_CONTENT)
 ############################################################################################################################
 
@@ -66,5 +68,6 @@ def update_cat_panne(id:int,updated_cat_panne:schemas.CategoryPanneCreate,db:Ses
    
     cat_panne_query.update(updated_cat_panne.dict(),synchronize_session = False)
     db.commit()
+    result_cache.bump("category_panne")
     return cat_panne_query.first()  
 ############################################################################################################################
\ No newline at end of file
@@ -1,14 +1,17 @@
 # app/routers/dashboard_data_api.py
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session, joinedload ,selectinload 
-from sqlalchemy import func, desc, and_, or_ 
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload ,selectinload
+from sqlalchemy import select, func, desc, and_, or_
 from typing import List, Optional
 from datetime import datetime, timedelta, date as date_type_internal
 from calendar import monthrange # For getting the last day of a month
 
 # Adjust these imports to match your project structure
-from .. import models, schemas, oauth2 
-from ..database import get_db
+from .. import models, schemas, oauth2, aggregation, result_cache, serialization
+from ..database import get_async_read_db, get_async_read_session_factory
+from .trip import TRIP_SERIALIZER
 
 router = APIRouter(
     prefix="/dashboard-data",
@@ -17,15 +20,27 @@ router = APIRouter(
 )
 
 
+PLANNED_TRIPS_COUNT = select(func.count(models.Trip.id)).where(models.Trip.status == "planned")
 
-@router.get("/kpis", response_model=schemas.KPIStats)
-async def get_dashboard_kpis_data(db: Session = Depends(get_db)):
+
+def rollup_total(measure, category: str, first_day: date_type_internal, last_day: date_type_internal):
+    """Sum of a DailyCostRollup column over one category and an inclusive range of days."""
+    rollup = models.DailyCostRollup
+    return select(func.sum(measure)).where(
+        rollup.category == category,
+        rollup.day >= first_day,
+        rollup.day <= last_day
+    )
+
+
+@result_cache.cached("vehicle", "trip", "reparation", "fuel")
+async def _compute_kpis(db: AsyncSession) -> schemas.KPIStats:
     # 1. Total Vehicles
-    total_vehicles_count = db.query(func.count(models.Vehicle.id)).scalar() or 0
+    total_vehicles_count = (await db.execute(select(func.count(models.Vehicle.id)))).scalar() or 0
 
     # 2. Planned Trips
     # Ensure "Planned" is the exact status string used in your Trip model/database
-    planned_trips_count = db.query(func.count(models.Trip.id)).filter(models.Trip.status == "planned").scalar() or 0
+    planned_trips_count = (await db.execute(PLANNED_TRIPS_COUNT)).scalar() or 0
 
     # 3. Repairs This Month
     today_dt = datetime.utcnow() # Using UTC for server-side consistency
@@ -35,21 +50,21 @@ async def get_dashboard_kpis_data(db: Session = Depends(get_db)):
         end_of_current_month = start_of_current_month.replace(year=today_dt.year + 1, month=1) - timedelta(microseconds=1)
     else:
         end_of_current_month = start_of_current_month.replace(month=today_dt.month + 1) - timedelta(microseconds=1)
-    
-    repairs_this_month_count = db.query(func.count(models.Reparation.id)).filter(
-        models.Reparation.repair_date >= start_of_current_month, # Assuming repair_date is DateTime
-        models.Reparation.repair_date <= end_of_current_month
-    ).scalar() or 0
+
+    # Repairs and fuel cost are read from the per-day rollup (app/rollups.py)
+    rollup = models.DailyCostRollup
+    repairs_this_month_count = (await db.execute(rollup_total(
+        rollup.record_count, "reparation", start_of_current_month.date(), end_of_current_month.date()
+    ))).scalar() or 0
 
     # 4. Fuel Cost This Week (Monday to Sunday)
-    start_of_this_week = today_dt - timedelta(days=today_dt.weekday()) 
+    start_of_this_week = today_dt - timedelta(days=today_dt.weekday())
     start_of_this_week = start_of_this_week.replace(hour=0, minute=0, second=0, microsecond=0)
     end_of_this_week = start_of_this_week + timedelta(days=6, hours=23, minutes=59, seconds=59, microseconds=999999)
 
-    total_fuel_cost_this_week = db.query(func.sum(models.Fuel.cost)).filter(
-        models.Fuel.created_at >= start_of_this_week, # Assuming fuel logs have created_at
-        models.Fuel.created_at <= end_of_this_week
-    ).scalar() or 0.0
+    total_fuel_cost_this_week = (await db.execute(rollup_total(
+        rollup.total_cost, "fuel", start_of_this_week.date(), end_of_this_week.date()
+    ))).scalar() or 0.0
 
     return schemas.KPIStats(
         total_vehicles=total_vehicles_count,
@@ -58,10 +73,16 @@ async def get_dashboard_kpis_data(db: Session = Depends(get_db)):
         fuel_cost_this_week=round(total_fuel_cost_this_week, 2)
     )
 
-@router.get("/performance-insights", response_model=schemas.PerformanceInsightsResponse)
-async def get_dashboard_performance_insights(db: Session = Depends(get_db)):
+
+@router.get("/kpis", response_model=schemas.KPIStats)
+async def get_dashboard_kpis_data(db: AsyncSession = Depends(get_async_read_db)):
+    return await _compute_kpis(db)
+
+
+@result_cache.cached("fuel", "maintenance")
+async def _compute_performance_insights(db: AsyncSession) -> schemas.PerformanceInsightsResponse:
     today_dt = datetime.utcnow()
-    
+
     # Fuel Efficiency (Last month vs Current month total volume)
     # Current Month
     start_current_month = today_dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
@@ -69,37 +90,38 @@ async def get_dashboard_performance_insights(db: Session = Depends(get_db)):
         end_current_month = start_current_month.replace(year=today_dt.year + 1, month=1) - timedelta(microseconds=1)
     else:
         end_current_month = start_current_month.replace(month=today_dt.month + 1) - timedelta(microseconds=1)
-    current_month_volume = db.query(func.sum(models.Fuel.quantity)).filter(
-        models.Fuel.created_at >= start_current_month, models.Fuel.created_at <= end_current_month
-    ).scalar() or 0.0
+    rollup = models.DailyCostRollup # fuel volumes and maintenance counts come from the per-day rollup
+    current_month_volume = (await db.execute(rollup_total(
+        rollup.fuel_quantity, "fuel", start_current_month.date(), end_current_month.date()
+    ))).scalar() or 0.0
 
     # Last Month
     end_last_month = start_current_month - timedelta(microseconds=1)
     start_last_month = end_last_month.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    last_month_volume = db.query(func.sum(models.Fuel.quantity)).filter(
-        models.Fuel.created_at >= start_last_month, models.Fuel.created_at <= end_last_month
-    ).scalar() or 0.0
+    last_month_volume = (await db.execute(rollup_total(
+        rollup.fuel_quantity, "fuel", start_last_month.date(), end_last_month.date()
+    ))).scalar() or 0.0
 
     fuel_eff_percentage_change = None
     fuel_eff_trend = "no_comparison"
     if last_month_volume > 0:
         if current_month_volume >= 0: # Allow current_month_volume to be 0
             if current_month_volume == 0: # Infinite improvement if current is 0 and last was > 0
-                 percentage_change_raw = 100.0 
+                 percentage_change_raw = 100.0
             else:
                 # Percentage change in consumption: ((current - last) / last) * 100
                 # For efficiency (lower is better): ((last - current) / last) * 100
                 percentage_change_raw = ((last_month_volume - current_month_volume) / last_month_volume) * 100
-            
+
             fuel_eff_percentage_change = round(percentage_change_raw, 1)
             if percentage_change_raw > 5: fuel_eff_trend = "up"    # Efficiency up (consumption down)
             elif percentage_change_raw < -5: fuel_eff_trend = "down" # Efficiency down (consumption up)
             else: fuel_eff_trend = "steady"
     elif current_month_volume > 0 and last_month_volume == 0: # Went from 0 consumption to some consumption
-        fuel_eff_trend = "down" 
+        fuel_eff_trend = "down"
         fuel_eff_percentage_change = -100.0 # Conceptually, infinite worsening from a zero base
     # If both are 0, trend remains "no_comparison" and percentage_change is None
-    
+
     fuel_efficiency_result = schemas.FuelEfficiencyData(
         current_month_volume=round(current_month_volume,2),
         last_month_volume=round(last_month_volume,2),
@@ -108,40 +130,52 @@ async def get_dashboard_performance_insights(db: Session = Depends(get_db)):
     )
 
     # Maintenance Compliance (Total Count of all maintenance records)
-    total_maintenance_records_count = db.query(func.count(models.Maintenance.id)).scalar() or 0
+    total_maintenance_records_count = (await db.execute(
+        select(func.sum(rollup.record_count)).where(rollup.category == "maintenance")
+    )).scalar() or 0
     maintenance_compliance_result = schemas.MaintenanceComplianceData(
         total_maintenance_records=total_maintenance_records_count
     )
-    
+
     return schemas.PerformanceInsightsResponse(
         fuel_efficiency=fuel_efficiency_result,
         maintenance_compliance=maintenance_compliance_result
     )
 
-@router.get("/alerts", response_model=schemas.AlertsResponse)
-async def get_dashboard_alerts_data(db: Session = Depends(get_db)):
+
+@router.get("/performance-insights", response_model=schemas.PerformanceInsightsResponse)
+async def get_dashboard_performance_insights(db: AsyncSession = Depends(get_async_read_db)):
+    return await _compute_performance_insights(db)
+
+
+@result_cache.cached("panne", "maintenance", "trip", "vehicle", "category_panne", "category_maintenance")
+async def _compute_alerts(db: AsyncSession) -> schemas.AlertsResponse:
     alert_panne_item = None
-    last_panne = db.query(models.Panne).options(
-        joinedload(models.Panne.vehicle), 
-        joinedload(models.Panne.category_panne) # Assuming relation name is 'category_panne'
-    ).order_by(desc(models.Panne.panne_date)).first()
+    last_panne = (await db.execute(
+        select(models.Panne).options(
+            joinedload(models.Panne.vehicle),
+            joinedload(models.Panne.category_panne) # Assuming relation name is 'category_panne'
+        ).order_by(desc(models.Panne.panne_date)).limit(1)
+    )).scalars().first()
     if last_panne:
         plate = last_panne.vehicle.plate_number if last_panne.vehicle else "N/A"
         # Check if category_panne and its name attribute exist
-        msg = (last_panne.category_panne.panne_name 
-               if last_panne.category_panne and hasattr(last_panne.category_panne, 'panne_name') and last_panne.category_panne.panne_name 
+        msg = (last_panne.category_panne.panne_name
+               if last_panne.category_panne and hasattr(last_panne.category_panne, 'panne_name') and last_panne.category_panne.panne_name
                else (last_panne.description or "Issue details N/A"))
         alert_panne_item = schemas.AlertItem(plate_number=plate, message=msg, entity_type="panne", status=last_panne.status)
 
     alert_maint_item = None
-    last_maint = db.query(models.Maintenance).options(
-        joinedload(models.Maintenance.vehicle),  # <<< CORRECTED relationship name
-        joinedload(models.Maintenance.category_maintenance) # Assuming relation name
-    ).order_by(desc(models.Maintenance.maintenance_date)).first()
+    last_maint = (await db.execute(
+        select(models.Maintenance).options(
+            joinedload(models.Maintenance.vehicle),  # <<< CORRECTED relationship name
+            joinedload(models.Maintenance.category_maintenance) # Assuming relation name
+        ).order_by(desc(models.Maintenance.maintenance_date)).limit(1)
+    )).scalars().first()
     if last_maint:
         plate = last_maint.vehicle.plate_number if last_maint.vehicle else "N/A" # <<< CORRECTED
-        maint_category_name = (last_maint.category_maintenance.cat_maintenance 
-                               if last_maint.category_maintenance and hasattr(last_maint.category_maintenance, 'cat_maintenance') 
+        maint_category_name = (last_maint.category_maintenance.cat_maintenance
+                               if last_maint.category_maintenance and hasattr(last_maint.category_maintenance, 'cat_maintenance')
                                else "Maintenance Task")
         msg = f"{maint_category_name}"
         msg += f" (Due: {last_maint.maintenance_date.strftime('%Y-%m-%d')})" if last_maint.maintenance_date else ""
@@ -149,14 +183,16 @@ async def get_dashboard_alerts_data(db: Session = Depends(get_db)):
         alert_maint_item = schemas.AlertItem(plate_number=plate, message=msg, entity_type="maintenance", status=getattr(last_maint, 'status', 'Scheduled'))
 
     alert_trip_item = None
-    last_trip = db.query(models.Trip).options(
-        joinedload(models.Trip.vehicle) # Assuming relation name is 'vehicle'
-    ).order_by(desc(models.Trip.start_time)).first()
+    last_trip = (await db.execute(
+        select(models.Trip).options(
+            joinedload(models.Trip.vehicle) # Assuming relation name is 'vehicle'
+        ).order_by(desc(models.Trip.start_time)).limit(1)
+    )).scalars().first()
     if last_trip:
         plate = last_trip.vehicle.plate_number if last_trip.vehicle else "N/A"
         msg = f"Purpose: {last_trip.purpose or 'General Trip'}"
         alert_trip_item = schemas.AlertItem(plate_number=plate, message=msg, entity_type="trip", status=last_trip.status)
-    
+
     total_alerts_count = sum(1 for alert in [alert_panne_item, alert_maint_item, alert_trip_item] if alert is not None)
 
     return schemas.AlertsResponse(
@@ -166,140 +202,105 @@ async def get_dashboard_alerts_data(db: Session = Depends(get_db)):
         total_alerts=total_alerts_count
     )
 
+
+@router.get("/alerts", response_model=schemas.AlertsResponse)
+async def get_dashboard_alerts_data(db: AsyncSession = Depends(get_async_read_db)):
+    return await _compute_alerts(db)
+
+
+@result_cache.cached("panne", "vehicle", "category_panne")
+async def _compute_recent_pannes(db: AsyncSession) -> List[schemas.PanneOut]:
+    pannes = (await db.execute(
+        select(models.Panne).options(
+            joinedload(models.Panne.vehicle),
+            joinedload(models.Panne.category_panne)
+        ).order_by(desc(models.Panne.panne_date)).limit(3) # Fetch 3 most recent
+    )).scalars().all()
+    # Serialize while the session is still open (nothing can lazy-load afterwards)
+    return [schemas.PanneOut.model_validate(panne) for panne in pannes]
+
+
 @router.get("/recent-pannes", response_model=List[schemas.PanneOut])
-async def get_recent_pannes_for_dashboard(db: Session = Depends(get_db)):
-    pannes = db.query(models.Panne).options(
-        joinedload(models.Panne.vehicle),
-        joinedload(models.Panne.category_panne)
-    ).order_by(desc(models.Panne.panne_date)).limit(3).all() # Fetch 3 most recent
-    return pannes
+async def get_recent_pannes_for_dashboard(db: AsyncSession = Depends(get_async_read_db)):
+    return await _compute_recent_pannes(db)
 
 
-@router.get("/upcoming-trips", response_model=List[schemas.TripResponse])
-async def get_upcoming_trips_for_dashboard(db: Session = Depends(get_db)):
-    today_dt = datetime.utcnow() 
-    trips_from_db = db.query(models.Trip).options(
+def upcoming_trips_query(now: datetime, limit: int = 3):
+    return select(models.Trip).options(
         # Eager load vehicle, and from vehicle, eager load its make_ref and model_ref
+        # (lazy loading is not available on an AsyncSession, so everything used below must be loaded here)
         joinedload(models.Trip.vehicle).options(
             selectinload(models.Vehicle.make_ref), # Use selectinload for to-one from a collection
             selectinload(models.Vehicle.model_ref)
         ),
-        joinedload(models.Trip.driver)   
-    ).filter(
-        models.Trip.start_time >= today_dt,
-        models.Trip.status == "planned"     
-    ).order_by(models.Trip.start_time.asc()).limit(3).all()
-    
-    # Manually construct the response list to ensure correct mapping
-    response_trips: List[schemas.TripResponse] = []
-    for trip_db in trips_from_db:
-        vehicle_data_for_schema = None
-        if trip_db.vehicle:
-            vehicle_data_for_schema = schemas.VehicleNestedInTrip(
-                id=trip_db.vehicle.id,
-                plate_number=trip_db.vehicle.plate_number,
-                make=trip_db.vehicle.make_ref.vehicle_make if trip_db.vehicle.make_ref else None, # Get the name
-                model=trip_db.vehicle.model_ref.vehicle_model if trip_db.vehicle.model_ref else None # Get the name
-            )
-        
-        driver_data_for_schema = None
-        if trip_db.driver:
-            driver_data_for_schema = schemas.DriverNestedInTrip(
-                id=trip_db.driver.id,
-                first_name=trip_db.driver.first_name,
-                last_name=trip_db.driver.last_name
-            )
+        joinedload(models.Trip.driver)
+    ).where(
+        models.Trip.start_time >= now,
+        models.Trip.status == "planned"
+    ).order_by(models.Trip.start_time.asc()).limit(limit)
 
-        # Create TripResponse instance, spreading existing fields from trip_db
-        # and overriding/adding the structured vehicle and driver data.
-        # Pydantic V2+ allows direct creation from SQLAlchemy model if fields match.
-        # For clarity and control, especially with transformations:
-        
-        trip_response_data = {
-            "id": trip_db.id,
-            "vehicle_id": trip_db.vehicle_id,
-            "driver_id": trip_db.driver_id,
-            "start_location": trip_db.start_location,
-            "end_location": trip_db.end_location,
-            "start_time": trip_db.start_time,
-            "end_time": trip_db.end_time,
-            "status": trip_db.status,
-            "purpose": trip_db.purpose,
-            "notes": trip_db.notes,
-            "created_at": trip_db.created_at,
-            "updated_at": trip_db.updated_at,
-            "vehicle": vehicle_data_for_schema, # This is the nested Pydantic model
-            "driver": driver_data_for_schema   # This is the nested Pydantic model
-        }
-        response_trips.append(schemas.TripResponse.model_validate(trip_response_data)) # Pydantic V2
-        # For Pydantic V1: response_trips.append(schemas.TripResponse(**trip_response_data))
 
+@result_cache.cached("trip", "vehicle", "driver")
+async def _compute_upcoming_trips(db: AsyncSession) -> List[dict]:
+    trips_from_db = (await db.execute(upcoming_trips_query(datetime.utcnow()))).scalars().all()
 
+    # Straight from the loaded rows to TripResponse-shaped dicts (app/serialization.py)
+    return TRIP_SERIALIZER.many(trips_from_db)
 
-    return response_trips
 
+@router.get("/upcoming-trips", response_model=List[schemas.TripResponse])
+async def get_upcoming_trips_for_dashboard(db: AsyncSession = Depends(get_async_read_db)):
+    return serialization.render(await _compute_upcoming_trips(db))
 
 
+# --- Monthly Activity Chart Data ---
+ACTIVITY_SERIES = (
+    aggregation.Series("trips", models.Trip.start_time, func.count(models.Trip.id)),
+    aggregation.Series("maintenances", models.Maintenance.maintenance_date, func.count(models.Maintenance.id)),
+    aggregation.Series("pannes", models.Panne.panne_date, func.count(models.Panne.id)),
+)
+
+
+@result_cache.cached("trip", "maintenance", "panne")
+async def _compute_monthly_activity(
+    db: AsyncSession, months_to_display: int = 12, granularity: str = "month"
+) -> schemas.MonthlyActivityChartData:
+    # Window: first day of the month (months_to_display - 1) months ago through
+    # the end of the current month, bucketed by `granularity` in a single query.
+    today_date = datetime.utcnow().date()
+    year_offset, month_offset = divmod(today_date.month - 1 - (months_to_display - 1), 12)
+    window_start = datetime(today_date.year + year_offset, month_offset + 1, 1)
+    last_day_of_month_num = monthrange(today_date.year, today_date.month)[1]
+    window_end = datetime(today_date.year, today_date.month, last_day_of_month_num, 23, 59, 59, 999999)
+
+    activity = await aggregation.fetch_time_series(db, ACTIVITY_SERIES, window_start, window_end, granularity)
 
-# --- Endpoint for Monthly Activity Chart Data ---
-@router.get("/charts/monthly-activity", response_model=schemas.MonthlyActivityChartData)
-async def get_monthly_activity_chart_data(db: Session = Depends(get_db), months_to_display: int = 12):
-    labels = []
-    trips_counts = []
-    maintenances_counts = []
-    pannes_counts = []
-    
-    # Ensure today_dt is just a date object for month calculations, time part is irrelevant here
-    today_date = datetime.utcnow().date() 
-
-    for i in range(months_to_display -1, -1, -1): # Iterate from N-1 months ago down to current month (0)
-        # Calculate the target month
-        year_offset, month_offset = divmod(today_date.month - 1 - i, 12)
-        target_year = today_date.year + year_offset
-        target_month = month_offset + 1 # month is 1-indexed
-
-        # Get the first and last day of the target month
-        first_day_of_month = datetime(target_year, target_month, 1, 0, 0, 0)
-        last_day_of_month_num = monthrange(target_year, target_month)[1]
-        last_day_of_month = datetime(target_year, target_month, last_day_of_month_num, 23, 59, 59, 999999)
-        
-        labels.append(first_day_of_month.strftime("%b '%y")) # Format: Jan '23
-
-        # Count trips in that month (assuming Trip.start_time)
-        trips_count = db.query(func.count(models.Trip.id)).filter(
-            models.Trip.start_time >= first_day_of_month,
-            models.Trip.start_time <= last_day_of_month
-        ).scalar() or 0
-        trips_counts.append(trips_count)
-
-        # Count maintenances in that month (assuming Maintenance.maintenance_date)
-        maintenances_count = db.query(func.count(models.Maintenance.id)).filter(
-            models.Maintenance.maintenance_date >= first_day_of_month,
-            models.Maintenance.maintenance_date <= last_day_of_month
-        ).scalar() or 0
-        maintenances_counts.append(maintenances_count)
-
-        # Count pannes in that month (assuming Panne.panne_date)
-        pannes_count = db.query(func.count(models.Panne.id)).filter(
-            models.Panne.panne_date >= first_day_of_month,
-            models.Panne.panne_date <= last_day_of_month
-        ).scalar() or 0
-        pannes_counts.append(pannes_count)
-        
     return schemas.MonthlyActivityChartData(
-        labels=labels,
-        trips=trips_counts,
-        maintenances=maintenances_counts,
-        pannes=pannes_counts
+        labels=activity.labels,
+        trips=activity.values["trips"],
+        maintenances=activity.values["maintenances"],
+        pannes=activity.values["pannes"]
     )
 
-# --- Endpoint for Vehicle Status Chart Data ---
-@router.get("/charts/vehicle-status", response_model=schemas.VehicleStatusChartData)
-async def get_vehicle_status_chart_data(db: Session = Depends(get_db)):
-    status_counts_query = db.query(
-        models.Vehicle.status, 
-        func.count(models.Vehicle.id).label("count")
-    ).group_by(models.Vehicle.status).order_by(models.Vehicle.status).all() # Optional: order for consistency
+
+@router.get("/charts/monthly-activity", response_model=schemas.MonthlyActivityChartData)
+async def get_monthly_activity_chart_data(
+    db: AsyncSession = Depends(get_async_read_db),
+    months_to_display: int = Query(12, ge=1, le=120),
+    granularity: str = Query("month", pattern="^(day|week|month|quarter)$"),
+):
+    return await _compute_monthly_activity(db, months_to_display, granularity)
+
+
+# --- Vehicle Status Chart Data ---
+@result_cache.cached("vehicle")
+async def _compute_vehicle_status(db: AsyncSession) -> schemas.VehicleStatusChartData:
+    status_counts_query = (await db.execute(
+        select(
+            models.Vehicle.status,
+            func.count(models.Vehicle.id).label("count")
+        ).group_by(models.Vehicle.status).order_by(models.Vehicle.status) # Optional: order for consistency
+    )).all()
 
     labels = []
     counts = []
@@ -310,7 +311,7 @@ async def get_vehicle_status_chart_data(db: Session = Depends(get_db)):
         "in_use": "In Use",
         "in_repair": "In Repair",
         "decommissioned": "Decommissioned",
-        "sold": "Sold" 
+        "sold": "Sold"
         # Add others if you want specific display names
     }
 
@@ -320,51 +321,109 @@ async def get_vehicle_status_chart_data(db: Session = Depends(get_db)):
         else:
             # Use pre-defined display name if available, otherwise format the DB status
             display_label = display_name_map.get(status_from_db, status_from_db.replace('_', ' ').title())
-        
+
         labels.append(display_label)
         counts.append(count)
-            
-    return schemas.VehicleStatusChartData(labels=labels, counts=counts)
 
-    
+    return schemas.VehicleStatusChartData(labels=labels, counts=counts)
 
 
+@router.get("/charts/vehicle-status", response_model=schemas.VehicleStatusChartData)
+async def get_vehicle_status_chart_data(db: AsyncSession = Depends(get_async_read_db)):
+    return await _compute_vehicle_status(db)
 
-@router.get("/top-performing-drivers", response_model=List[schemas.TopDriver])
-async def get_top_performing_drivers(
-    db: Session = Depends(get_db),
-    limit: int = Query(3, ge=1, le=10, description="Number of top drivers to return") # Default to top 3
-):
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
 
-    # Query to get drivers ordered by the count of their completed trips in the last 30 days
+def top_drivers_query(since: datetime, limit: int):
+    # Drivers ordered by the count of their completed trips since `since`
     # This query assumes models.Trip has 'driver_id', 'status', and 'end_time' (or 'start_time')
-    top_drivers_query = db.query(
+    return select(
         models.Driver.id,
         models.Driver.first_name,
         models.Driver.last_name,
         func.count(models.Trip.id).label("completed_trips_count")
     ).join(
         models.Trip, models.Driver.id == models.Trip.driver_id
-    ).filter(
+    ).where(
         models.Trip.status == "Completed", # Or your equivalent status for a finished trip
-        models.Trip.end_time >= thirty_days_ago # Assuming end_time marks completion within period
-        # If using start_time: models.Trip.start_time >= thirty_days_ago 
+        models.Trip.end_time >= since # Assuming end_time marks completion within period
+        # If using start_time: models.Trip.start_time >= since
     ).group_by(
         models.Driver.id,
         models.Driver.first_name,
         models.Driver.last_name
     ).order_by(
         desc("completed_trips_count")
-    ).limit(limit).all()
+    ).limit(limit)
+
+
+@result_cache.cached("trip", "driver")
+async def _compute_top_drivers(db: AsyncSession, limit: int = 3) -> List[schemas.TopDriver]:
+    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+    top_drivers_query_result = (await db.execute(top_drivers_query(thirty_days_ago, limit))).all()
 
     top_drivers_list = []
-    for driver_id, first_name, last_name, trips_count in top_drivers_query:
+    for driver_id, first_name, last_name, trips_count in top_drivers_query_result:
         top_drivers_list.append(schemas.TopDriver(
             driver_id=driver_id,
             first_name=first_name,
             last_name=last_name,
             performance_metric=f"{trips_count} Trips Completed"
         ))
-        
-    return top_drivers_list
\ No newline at end of file
+
+    return top_drivers_list
+
+
+@router.get("/top-performing-drivers", response_model=List[schemas.TopDriver])
+async def get_top_performing_drivers(
+    db: AsyncSession = Depends(get_async_read_db),
+    limit: int = Query(3, ge=1, le=10, description="Number of top drivers to return") # Default to top 3
+):
+    return await _compute_top_drivers(db, limit)
+
+
+# --- Bundle: every dashboard section in one request ---
+# dashboard.html used to make eight calls per page load, each re-running
+# get_current_user and opening its own session. The bundle authenticates once and
+# runs the requested sections concurrently, one short-lived session per section
+# (an AsyncSession cannot run two statements at the same time).
+BUNDLE_SECTIONS = {
+    "kpis": lambda db, params: _compute_kpis(db),
+    "performance_insights": lambda db, params: _compute_performance_insights(db),
+    "alerts": lambda db, params: _compute_alerts(db),
+    "recent_pannes": lambda db, params: _compute_recent_pannes(db),
+    "upcoming_trips": lambda db, params: _compute_upcoming_trips(db),
+    "monthly_activity": lambda db, params: _compute_monthly_activity(db, params["months_to_display"]),
+    "vehicle_status": lambda db, params: _compute_vehicle_status(db),
+    "top_drivers": lambda db, params: _compute_top_drivers(db, params["top_drivers_limit"]),
+}
+
+
+@router.get("/bundle", response_model=schemas.DashboardBundleResponse)
+async def get_dashboard_bundle(
+    sections: Optional[str] = Query(
+        None, description=f"Comma-separated subset of: {', '.join(BUNDLE_SECTIONS)}. Defaults to all sections."
+    ),
+    months_to_display: int = Query(12, ge=1, le=120),
+    top_drivers_limit: int = Query(3, ge=1, le=10),
+):
+    if sections:
+        requested = list(dict.fromkeys(name.strip() for name in sections.split(",") if name.strip()))
+        unknown = [name for name in requested if name not in BUNDLE_SECTIONS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown dashboard section(s): {', '.join(unknown)}. Valid sections: {', '.join(BUNDLE_SECTIONS)}",
+            )
+    else:
+        requested = list(BUNDLE_SECTIONS)
+
+    params = {"months_to_display": months_to_display, "top_drivers_limit": top_drivers_limit}
+    # Replica-vs-primary is decided once so every section reads the same server
+    session_factory = await get_async_read_session_factory()
+
+    async def run_section(name: str):
+        async with session_factory() as db:
+            return await BUNDLE_SECTIONS[name](db, params)
+
+    results = await asyncio.gather(*(run_section(name) for name in requested))
+    return schemas.DashboardBundleResponse(**dict(zip(requested, results)))
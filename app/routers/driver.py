@@ -1,12 +1,13 @@
 # app/routers/driver.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, File, HTTPException, status, Query, Request, Response, UploadFile
 from sqlalchemy.orm import Session
-from sqlalchemy import or_ # For search queries
 from typing import List, Optional
 
-from .. import models, schemas, oauth2 # Assuming your models, schemas, oauth2 are in these parent modules
-from ..database import get_db # Assuming get_db is in the parent database module
+from .. import models, schemas, oauth2, result_cache, pagination, conditional, serialization, imports, writes, search as text_search # Assuming your models, schemas, oauth2 are in these parent modules
+from ..database import get_db, get_read_db # Assuming get_db is in the parent database module
+from ..jobs import jobs
+from .jobs import job_out
 
 router = APIRouter(
     prefix="/driver",  # All routes in this router will start with /driver
@@ -14,6 +15,18 @@ router = APIRouter(
     dependencies=[Depends(oauth2.get_current_user)] # Apply authentication to all driver routes
 )
 
+# Unique constraints on driver -> the 409 each write answers with
+DRIVER_CREATE_VIOLATIONS = {
+    "driver_cni_number_key": writes.conflict("Driver with CNI number '{cni_number}' already exists."),
+    "driver_email_key": writes.conflict("Driver with email '{email}' already exists."),
+    "driver_matricule_key": writes.conflict("Driver with matricule '{matricule}' already exists."),
+}
+DRIVER_UPDATE_VIOLATIONS = {
+    "driver_cni_number_key": writes.conflict("CNI number '{cni_number}' already in use."),
+    "driver_email_key": writes.conflict("Email '{email}' already in use."),
+    "driver_matricule_key": writes.conflict("Matricule '{matricule}' already in use."),
+}
+
 @router.post("/", response_model=schemas.DriverOut, status_code=status.HTTP_201_CREATED)
 def create_new_driver(
     driver_payload: schemas.DriverCreate,
@@ -22,71 +35,89 @@ def create_new_driver(
     """
     Create a new driver.
     Requires: last_name, first_name, cni_number, email, matricule.
-    CNI, Email, and Matricule must be unique.
+    CNI, Email, and Matricule must be unique (enforced by the database, see DRIVER_CREATE_VIOLATIONS).
     """
-    # Check for uniqueness of cni_number, email, and matricule
-    existing_driver_cni = db.query(models.Driver).filter(models.Driver.cni_number == driver_payload.cni_number).first()
-    if existing_driver_cni:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
-                            detail=f"Driver with CNI number '{driver_payload.cni_number}' already exists.")
-
-    existing_driver_email = db.query(models.Driver).filter(models.Driver.email == driver_payload.email).first()
-    if existing_driver_email:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
-                            detail=f"Driver with email '{driver_payload.email}' already exists.")
-
-    existing_driver_matricule = db.query(models.Driver).filter(models.Driver.matricule == driver_payload.matricule).first()
-    if existing_driver_matricule:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
-                            detail=f"Driver with matricule '{driver_payload.matricule}' already exists.")
-
-    db_driver = models.Driver(**driver_payload.model_dump())
+    values = driver_payload.model_dump()
+    db_driver = models.Driver(**values)
     db.add(db_driver)
-    db.commit()
+    writes.commit(db, DRIVER_CREATE_VIOLATIONS, values)
+    result_cache.bump("driver")
     db.refresh(db_driver)
     return db_driver
 
+
+DRIVER_IMPORT = imports.ImportTarget(
+    "driver", models.Driver, schemas.DriverCreate,
+    unique=(
+        imports.Unique("cni_number", models.Driver.cni_number, "CNI number"),
+        imports.Unique("email", models.Driver.email, "email"),
+        imports.Unique("matricule", models.Driver.matricule, "matricule"),
+    ),
+)
+
+
+@router.post("/import", response_model=schemas.JobOut, status_code=status.HTTP_202_ACCEPTED)
+async def import_drivers(
+    file: UploadFile = File(..., description="CSV or XLSX, one driver per row, header row first"),
+    current_user = Depends(oauth2.get_current_user)
+):
+    """
+    Start importing drivers from a spreadsheet with the columns of POST /driver/.
+    Poll GET /jobs/{id}; the job's download lists the rejected rows.
+    """
+    upload = await imports.save_upload(file)
+
+    async def run(job):
+        return await imports.run(DRIVER_IMPORT, upload, job)
+
+    job = jobs.submit("driver_import", current_user.id, run, output=("driver_import_errors.csv", "text/csv"))
+    return job_out(job)
+
 @router.get("/{driver_id}", response_model=schemas.DriverOut)
 def read_driver_by_id(
     driver_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
     Get a specific driver by their ID.
     """
+    not_modified = conditional.check_row(db, request, response, "driver", DRIVER_VERSION, models.Driver.id, driver_id)
+    if not_modified:
+        return not_modified
     db_driver = db.query(models.Driver).filter(models.Driver.id == driver_id).first()
     if db_driver is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Driver not found")
     return db_driver
 
+DRIVER_KEYSET = pagination.Keyset("driver", models.Driver.last_name, models.Driver.first_name, models.Driver.id)
+DRIVER_SERIALIZER = serialization.RowSerializer(schemas.DriverOut)
+DRIVER_VERSION = models.Driver.updated_at
+
 @router.get("/", response_model=List[schemas.DriverOut])
 def read_all_drivers(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = Query(default=100, ge=1, le=1000),
+    cursor: Optional[str] = Query(default=None, description="Opaque cursor from X-Next-Cursor / X-Prev-Cursor; takes precedence over skip"),
     search: Optional[str] = Query(default=None, description="Search term for name, CNI, email, or matricule")
 ):
     """
     Retrieve a list of drivers.
-    Supports pagination (`skip`, `limit`) and an optional `search` term.
+    Supports pagination (`cursor` or `skip`, and `limit`) and an optional `search` term.
     """
     query = db.query(models.Driver)
 
+    ranking = None
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                models.Driver.first_name.ilike(search_term),
-                models.Driver.last_name.ilike(search_term),
-                (models.Driver.first_name + " " + models.Driver.last_name).ilike(search_term), # Search full name
-                models.Driver.cni_number.ilike(search_term),
-                models.Driver.email.ilike(search_term),
-                models.Driver.matricule.ilike(search_term)
-            )
-        )
-
-    drivers = query.order_by(models.Driver.last_name, models.Driver.first_name).offset(skip).limit(limit).all()
-    return drivers
+        # Names, CNI, email and matricule (app/search.py), best match first
+        query, ranking = text_search.apply(query, text_search.DRIVER, search)
+
+    page = pagination.paginate(query, DRIVER_KEYSET, response, limit=limit, skip=skip, cursor=cursor, rank=ranking, request=request, version=DRIVER_VERSION)
+    return DRIVER_SERIALIZER.response(page, response)
 
 @router.put("/{driver_id}", response_model=schemas.DriverOut)
 def update_existing_driver(
@@ -106,26 +137,12 @@ def update_existing_driver(
 
     update_data = driver_payload.model_dump(exclude_unset=False) # Get all fields from payload
 
-    # Check for uniqueness if sensitive fields are changed
-    if 'cni_number' in update_data and update_data['cni_number'] != db_driver.cni_number:
-        existing_cni = db.query(models.Driver).filter(models.Driver.cni_number == update_data['cni_number']).first()
-        if existing_cni:
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"CNI number '{update_data['cni_number']}' already in use.")
-    
-    if 'email' in update_data and update_data['email'] != db_driver.email:
-        existing_email = db.query(models.Driver).filter(models.Driver.email == update_data['email']).first()
-        if existing_email:
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Email '{update_data['email']}' already in use.")
-
-    if 'matricule' in update_data and update_data['matricule'] != db_driver.matricule:
-        existing_matricule = db.query(models.Driver).filter(models.Driver.matricule == update_data['matricule']).first()
-        if existing_matricule:
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Matricule '{update_data['matricule']}' already in use.")
-
     for key, value in update_data.items():
         setattr(db_driver, key, value)
 
-    db.commit()
+    # CNI / email / matricule taken by another driver -> 409
+    writes.commit(db, DRIVER_UPDATE_VIOLATIONS, update_data)
+    result_cache.bump("driver")
     db.refresh(db_driver)
     return db_driver
 
@@ -149,4 +166,5 @@ def delete_existing_driver(
 
     db.delete(db_driver)
     db.commit()
+    result_cache.bump("driver")
     return # No content to return for 204
\ No newline at end of file
@@ -1,14 +1,13 @@
 # app/routers/fuel.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import desc # For ordering
 from typing import List, Optional
 from datetime import date as date_type, datetime # For potential date filtering
 
 # Assuming your project structure is app/routers, app/models, app/schemas, app/database
-from .. import models, schemas, oauth2
-from ..database import get_db
+from .. import models, schemas, oauth2, rollups, fuel_state, result_cache, pagination, conditional, serialization, bulk, writes, idempotency
+from ..database import get_db, get_read_db
 
 
 
@@ -18,27 +17,31 @@ router = APIRouter(
     #dependencies=[Depends(oauth2.get_current_user)] # Secure all endpoints in this router
 )
 
+# Foreign keys on fuel -> the 404 each write answers with
+FUEL_CREATE_VIOLATIONS = {
+    "fuel_vehicle_id_fkey": writes.not_found("Vehicle with ID {vehicle_id} not found."),
+    "fuel_fuel_type_id_fkey": writes.not_found("Fuel Type with ID {fuel_type_id} not found."),
+}
+FUEL_UPDATE_VIOLATIONS = {
+    "fuel_vehicle_id_fkey": writes.not_found("New vehicle with ID {vehicle_id} not found."),
+    "fuel_fuel_type_id_fkey": writes.not_found("New Fuel Type with ID {fuel_type_id} not found."),
+}
+
 @router.post("/", response_model=schemas.FuelOut, status_code=status.HTTP_201_CREATED)
 def create_new_fuel_record(
     fuel_payload: schemas.FuelCreatePayload, # Client sends this payload (cost is omitted)
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Depends(idempotency.key_header),
 ):
     """
     Create a new fuel record.
     Client provides vehicle_id, fuel_type_id, quantity, and price_little.
     The 'cost' is automatically calculated by the server as quantity * price_little.
+    A retry with the same Idempotency-Key returns the first response instead of a second record.
     """
-    # Validate Vehicle existence
-    vehicle = db.query(models.Vehicle).filter(models.Vehicle.id == fuel_payload.vehicle_id).first()
-    if not vehicle:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                            detail=f"Vehicle with ID {fuel_payload.vehicle_id} not found.")
-
-    # Validate FuelType existence
-    fuel_type = db.query(models.FuelType).filter(models.FuelType.id == fuel_payload.fuel_type_id).first()
-    if not fuel_type:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                            detail=f"Fuel Type with ID {fuel_payload.fuel_type_id} not found.")
+    claim = idempotency.claim(db, "fuel", idempotency_key, fuel_payload)
+    if claim.replay is not None:
+        return claim.replay
 
     # Validate quantity and price_little
     if fuel_payload.quantity <= 0:
@@ -61,28 +64,111 @@ def create_new_fuel_record(
     )
     
     db.add(db_fuel_record)
-    db.commit()
-    db.refresh(db_fuel_record)
-    return db_fuel_record # Will be serialized by schemas.FuelOut
+    # Unknown vehicle / fuel type -> 404, from the foreign keys
+    writes.flush(db, FUEL_CREATE_VIOLATIONS, fuel_payload.model_dump())
+    rollups.add(db, "fuel", db_fuel_record.id) # same transaction as the insert
+    fuel_state.advance(db, "fuel", models.Fuel.id == db_fuel_record.id)
+    # Commits; with an Idempotency-Key the response is stored under it in the same transaction
+    response = claim.commit(db, db_fuel_record, FUEL_SERIALIZER, status.HTTP_201_CREATED)
+    result_cache.bump("fuel")
+    return response # Will be serialized by schemas.FuelOut
+
+
+def _fuel_rules(row: schemas.FuelBulkRow) -> Optional[str]:
+    if row.quantity <= 0:
+        return "Fuel quantity must be greater than zero."
+    if row.price_little <= 0:
+        return "Price per unit (price_little) must be greater than zero."
+    return None
+
+
+def _after_fuel_insert(db: Session, ids):
+    rollups.add_many(db, "fuel", ids)
+    fuel_state.advance(db, "fuel", models.Fuel.id == ids)
+
+
+FUEL_BULK = bulk.BulkTarget(
+    "fuel", models.Fuel, schemas.FuelBulkRow,
+    columns=("vehicle_id", "fuel_type_id", "quantity", "price_little", "cost", "created_at"),
+    values=lambda row: (row.vehicle_id, row.fuel_type_id, row.quantity, row.price_little,
+                        round(row.quantity * row.price_little, 2), row.created_at),
+    references=(
+        bulk.Reference("vehicle_id", models.Vehicle.id, "Vehicle"),
+        bulk.Reference("fuel_type_id", models.FuelType.id, "Fuel Type"),
+    ),
+    check=_fuel_rules,
+    after_insert=_after_fuel_insert,
+)
+
+
+@router.post("/bulk", response_model=schemas.BulkLoadResult)
+def bulk_load_fuel_records(
+    upload: bulk.Upload = Depends(bulk.read_upload),
+    db: Session = Depends(get_db)
+):
+    """
+    Load many fuel records at once, e.g. a fuel-card provider export.
+    Body: NDJSON (application/x-ndjson) or CSV with a header row (text/csv), with the
+    fields of POST /fuel/ plus an optional created_at. Cost is calculated as for single records.
+    Valid lines are loaded and the others are listed in the report with their line number.
+    """
+    result = bulk.load(db, FUEL_BULK, upload)
+    if result.inserted:
+        result_cache.bump("fuel")
+    return result
+
+@router.get("/eligibility", response_model=List[schemas.VehicleEligibility])
+def fleet_fuel_eligibility(
+    eligible: Optional[bool] = Query(default=None, description="Only the eligible (true) or ineligible (false) vehicles"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Fuel eligibility of every vehicle, by plate number, with the same rules and messages as
+    /fuel/check-eligibility/{vehicle_id}: one query over vehicle_fuel_state (app/fuel_state.py).
+    """
+    answers = []
+    for row in db.execute(fuel_state.eligibility_query()):
+        is_eligible, message = fuel_state.assess(row.status, row.last_fueled_at, row.last_trip_completed_at)
+        if eligible is not None and is_eligible != eligible:
+            continue
+        answers.append(schemas.VehicleEligibility(
+            vehicle_id=row.id, plate_number=row.plate_number, status=row.status,
+            last_fueled_at=row.last_fueled_at, last_trip_completed_at=row.last_trip_completed_at,
+            eligible=is_eligible, message=message,
+        ))
+    return answers
 
 @router.get("/{fuel_id}", response_model=schemas.FuelOut)
 def read_fuel_record_by_id(
     fuel_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
     Get a specific fuel record by its ID.
     """
+    not_modified = conditional.check_row(db, request, response, "fuel", FUEL_VERSION, models.Fuel.id, fuel_id)
+    if not_modified:
+        return not_modified
     db_fuel_record = db.query(models.Fuel).filter(models.Fuel.id == fuel_id).first()
     if db_fuel_record is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Fuel record not found")
     return db_fuel_record
 
+FUEL_KEYSET = pagination.Keyset("fuel", models.Fuel.created_at, models.Fuel.id, descending=True)
+FUEL_SERIALIZER = serialization.RowSerializer(schemas.FuelOut)
+FUEL_VERSION = models.Fuel.updated_at
+
+
 @router.get("/", response_model=List[schemas.FuelOut])
 def read_all_fuel_records(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(default=100, ge=1, le=1000),
+    cursor: Optional[str] = Query(default=None, description="Opaque cursor from X-Next-Cursor / X-Prev-Cursor; takes precedence over skip"),
     vehicle_id_filter: Optional[int] = Query(default=None, alias="vehicle_id", description="Filter by Vehicle ID"),
     fuel_type_id_filter: Optional[int] = Query(default=None, alias="fuel_type_id", description="Filter by Fuel Type ID"),
     date_after: Optional[date_type] = Query(default=None, description="Filter records created on or after this date (YYYY-MM-DD)"),
@@ -90,6 +176,7 @@ def read_all_fuel_records(
 ):
     """
     Retrieve a list of fuel records with optional filtering and pagination.
+    Newest first; follow the X-Next-Cursor header for the next page.
     """
     query = db.query(models.Fuel)
 
@@ -107,8 +194,9 @@ def read_all_fuel_records(
     # query = query.options(joinedload(models.Fuel.vehicle_ref), joinedload(models.Fuel.fuel_type_ref))
 
 
-    fuel_records = query.order_by(desc(models.Fuel.created_at)).offset(skip).limit(limit).all()
-    return fuel_records
+    page = pagination.paginate(query, FUEL_KEYSET, response, limit=limit, skip=skip, cursor=cursor, request=request, version=FUEL_VERSION)
+
+    return FUEL_SERIALIZER.response(page, response)
 
 @router.put("/{fuel_id}", response_model=schemas.FuelOut)
 def update_existing_fuel_record(
@@ -127,19 +215,6 @@ def update_existing_fuel_record(
 
     update_data = fuel_payload.model_dump(exclude_unset=True) # Get only fields sent by client
 
-    # --- Validate foreign keys if they are being changed ---
-    if "vehicle_id" in update_data and update_data["vehicle_id"] != db_fuel_record.vehicle_id:
-        vehicle = db.query(models.Vehicle).filter(models.Vehicle.id == update_data["vehicle_id"]).first()
-        if not vehicle:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                                detail=f"New vehicle with ID {update_data['vehicle_id']} not found.")
-    
-    if "fuel_type_id" in update_data and update_data["fuel_type_id"] != db_fuel_record.fuel_type_id:
-        fuel_type = db.query(models.FuelType).filter(models.FuelType.id == update_data["fuel_type_id"]).first()
-        if not fuel_type:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                                detail=f"New Fuel Type with ID {update_data['fuel_type_id']} not found.")
-
     # --- Recalculate cost if quantity or price_little is updated ---
     recalculate_cost_flag = False
     # Start with current values from DB, then update if payload provides new values
@@ -162,11 +237,21 @@ def update_existing_fuel_record(
         # Ensure 'cost' is part of update_data so setattr applies it
         update_data['cost'] = round(effective_quantity * effective_price_little, 2)
     
+    # Take the old values out of the rollup before changing the row, add the new ones after
+    rollups.remove(db, "fuel", fuel_id)
+    previous_vehicle_id = db_fuel_record.vehicle_id
+
     # Apply all changes from update_data to the database model instance
     for key, value in update_data.items():
         setattr(db_fuel_record, key, value)
 
+    # A new vehicle / fuel type that does not exist -> 404, from the foreign keys
+    writes.flush(db, FUEL_UPDATE_VIOLATIONS, update_data)
+    rollups.add(db, "fuel", fuel_id)
+    if db_fuel_record.vehicle_id != previous_vehicle_id:
+        fuel_state.recompute(db, (previous_vehicle_id, db_fuel_record.vehicle_id))
     db.commit()
+    result_cache.bump("fuel")
     db.refresh(db_fuel_record)
     return db_fuel_record
 
@@ -182,8 +267,12 @@ def delete_existing_fuel_record(
     if db_fuel_record is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Fuel record not found for deletion")
 
+    rollups.remove(db, "fuel", fuel_id)
     db.delete(db_fuel_record)
+    db.flush()
+    fuel_state.recompute(db, (db_fuel_record.vehicle_id,)) # it may have been the latest fueling
     db.commit()
+    result_cache.bump("fuel")
     return # No response body for 204 status
 
 
@@ -199,60 +288,15 @@ def check_fuel_eligibility(vehicle_id: int, db: Session = Depends(get_db)):
     Checks if a vehicle is eligible for fueling based on two business rules:
     1. The vehicle's status must be 'available'.
     2. A 'Completed' trip must have occurred since the last fueling.
+    Ineligible vehicles get a 400 with {"eligible": false, "message": ...}.
     """
-    # Fetch the vehicle first
-    vehicle = db.query(models.Vehicle).filter(models.Vehicle.id == vehicle_id).first()
-    if not vehicle:
+    row = db.execute(fuel_state.eligibility_query(models.Vehicle.id == vehicle_id)).first()
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail={"message": f"Vehicle with ID {vehicle_id} not found."}
         )
-
-    # --- RULE 1: Check if the vehicle status is 'available' ---
-    if vehicle.status != 'available':
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail={
-                "eligible": False,
-                "message": f"Vehicle is not eligible for fueling. Its current status is '{vehicle.status}'."
-            }
-        )
-
-    # --- RULE 2: Check for a completed trip since the last fueling ---
-
-    # Step 2.1: Find the most recent fuel log for this vehicle
-    last_fuel_record = db.query(models.Fuel).filter(
-        models.Fuel.vehicle_id == vehicle_id
-    ).order_by(desc(models.Fuel.created_at)).first()
-
-    # Step 2.2: If there is a previous fuel record, we must check for a trip
-    if last_fuel_record:
-        # Get the timestamp of the last fueling
-        last_fueling_time = last_fuel_record.created_at
-
-        # Step 2.3: Check if a trip with status 'Completed' exists for this vehicle
-        # where the trip's end_time is AFTER the last fueling time.
-        # We use end_time as it signifies the completion of the trip.
-        completed_trip_exists = db.query(models.Trip).filter(
-            models.Trip.vehicle_id == vehicle_id,
-            models.Trip.status == 'Completed',
-            models.Trip.end_time > last_fueling_time
-        ).first() # We only need to know if at least one exists
-
-        if not completed_trip_exists:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail={
-                    "eligible": False,
-                    "message": "A completed trip is required since the last refueling on " + last_fueling_time.strftime('%Y-%m-%d %H:%M')
-                }
-            )
-
-    # If the code reaches here, it means:
-    # - The vehicle status is 'available'.
-    # - EITHER this is the vehicle's very first fueling OR a completed trip has occurred since the last one.
-    # Therefore, the vehicle is eligible.
-    return schemas.EligibilityResponse(
-        eligible=True,
-        message="Vehicle is eligible for fueling."
-    )
\ No newline at end of file
+    eligible, message = fuel_state.assess(row.status, row.last_fueled_at, row.last_trip_completed_at)
+    if not eligible:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail={"eligible": False, "message": message})
+    return schemas.EligibilityResponse(eligible=True, message=message)
@@ -3,7 +3,7 @@ from typing import Optional,List, Dict
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from .. import models ,schemas,oauth2,utils
+from .. import models ,schemas,oauth2,utils,result_cache
 from ..database import  get_db
 
 router = APIRouter(prefix="/fuel_type", tags=['Fuel Type'])
@@ -16,6 +16,7 @@ def create_fuel_type(typefuel : schemas.FuelTypeCreate, db:Session = Depends(get
     new_fueltype = models.FuelType(**typefuel.dict())
     db.add(new_fueltype)
     db.commit()
+    result_cache.bump("fuel_type")
     db.refresh(new_fueltype)
     return new_fueltype
 
@@ -52,7 +53,8 @@ def delete_fuel_type(id:int,db:Session = Depends(get_db), current_user : str = D
   
          
    fueltype_query.delete(synchronize_session = False) 
-   db.commit()  
+   db.commit()
+   result_cache.bump("fuel_type")
    return Response(status_code=status.HTTP_204_NO_CONTENT)
 ############################################################################################################################
 
@@ -68,5 +70,6 @@ def update_fueltype(id:int,updated_fueltype:schemas.FuelTypeCreate,db:Session =
    
     fueltype_query.update(updated_fueltype.dict(),synchronize_session = False)
     db.commit()
+    result_cache.bump("fuel_type")
     return fueltype_query.first()  
 ############################################################################################################################
\ No newline at end of file
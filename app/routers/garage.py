@@ -3,7 +3,7 @@ from typing import Optional,List, Dict
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from .. import models ,schemas,oauth2,utils
+from .. import models ,schemas,oauth2,utils,result_cache
 from ..database import  get_db
 
 router = APIRouter(prefix="/garage", tags=['Garage'])
@@ -15,6 +15,7 @@ def create_garage(garage : schemas.GarageCreate, db:Session = Depends(get_db)):
     new_garage = models.Garage(**garage.dict())
     db.add(new_garage)
     db.commit()
+    result_cache.bump("garage")
     db.refresh(new_garage)
     return new_garage
 
@@ -52,6 +53,7 @@ def delete_garage(id:int,db:Session = Depends(get_db), current_user : str = Depe
          
    garage_query.delete(synchronize_session = False) 
    db.commit()  
+   result_cache.bump("garage")
    return Response(status_code=status.HTTP_204_NO_CONTENT)
 ############################################################################################################################
 
@@ -67,5 +69,6 @@ def update_garage(id:int,updated_garage:schemas.GarageCreate,db:Session = Depend
    
     garage_query.update(updated_garage.dict(),synchronize_session = False)
     db.commit()
+    result_cache.bump("garage")
     return garage_query.first()  
 ############################################################################################################################
\ No newline at end of file
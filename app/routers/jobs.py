@@ -0,0 +1,56 @@
+# app/routers/jobs.py
+#
+# Status and download endpoints for background jobs (app/jobs.py).
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+
+from .. import oauth2, schemas
+from ..jobs import Job, jobs
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["Background Jobs"],
+)
+
+
+def _timestamp(value: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(value, timezone.utc) if value is not None else None
+
+
+def job_out(job: Job) -> schemas.JobOut:
+    return schemas.JobOut(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        created_at=_timestamp(job.created_at),
+        started_at=_timestamp(job.started_at),
+        finished_at=_timestamp(job.finished_at),
+        progress=dict(job.progress),
+        result=job.result,
+        error=job.error,
+        download_url=router.url_path_for("download_job_result", job_id=job.id) if job.downloadable else None,
+    )
+
+
+def _get_job(job_id: str, current_user) -> Job:
+    job = jobs.get(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found")
+    return job
+
+
+@router.get("/{job_id}", response_model=schemas.JobOut)
+def get_job(job_id: str, current_user=Depends(oauth2.get_current_user)):
+    return job_out(_get_job(job_id, current_user))
+
+
+@router.get("/{job_id}/download", name="download_job_result")
+def download_job_result(job_id: str, current_user=Depends(oauth2.get_current_user)):
+    job = _get_job(job_id, current_user)
+    if not job.downloadable:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job {job_id} has no result to download (status: {job.status})")
+    return FileResponse(job.result_path, media_type=job.media_type, filename=job.filename)
@@ -1,10 +1,11 @@
-from fastapi import Response, status, HTTPException, Depends, APIRouter
+from fastapi import Request, Response, status, HTTPException, Depends, APIRouter, Query
 from typing import Optional,List
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from .. import models ,schemas,oauth2
+from .. import models ,schemas,oauth2,rollups,result_cache,pagination,conditional,serialization
+from .. import search as text_search
 from sqlalchemy import or_, func # Added func for potential casting if needed
-from ..database import  get_db
+from ..database import  get_db, get_read_db
 
 router = APIRouter(prefix="/maintenance", tags=['Maintenance'])
 
@@ -21,58 +22,54 @@ def create_maintenance(
     new_maintenance = models.Maintenance(**maintenance.model_dump()) # Pydantic V2
     # new_maintenance = models.Maintenance(**maintenance.dict()) # Pydantic V1
     db.add(new_maintenance)
+    db.flush()
+    rollups.add(db, "maintenance", new_maintenance.id) # same transaction as the insert
     db.commit()
+    result_cache.bump("maintenance")
     db.refresh(new_maintenance)
     return new_maintenance
 
 ############################################################################################################################
 
+MAINTENANCE_KEYSET = pagination.Keyset("maintenance", models.Maintenance.maintenance_date, models.Maintenance.id, descending=True)
+MAINTENANCE_SERIALIZER = serialization.RowSerializer(schemas.MaintenanceOut)
+MAINTENANCE_VERSION = models.Maintenance.updated_at
+
 @router.get("/", response_model=List[schemas.MaintenanceOut])
 def get_maintenance_logs( # Renamed for clarity (plural)
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(oauth2.get_current_user), # Corrected type hint
     limit: int = 10,  # A more reasonable default limit
     skip: int = 0,
+    cursor: Optional[str] = Query(default=None, description="Opaque cursor from X-Next-Cursor / X-Prev-Cursor; takes precedence over skip"),
     search: Optional[str] = ""
 ):
     query = db.query(models.Maintenance)
 
+    ranking = None
     if search:
-        search_term = f"%{search.lower()}%"
-        # Ensure related models are imported if not already at the top
-        # from ..models import Vehicle, CategoryMaintenance, Garage # Example
-
-        # Join with related tables for searching
-        # Using isouter=True to still get maintenance records if a related entity is somehow missing
-        # (though with FK constraints, this shouldn't happen for non-nullable FKs)
-        query = query.join(models.Vehicle, models.Maintenance.vehicule_id == models.Vehicle.id, isouter=True) \
-                     .join(models.CategoryMaintenance, models.Maintenance.cat_maintenance_id == models.CategoryMaintenance.id, isouter=True) \
-                     .join(models.Garage, models.Maintenance.garage_id == models.Garage.id, isouter=True)
-
-        query = query.filter(
-            or_(
-                models.Maintenance.receipt.ilike(search_term),
-                models.Vehicle.plate_number.ilike(search_term), # Assumes Vehicle model has plate_number
-                models.CategoryMaintenance.cat_maintenance.ilike(search_term), # Assumes CategoryMaintenance model has cat_maintenance
-                models.Garage.nom_garage.ilike(search_term), # Assumes Garage model has nom_garage
-                # To search by ID if `search` is a number (optional):
-                # func.cast(models.Maintenance.id, String).ilike(search_term),
-                # func.cast(models.Maintenance.maintenance_cost, String).ilike(search_term) # For searching cost as string
-            )
-        )
+        # Receipt, status, vehicle plate, category and garage (app/search.py), best match first
+        query, ranking = text_search.apply(query, text_search.MAINTENANCE, search)
 
     # Order results for consistent pagination
-    maintenances = query.order_by(models.Maintenance.maintenance_date.desc()).limit(limit).offset(skip).all()
-    return maintenances
+    page = pagination.paginate(query, MAINTENANCE_KEYSET, response, limit=limit, skip=skip, cursor=cursor, rank=ranking, request=request, version=MAINTENANCE_VERSION)
+    return MAINTENANCE_SERIALIZER.response(page, response)
 
 ############################################################################################################################
 
 @router.get("/{id}", response_model=schemas.MaintenanceOut) # Corrected response_model
 def get_maintenance_log_by_id( # Renamed for clarity
     id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(oauth2.get_current_user) # Corrected type hint
 ):
+    not_modified = conditional.check_row(db, request, response, "maintenance", MAINTENANCE_VERSION, models.Maintenance.id, id)
+    if not_modified:
+        return not_modified
     maintenance = db.query(models.Maintenance).filter(models.Maintenance.id == id).first()
 
     if not maintenance:
@@ -103,8 +100,10 @@ def delete_maintenance(
     # e.g., if current_user.id != maintenance_to_delete.creator_id and not current_user.is_admin:
     #     raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to perform requested action")
 
+    rollups.remove(db, "maintenance", id)
     maintenance_query.delete(synchronize_session=False)
     db.commit()
+    result_cache.bump("maintenance")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 ############################################################################################################################
@@ -134,7 +133,10 @@ def update_maintenance(
     # Pydantic V1: .dict()
     # update_data = maintenance_update_data.dict(exclude_unset=False)
 
+    rollups.remove(db, "maintenance", id)
     maintenance_query.update(update_data, synchronize_session=False)
+    rollups.add(db, "maintenance", id)
     db.commit()
+    result_cache.bump("maintenance")
     db.refresh(existing_maintenance) # Refresh the instance to get DB-generated/updated values
     return existing_maintenance
\ No newline at end of file
@@ -0,0 +1,20 @@
+# app/routers/metrics.py
+
+from fastapi import APIRouter, Depends
+
+from .. import metrics, oauth2
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"],
+    dependencies=[Depends(oauth2.get_current_user)]
+)
+
+
+@router.get("/")
+def read_metrics():
+    """
+    Snapshot of this worker's in-process metrics: counters, histograms and live gauges
+    (e.g. DB pool checked-out / idle / overflow connections).
+    """
+    return metrics.snapshot()
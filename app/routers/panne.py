@@ -1,10 +1,10 @@
-from fastapi import FastAPI,Response, status, HTTPException, Depends,Query, APIRouter
+from fastapi import FastAPI,Request,Response, status, HTTPException, Depends,Query, APIRouter
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, func
 from typing import List, Optional,Dict
 from pydantic import BaseModel
-from .. import models ,schemas,oauth2,utils
-from ..database import  get_db
+from .. import models ,schemas,oauth2,utils,rollups,result_cache,pagination,conditional,serialization,writes,idempotency
+from .. import search as text_search
+from ..database import  get_db, get_read_db
 
 router = APIRouter(
     prefix="/panne",
@@ -12,28 +12,57 @@ router = APIRouter(
     # dependencies=[Depends(get_current_active_user)] # Uncomment for global auth
 )
 
+# Foreign keys on panne -> the 404 each write answers with
+PANNE_CREATE_VIOLATIONS = {
+    "panne_vehicle_id_fkey": writes.not_found("Vehicle with id {vehicle_id} not found"),
+    "panne_category_panne_id_fkey": writes.not_found("Panne category with id {category_panne_id} not found"),
+}
+PANNE_UPDATE_VIOLATIONS = {
+    "panne_vehicle_id_fkey": writes.not_found("Vehicle with id {vehicle_id} not found for update"),
+    "panne_category_panne_id_fkey": writes.not_found("Panne category with id {category_panne_id} not found for update"),
+}
+
 @router.post("/", response_model=schemas.PanneOut, status_code=status.HTTP_201_CREATED)
 def create_new_panne(
     panne: schemas.PanneCreate,
     db: Session = Depends(get_db),
-    current_user: str = Depends(oauth2.get_current_user) # Replace models.user.User with your actual User model
+    current_user: str = Depends(oauth2.get_current_user), # Replace models.user.User with your actual User model
+    idempotency_key: Optional[str] = Depends(idempotency.key_header),
 ):
+    # A retry with the same Idempotency-Key gets the first response back
+    claim = idempotency.claim(db, "panne", idempotency_key, panne)
+    if claim.replay is not None:
+        return claim.replay
 
-    db_panne = models.Panne(**panne.model_dump())
+    values = panne.model_dump()
+    db_panne = models.Panne(**values)
     db.add(db_panne)
-    db.commit()
-    db.refresh(db_panne)
-    return db_panne
+    # Unknown vehicle / category -> 404, from the foreign keys
+    writes.flush(db, PANNE_CREATE_VIOLATIONS, values)
+    response = claim.commit(db, db_panne, PANNE_SERIALIZER, status.HTTP_201_CREATED)
+    result_cache.bump("panne")
+    return response
+
+PANNE_KEYSET = pagination.Keyset("panne", models.Panne.panne_date, models.Panne.id, descending=True)
+PANNE_SERIALIZER = serialization.RowSerializer(schemas.PanneOut)
+PANNE_VERSION = conditional.version_of(
+    models.Panne.updated_at,
+    (models.Vehicle.updated_at, models.Vehicle.id == models.Panne.vehicle_id),
+    (models.CategoryPanne.updated_at, models.CategoryPanne.id == models.Panne.category_panne_id),
+)
 
 @router.get("/", response_model=List[schemas.PanneOut])
 def read_all_pannes(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = Query(default=10, le=1000), # Increased limit example
+    cursor: Optional[str] = Query(default=None, description="Opaque cursor from X-Next-Cursor / X-Prev-Cursor; takes precedence over skip"),
     search: Optional[str] = None,
     vehicle_id: Optional[int] = None, # Filter by vehicle
     category_panne_id: Optional[int] = None, # Filter by category
     status_filter: Optional[str] = None, # Filter by status (e.g., "active", "resolved")
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: str = Depends(oauth2.get_current_user)
 ):
     query = db.query(models.Panne).options(
@@ -48,32 +77,26 @@ def read_all_pannes(
     if status_filter:
         query = query.filter(models.Panne.status == status_filter)
 
+    ranking = None
     if search:
-        # Ensure models.vehicle.Vehicle and models.category_panne.CategoryPanne are imported
-        # and relationships are set up in models.panne.Panne
-        query = query.join(models.Vehicle, models.Panne.vehicle_id == models.Vehicle.id, isouter=True) \
-                     .join(models.CategoryPanne, models.Panne.category_panne_id == models.CategoryPanne.id, isouter=True)
-
-        search_term = f"%{search.lower()}%"
-        query = query.filter(
-            or_(
-                models.Panne.description.ilike(search_term),
-                models.Panne.status.ilike(search_term),
-                models.Vehicle.plate_number.ilike(search_term), # Search by vehicle plate
-                # Add other vehicle fields if needed, e.g., models.vehicle.Vehicle.make.ilike(search_term)
-                models.CategoryPanne.category_panne.ilike(search_term) # Search by category name
-            )
-        )
+        # Description, status, vehicle plate and category name (app/search.py), best match first
+        query, ranking = text_search.apply(query, text_search.PANNE, search)
+    
+    page = pagination.paginate(query, PANNE_KEYSET, response, limit=limit, skip=skip, cursor=cursor, rank=ranking, request=request, version=PANNE_VERSION)
     
-    pannes = query.order_by(models.Panne.panne_date.desc()).offset(skip).limit(limit).all()
-    return pannes
+    return PANNE_SERIALIZER.response(page, response)
 
 @router.get("/{panne_id}", response_model=schemas.PanneOut)
 def read_single_panne(
     panne_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: str = Depends(oauth2.get_current_user)
 ):
+    not_modified = conditional.check_row(db, request, response, "panne", PANNE_VERSION, models.Panne.id, panne_id)
+    if not_modified:
+        return not_modified
     db_panne = db.query(models.Panne).options(
         joinedload(models.Panne.vehicle),
         joinedload(models.Panne.category_panne)
@@ -90,28 +113,28 @@ def update_existing_panne(
     db: Session = Depends(get_db),
     current_user: str = Depends(oauth2.get_current_user)
 ):
-    db_panne = db.query(models.Panne).filter(models.Panne.id == panne_id).first()
+    # FOR UPDATE: a reparation added to this panne meanwhile (its foreign key check
+    # locks the panne row) waits for the commit, so the deltas below see every reparation
+    db_panne = db.query(models.Panne).filter(models.Panne.id == panne_id).with_for_update().first()
     if not db_panne:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Panne not found")
 
-    # Optional: Validate foreign keys if they are being updated
-    if panne_update.vehicle_id is not None:
-        vehicle = db.query(models.Vehicle).filter(models.Vehicle.id == panne_update.vehicle_id).first()
-        if not vehicle:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Vehicle with id {panne_update.vehicle_id} not found for update")
-    
-    if panne_update.category_panne_id is not None:
-        category = db.query(models.CategoryPanne).filter(models.CategoryPanne.id == panne_update.category_panne_id).first()
-        if not category:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Panne category with id {panne_update.category_panne_id} not found for update")
-
-
     update_data = panne_update.model_dump(exclude_unset=True)
+    # Reparation costs are rolled up under the panne's vehicle, so move them with it
+    vehicle_changed = "vehicle_id" in update_data and update_data["vehicle_id"] != db_panne.vehicle_id
+    if vehicle_changed:
+        rollups.apply_delta(db, "reparation", models.Reparation.panne_id == panne_id, sign=-1)
+
     for key, value in update_data.items():
         setattr(db_panne, key, value)
     
     db.add(db_panne)
+    # A new vehicle / category that does not exist -> 404, from the foreign keys
+    writes.flush(db, PANNE_UPDATE_VIOLATIONS, update_data)
+    if vehicle_changed:
+        rollups.apply_delta(db, "reparation", models.Reparation.panne_id == panne_id, sign=1)
     db.commit()
+    result_cache.bump("panne")
     db.refresh(db_panne)
     return db_panne
 
@@ -127,4 +150,5 @@ def delete_existing_panne(
     
     db.delete(db_panne)
     db.commit()
+    result_cache.bump("panne")
     return # For 204, no response body is sent
\ No newline at end of file
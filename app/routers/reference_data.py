@@ -0,0 +1,101 @@
+# app/routers/reference_data.py
+#
+# GET /reference-data : every dropdown lookup (makes, models, types,
+# transmissions, fuel types, vehicles, drivers) in one response.
+#
+# The serialized payload is kept in the result cache (app/result_cache.py) and
+# invalidated by the routers that write to these tables, so a page load costs
+# no query at all while nothing changed. The response carries a content-hash
+# ETag: a client that sends it back in If-None-Match gets an empty 304
+# (app/conditional.py). With "Cache-Control: no-cache" browsers do that
+# revalidation on their own.
+
+import hashlib
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import conditional, models, oauth2, result_cache, schemas
+from ..database import get_async_read_db
+
+router = APIRouter(
+    prefix="/reference-data",
+    tags=["Reference Data"],
+    dependencies=[Depends(oauth2.get_current_user)],
+)
+
+# section -> (column select, item schema); only the columns the dropdowns need
+REFERENCE_SECTIONS = {
+    "vehicle_makes": (
+        select(models.VehicleMake.id, models.VehicleMake.vehicle_make).order_by(models.VehicleMake.vehicle_make),
+        schemas.VehicleMakeOut,
+    ),
+    "vehicle_models": (
+        select(models.VehicleModel.id, models.VehicleModel.vehicle_model).order_by(models.VehicleModel.vehicle_model),
+        schemas.VehicleModelOut,
+    ),
+    "vehicle_types": (
+        select(models.VehicleType.id, models.VehicleType.vehicle_type).order_by(models.VehicleType.vehicle_type),
+        schemas.VehicleTypeOut,
+    ),
+    "vehicle_transmissions": (
+        select(models.VehicleTransmission.id, models.VehicleTransmission.vehicle_transmission)
+        .order_by(models.VehicleTransmission.vehicle_transmission),
+        schemas.VehicleTransmissionOut,
+    ),
+    "fuel_types": (
+        select(models.FuelType.id, models.FuelType.fuel_type).order_by(models.FuelType.fuel_type),
+        schemas.FuelTypeOut,
+    ),
+    "vehicles": (
+        select(models.Vehicle.id, models.Vehicle.plate_number, models.Vehicle.status, models.Vehicle.make, models.Vehicle.model)
+        .order_by(models.Vehicle.plate_number),
+        schemas.ReferenceVehicle,
+    ),
+    "drivers": (
+        select(models.Driver.id, models.Driver.first_name, models.Driver.last_name)
+        .order_by(models.Driver.last_name, models.Driver.first_name, models.Driver.id),
+        schemas.ReferenceDriver,
+    ),
+}
+
+REFERENCE_TABLES = ("vehicle_make", "vehicle_model", "vehicle_type", "vehicle_transmission", "fuel_type", "vehicle", "driver")
+
+@result_cache.cached(*REFERENCE_TABLES)
+async def _compute_reference_data(db: AsyncSession, sections: Tuple[str, ...]) -> Tuple[str, bytes]:
+    """(ETag, JSON body) for the requested sections."""
+    payload = {}
+    for name in sections:
+        stmt, item_schema = REFERENCE_SECTIONS[name]
+        payload[name] = [item_schema.model_validate(row) for row in (await db.execute(stmt)).all()]
+    body = schemas.ReferenceDataResponse(**payload).model_dump_json(exclude_unset=True).encode()
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', body
+
+
+@router.get("", response_model=schemas.ReferenceDataResponse, responses={304: {"description": "Not modified"}})
+async def get_reference_data(
+    request: Request,
+    sections: Optional[str] = Query(
+        None, description=f"Comma-separated subset of: {', '.join(REFERENCE_SECTIONS)}. Defaults to all sections."
+    ),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    if sections:
+        requested = list(dict.fromkeys(name.strip() for name in sections.split(",") if name.strip()))
+        unknown = [name for name in requested if name not in REFERENCE_SECTIONS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown reference data section(s): {', '.join(unknown)}. Valid sections: {', '.join(REFERENCE_SECTIONS)}",
+            )
+    else:
+        requested = list(REFERENCE_SECTIONS)
+
+    # Sections in a fixed order, so every spelling of the same subset shares one entry and one ETag
+    etag, body = await _compute_reference_data(db, tuple(name for name in REFERENCE_SECTIONS if name in requested))
+    headers = conditional.validators(etag)
+    if conditional.is_fresh(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,8 +1,7 @@
 # reparation.py
 
-from fastapi import APIRouter, HTTPException, Depends, status, Query, Response
+from fastapi import APIRouter, HTTPException, Depends, status, Query, Request, Response
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, func
 from typing import List, Optional
 import datetime # For date filtering
 
@@ -11,7 +10,14 @@ import datetime # For date filtering
 from .. import models
 from .. import schemas
 from .. import oauth2
-from ..database import get_db
+from .. import rollups
+from .. import result_cache
+from .. import pagination
+from .. import conditional
+from .. import serialization
+from .. import writes
+from .. import search as text_search
+from ..database import get_db, get_read_db
 
 router = APIRouter(
     prefix="/reparation",
@@ -19,21 +25,18 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+# Foreign keys on reparation -> the 404 each write answers with
+REPARATION_VIOLATIONS = {
+    "reparation_panne_id_fkey": writes.not_found("Panne with id {panne_id} not found"),
+    "reparation_garage_id_fkey": writes.not_found("Garage with id {garage_id} not found"),
+}
+
 @router.post("/", response_model=schemas.ReparationResponse, status_code=status.HTTP_201_CREATED)
 def create_reparation(
     reparation_in: schemas.ReparationCreate,
     db: Session = Depends(get_db),
     current_user: schemas.UserOut = Depends(oauth2.get_current_user) # Ensure UserOut schema matches what get_current_user returns
 ):
-    # Validate foreign key existence
-    panne_exists = db.query(models.Panne).filter(models.Panne.id == reparation_in.panne_id).first()
-    if not panne_exists:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Panne with id {reparation_in.panne_id} not found")
-
-    garage_exists = db.query(models.Garage).filter(models.Garage.id == reparation_in.garage_id).first()
-    if not garage_exists:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Garage with id {reparation_in.garage_id} not found")
-
     reparation_data = reparation_in.model_dump()
     if reparation_data.get("status") and isinstance(reparation_data["status"], schemas.ReparationStatusEnum):
         reparation_data["status"] = reparation_data["status"].value
@@ -45,7 +48,11 @@ def create_reparation(
 
     db_reparation = models.Reparation(**reparation_data)
     db.add(db_reparation)
+    # Unknown panne / garage -> 404, from the foreign keys
+    writes.flush(db, REPARATION_VIOLATIONS, reparation_data)
+    rollups.add(db, "reparation", db_reparation.id) # same transaction as the insert
     db.commit()
+    result_cache.bump("reparation")
     db.refresh(db_reparation)
     # The returned db_reparation will be automatically converted to schemas.ReparationResponse
     # including nested 'panne' and 'garage' objects if eager loaded and defined in the schema.
@@ -54,9 +61,14 @@ def create_reparation(
 @router.get("/{reparation_id}", response_model=schemas.ReparationResponse)
 def read_reparation(
     reparation_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     #current_user: schemas.UserOut = Depends(oauth2.get_current_user)
 ):
+    not_modified = conditional.check_row(db, request, response, "reparation", REPARATION_VERSION, models.Reparation.id, reparation_id)
+    if not_modified:
+        return not_modified
     db_reparation = db.query(models.Reparation).options(
         joinedload(models.Reparation.panne),  # Eager loads the related Panne object
         joinedload(models.Reparation.garage) # Eager loads the related Garage object
@@ -66,17 +78,28 @@ def read_reparation(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reparation not found")
     return db_reparation
 
+REPARATION_KEYSET = pagination.Keyset("reparation", models.Reparation.repair_date, models.Reparation.id, descending=True)
+REPARATION_SERIALIZER = serialization.RowSerializer(schemas.ReparationResponse)
+REPARATION_VERSION = conditional.version_of(
+    models.Reparation.updated_at,
+    (models.Panne.updated_at, models.Panne.id == models.Reparation.panne_id),
+    (models.Garage.updated_at, models.Garage.id == models.Reparation.garage_id),
+)
+
 @router.get("/", response_model=List[schemas.ReparationResponse])
 def read_reparations(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = Query(default=10, le=200),
+    cursor: Optional[str] = Query(default=None, description="Opaque cursor from X-Next-Cursor / X-Prev-Cursor; takes precedence over skip"),
     search: Optional[str] = None,
     panne_id_filter: Optional[int] = None,
     garage_id_filter: Optional[int] = None,
     status_filter: Optional[schemas.ReparationStatusEnum] = None,
     start_date: Optional[datetime.date] = None, # For filtering repair_date
     end_date: Optional[datetime.date] = None,     # For filtering repair_date
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: schemas.UserOut = Depends(oauth2.get_current_user)
 ):
     query = db.query(models.Reparation).options(
@@ -96,25 +119,13 @@ def read_reparations(
     if end_date:
         query = query.filter(models.Reparation.repair_date <= datetime.datetime.combine(end_date, datetime.time.max))
 
+    ranking = None
     if search:
-        search_term = f"%{search.lower()}%"
-        # Ensure models.Panne has 'description' and models.Garage has 'nom_garage' for these search conditions.
-        # outerjoin is used so reparations are still returned if related Panne/Garage doesn't match search but other fields do.
-        query = query.outerjoin(models.Panne, models.Reparation.panne_id == models.Panne.id) \
-                     .outerjoin(models.Garage, models.Reparation.garage_id == models.Garage.id)
-
-        query = query.filter(
-            or_(
-                models.Reparation.receipt.ilike(search_term),
-                models.Reparation.status.ilike(search_term),
-                func.cast(models.Reparation.cost, models.String).ilike(search_term), # Cast cost to string for ilike
-                models.Panne.description.ilike(search_term),
-                models.Garage.nom_garage.ilike(search_term)
-            )
-        )
-
-    reparations = query.order_by(models.Reparation.repair_date.desc()).offset(skip).limit(limit).all()
-    return reparations
+        # Receipt, status, panne, garage, or the exact cost for a numeric term (app/search.py), best match first
+        query, ranking = text_search.apply(query, text_search.REPARATION, search)
+
+    page = pagination.paginate(query, REPARATION_KEYSET, response, limit=limit, skip=skip, cursor=cursor, rank=ranking, request=request, version=REPARATION_VERSION)
+    return REPARATION_SERIALIZER.response(page, response)
 
 @router.put("/{reparation_id}", response_model=schemas.ReparationResponse)
 def update_reparation(
@@ -129,13 +140,7 @@ def update_reparation(
 
     update_data = reparation_in.model_dump(exclude_unset=True) # Only update fields that were actually sent
 
-    # Validate foreign keys if they are being updated
-    if "panne_id" in update_data and update_data["panne_id"] is not None:
-        if not db.query(models.Panne).filter(models.Panne.id == update_data["panne_id"]).first():
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Panne with id {update_data['panne_id']} not found")
-    if "garage_id" in update_data and update_data["garage_id"] is not None:
-        if not db.query(models.Garage).filter(models.Garage.id == update_data["garage_id"]).first():
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Garage with id {update_data['garage_id']} not found")
+    rollups.remove(db, "reparation", reparation_id) # old values out before the row changes
 
     for key, value in update_data.items():
         if key == "status" and isinstance(value, schemas.ReparationStatusEnum):
@@ -147,7 +152,10 @@ def update_reparation(
         # However, with exclude_unset=True, None values that were not part of the request won't be in update_data.
         # If a field *was* in the request as null, it would be in update_data as None.
 
+    writes.flush(db, REPARATION_VIOLATIONS, update_data)
+    rollups.add(db, "reparation", reparation_id)
     db.commit()
+    result_cache.bump("reparation")
     db.refresh(db_reparation)
     return db_reparation
 
@@ -166,8 +174,10 @@ def delete_reparation(
     #     if not getattr(current_user, 'is_admin', False): # Assuming UserOut has an is_admin field
     #         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this reparation")
 
+    rollups.remove(db, "reparation", reparation_id)
     db.delete(db_reparation)
     db.commit()
+    result_cache.bump("reparation")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
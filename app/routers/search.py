@@ -0,0 +1,119 @@
+# app/routers/search.py
+#
+# GET /search?q=AB-123 : one term, every entity, one round trip.
+#
+# Each entity is queried concurrently in its own short-lived session (an
+# AsyncSession cannot run two statements at once) with the indexed conditions of
+# app/search.py, best match first, capped at `limit` hits. Every query runs
+# under a statement_timeout: an entity that does not answer in time comes back
+# empty with timed_out=true instead of delaying the other groups.
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import exc, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement
+
+from .. import metrics, models, oauth2, schemas
+from .. import search as text_search
+from ..config import settings
+from ..database import get_async_read_session_factory
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/search",
+    tags=["Search"],
+    dependencies=[Depends(oauth2.get_current_user)],
+)
+
+QUERY_CANCELED = "57014"   # SQLSTATE raised when statement_timeout fires
+
+
+@dataclass(frozen=True)
+class Entity:
+    id: ColumnElement
+    label: ColumnElement
+    spec: text_search.SearchSpec
+    order: Sequence[ColumnElement]   # tie-break between equally ranked hits (the list order)
+
+
+ENTITIES = {
+    "vehicle": Entity(models.Vehicle.id, models.Vehicle.plate_number, text_search.VEHICLE,
+                      (models.Vehicle.id.asc(),)),
+    "driver": Entity(models.Driver.id, func.concat(models.Driver.first_name, " ", models.Driver.last_name),
+                     text_search.DRIVER,
+                     (models.Driver.last_name.asc(), models.Driver.first_name.asc(), models.Driver.id.asc())),
+    "trip": Entity(models.Trip.id, func.concat(models.Trip.start_location, " -> ", models.Trip.end_location),
+                   text_search.TRIP, (models.Trip.start_time.desc(), models.Trip.id.desc())),
+    "fuel": Entity(models.Fuel.id,
+                   func.concat(func.to_char(models.Fuel.created_at, "YYYY-MM-DD"), ": ", models.Fuel.quantity, " L"),
+                   text_search.FUEL, (models.Fuel.created_at.desc(), models.Fuel.id.desc())),
+    "panne": Entity(models.Panne.id, func.coalesce(models.Panne.description, ""), text_search.PANNE,
+                    (models.Panne.panne_date.desc(), models.Panne.id.desc())),
+    "reparation": Entity(models.Reparation.id, models.Reparation.receipt, text_search.REPARATION,
+                         (models.Reparation.repair_date.desc(), models.Reparation.id.desc())),
+    "maintenance": Entity(models.Maintenance.id, models.Maintenance.receipt, text_search.MAINTENANCE,
+                          (models.Maintenance.maintenance_date.desc(), models.Maintenance.id.desc())),
+}
+
+
+async def _search_entity(db: AsyncSession, entity: Entity, term: str, limit: int) -> schemas.SearchGroup:
+    score = text_search.rank(entity.spec, term)
+    stmt = (
+        select(entity.id, entity.label, score)
+        .where(text_search.condition(entity.spec, term))
+        .order_by(score.desc(), *entity.order)
+        .limit(limit + 1)   # one extra row tells us whether there is more
+    )
+    # SET LOCAL lasts until the end of this session's transaction
+    await db.execute(text(f"SET LOCAL statement_timeout = {int(settings.search_statement_timeout_ms)}"))
+    rows = (await db.execute(stmt)).all()
+    return schemas.SearchGroup(
+        hits=[schemas.SearchHit(id=row[0], label=row[1] or "", score=float(row[2] or 0)) for row in rows[:limit]],
+        has_more=len(rows) > limit,
+    )
+
+
+@router.get("", response_model=schemas.SearchResponse)
+async def search_everything(
+    q: str = Query(..., min_length=2, max_length=100, description="Plate number, name, place, receipt..."),
+    entities: Optional[str] = Query(
+        None, description=f"Comma-separated subset of: {', '.join(ENTITIES)}. Defaults to all of them."
+    ),
+    limit: int = Query(5, ge=1, le=50, description="Hits per entity"),
+):
+    term = text_search.normalize(q)
+    if term is None or len(term) < 2:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Search term must have at least 2 characters")
+    if entities:
+        requested = list(dict.fromkeys(name.strip() for name in entities.split(",") if name.strip()))
+        unknown = [name for name in requested if name not in ENTITIES]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown search entities: {', '.join(unknown)}. Valid entities: {', '.join(ENTITIES)}",
+            )
+    else:
+        requested = list(ENTITIES)
+
+    # Replica-vs-primary is decided once so every entity reads the same server
+    session_factory = await get_async_read_session_factory()
+
+    async def run_entity(name: str) -> schemas.SearchGroup:
+        async with session_factory() as db:
+            try:
+                return await _search_entity(db, ENTITIES[name], term, limit)
+            except exc.DBAPIError as error:
+                if getattr(error.orig, "sqlstate", None) != QUERY_CANCELED:
+                    raise
+                metrics.counter("search.timeouts").inc()
+                logger.warning("search timed out", extra={"entity": name, "timeout_ms": settings.search_statement_timeout_ms})
+                return schemas.SearchGroup(timed_out=True)
+
+    results = await asyncio.gather(*(run_entity(name) for name in requested))
+    return schemas.SearchResponse(term=term, **dict(zip(requested, results)))
@@ -1,13 +1,13 @@
 # app/routers/trip.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session, selectinload 
-from sqlalchemy import or_ # For search queries
+from sqlalchemy import exists, or_, select # For search queries, bulk overlap checks
 from typing import List, Optional
 from datetime import date as date_type, datetime
 
-from .. import models, schemas, oauth2
-from ..database import get_db
+from .. import models, schemas, oauth2, result_cache, pagination, conditional, serialization, bulk, writes, availability, fuel_state, search as text_search
+from ..database import get_db, get_read_db
 
 router = APIRouter(
     prefix="/trip",
@@ -15,50 +15,112 @@ router = APIRouter(
     #dependencies=[Depends(oauth2.get_current_user)]
 )
 
+TRIP_OVERLAP = "Vehicle or driver has an overlapping trip scheduled for the given time."
+TRIP_UPDATE_OVERLAP = "The updated trip details would cause an overlap with another trip."
+
+# Foreign keys and overlap exclusions (app/availability.py) on trip -> the answer each write gives
+TRIP_CREATE_VIOLATIONS = {
+    "trip_vehicle_id_fkey": writes.not_found("Vehicle with ID {vehicle_id} not found."),
+    "trip_driver_id_fkey": writes.not_found("Driver with ID {driver_id} not found."),
+    "trip_vehicle_no_overlap": writes.conflict(TRIP_OVERLAP),
+    "trip_driver_no_overlap": writes.conflict(TRIP_OVERLAP),
+}
+TRIP_UPDATE_VIOLATIONS = {
+    "trip_vehicle_id_fkey": writes.not_found("New vehicle with ID {vehicle_id} not found."),
+    "trip_driver_id_fkey": writes.not_found("New driver with ID {driver_id} not found."),
+    "trip_vehicle_no_overlap": writes.conflict(TRIP_UPDATE_OVERLAP),
+    "trip_driver_no_overlap": writes.conflict(TRIP_UPDATE_OVERLAP),
+}
+
 @router.post("/", response_model=schemas.TripResponse, status_code=status.HTTP_201_CREATED)
 def create_new_trip(
     trip_payload: schemas.TripCreate,
     db: Session = Depends(get_db)
 ):
-    vehicle = db.query(models.Vehicle).filter(models.Vehicle.id == trip_payload.vehicle_id).first()
-    if not vehicle:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                            detail=f"Vehicle with ID {trip_payload.vehicle_id} not found.")
-    # Example: if hasattr(vehicle, 'status') and vehicle.status != "available":
-    #     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Vehicle {vehicle.id} is not available.")
-
-    driver = db.query(models.Driver).filter(models.Driver.id == trip_payload.driver_id).first()
-    if not driver:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                            detail=f"Driver with ID {trip_payload.driver_id} not found.")
-    # Example: if hasattr(driver, 'status') and driver.status != "active":
-    #     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Driver {driver.id} is not active.")
-
-    # Basic overlap check (simplified, can be more robust)
-    # This example only checks if a vehicle or driver is involved in *any* trip that might overlap.
-    # A more precise check would compare start_time and end_time ranges.
-    if trip_payload.end_time: # Only check overlap if trip has a defined end time
-        overlapping_query = db.query(models.Trip).filter(
-            or_(models.Trip.vehicle_id == trip_payload.vehicle_id, models.Trip.driver_id == trip_payload.driver_id),
-            models.Trip.end_time > trip_payload.start_time, # Existing trip ends after new one starts
-            models.Trip.start_time < trip_payload.end_time    # Existing trip starts before new one ends
-        )
-        if overlapping_query.first():
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT,
-                                detail="Vehicle or driver has an overlapping trip scheduled for the given time.")
-
-
-    db_trip = models.Trip(**trip_payload.model_dump())
+    values = trip_payload.model_dump()
+    db_trip = models.Trip(**values)
     db.add(db_trip)
-    db.commit()
+    # Unknown vehicle / driver -> 404 and overlapping trips -> 409, from the constraints
+    if db_trip.status == fuel_state.COMPLETED:
+        # A completed trip makes its vehicle eligible for fueling again
+        writes.flush(db, TRIP_CREATE_VIOLATIONS, values)
+        fuel_state.advance(db, "trip", models.Trip.id == db_trip.id)
+    writes.commit(db, TRIP_CREATE_VIOLATIONS, values)
+    result_cache.bump("trip")
     db.refresh(db_trip)
     return db_trip
 
+
+def _overlapping_existing(staging):
+    """Staged trips that overlap a scheduled trip already in the table (the exclusion constraints' rule)."""
+    return select(staging.c.line).where(
+        availability.scheduled(staging.c.status),
+        exists().where(
+            availability.scheduled(models.Trip.status),
+            availability.overlaps(models.Trip.period, staging.c.start_time, staging.c.end_time),
+            or_(models.Trip.vehicle_id == staging.c.vehicle_id, models.Trip.driver_id == staging.c.driver_id),
+        ),
+    )
+
+
+def _overlapping_in_upload(staging):
+    """Staged trips that overlap an earlier line of the same upload; the earlier line wins."""
+    earlier = staging.alias("earlier")
+    return select(staging.c.line).where(
+        availability.scheduled(staging.c.status),
+        exists().where(
+            earlier.c.line < staging.c.line,
+            availability.scheduled(earlier.c.status),
+            or_(earlier.c.vehicle_id == staging.c.vehicle_id, earlier.c.driver_id == staging.c.driver_id),
+            availability.overlaps(availability.period(earlier.c.start_time, earlier.c.end_time),
+                                  staging.c.start_time, staging.c.end_time),
+        ),
+    )
+
+
+TRIP_BULK_COLUMNS = ("vehicle_id", "driver_id", "start_location", "end_location", "start_time", "end_time",
+                     "status", "purpose", "notes")
+TRIP_BULK = bulk.BulkTarget(
+    "trip", models.Trip, schemas.TripCreate,
+    columns=TRIP_BULK_COLUMNS,
+    values=lambda row: tuple(getattr(row, name) for name in TRIP_BULK_COLUMNS),
+    references=(
+        bulk.Reference("vehicle_id", models.Vehicle.id, "Vehicle"),
+        bulk.Reference("driver_id", models.Driver.id, "Driver"),
+    ),
+    conflicts=(
+        bulk.Conflict(TRIP_OVERLAP, _overlapping_existing),
+        bulk.Conflict("Vehicle or driver has an overlapping trip earlier in this upload.", _overlapping_in_upload),
+    ),
+    after_insert=lambda db, ids: fuel_state.advance(db, "trip", models.Trip.id == ids),
+)
+
+
+@router.post("/bulk", response_model=schemas.BulkLoadResult)
+def bulk_load_trips(
+    upload: bulk.Upload = Depends(bulk.read_upload),
+    db: Session = Depends(get_db)
+):
+    """
+    Load many trips at once. Body: NDJSON (application/x-ndjson) or CSV with a header
+    row (text/csv), with the fields of POST /trip/. Vehicles, drivers and overlaps are
+    checked as for single trips; the lines that fail are listed in the report.
+    """
+    result = bulk.load(db, TRIP_BULK, upload)
+    if result.inserted:
+        result_cache.bump("trip")
+    return result
+
 @router.get("/{trip_id}", response_model=schemas.TripResponse)
 def read_trip_by_id(
     trip_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
+    not_modified = conditional.check_row(db, request, response, "trip", TRIP_VERSION, models.Trip.id, trip_id)
+    if not_modified:
+        return not_modified
     db_trip = db.query(models.Trip).filter(models.Trip.id == trip_id).first()
     if db_trip is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trip not found")
@@ -66,7 +128,7 @@ def read_trip_by_id(
 
 """ @router.get("/", response_model=List[schemas.TripResponse])
 def read_all_trips(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = Query(default=100, ge=1, le=1000),
     search: Optional[str] = Query(default=None),
@@ -111,12 +173,24 @@ def read_all_trips(
     return trips """
 
 
+TRIP_KEYSET = pagination.Keyset("trip", models.Trip.start_time, models.Trip.id, descending=True)
+TRIP_SERIALIZER = serialization.RowSerializer(schemas.TripResponse)
+TRIP_VERSION = conditional.version_of(
+    models.Trip.updated_at,
+    (models.Vehicle.updated_at, models.Vehicle.id == models.Trip.vehicle_id),
+    (models.Driver.updated_at, models.Driver.id == models.Trip.driver_id),
+)
+
+
 @router.get("/", response_model=List[schemas.TripResponse])
 def read_all_trips(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     #limit: int = Query(default=100, ge=1, le=1000),
     limit: int = 1000,
+    cursor: Optional[str] = Query(default=None, description="Opaque cursor from X-Next-Cursor / X-Prev-Cursor; takes precedence over skip"),
     search: Optional[str] = Query(default=None),
     status_filter: Optional[str] = Query(default=None, alias="status"),
     vehicle_id_filter: Optional[int] = Query(default=None, alias="vehicle_id"),
@@ -131,32 +205,10 @@ def read_all_trips(
         selectinload(models.Trip.driver)  # Eager load Trip -> Driver
     )
 
+    ranking = None
     if search:
-        search_term = f"%{search}%"
-        # Apply joins for filtering. These joins are for the WHERE clause.
-        # The selectinload options define what's loaded in the SELECT part.
-        # Note: If searching by make/model names, ensure VehicleMake/VehicleModel are also joined.
-        search_query_joins = query.join(models.Vehicle, models.Trip.vehicle_id == models.Vehicle.id, isouter=True)\
-                                  .join(models.Driver, models.Trip.driver_id == models.Driver.id, isouter=True)
-        
-        # For searching by make/model string name, you'd need to join further:
-        # search_query_joins = search_query_joins.join(models.Vehicle.make_ref, isouter=True) \
-        #                                        .join(models.Vehicle.model_ref, isouter=True)
-        
-        query = search_query_joins.filter( # Use the query with joins for filtering
-            or_(
-                models.Trip.start_location.ilike(search_term),
-                models.Trip.end_location.ilike(search_term),
-                models.Trip.purpose.ilike(search_term),
-                models.Trip.notes.ilike(search_term),
-                models.Vehicle.plate_number.ilike(search_term),
-                # To search by make/model name:
-                # models.VehicleMake.vehicle_make.ilike(search_term),
-                # models.VehicleModel.vehicle_model.ilike(search_term),
-                models.Driver.first_name.ilike(search_term),
-                models.Driver.last_name.ilike(search_term)
-            )
-        )
+        # Locations, purpose, notes, status, vehicle plate and driver (app/search.py), best match first
+        query, ranking = text_search.apply(query, text_search.TRIP, search)
 
     if status_filter:
         query = query.filter(models.Trip.status == status_filter)
@@ -169,8 +221,8 @@ def read_all_trips(
     if start_date_before:
         query = query.filter(models.Trip.start_time <= datetime.combine(start_date_before, datetime.max.time()))
 
-    trips = query.order_by(models.Trip.start_time.desc()).offset(skip).limit(limit).all()
-    return trips
+    page = pagination.paginate(query, TRIP_KEYSET, response, limit=limit, skip=skip, cursor=cursor, rank=ranking, request=request, version=TRIP_VERSION)
+    return TRIP_SERIALIZER.response(page, response)
 
 
 @router.put("/{trip_id}", response_model=schemas.TripResponse)
@@ -185,49 +237,25 @@ def update_existing_trip(
 
     update_data = trip_payload.model_dump(exclude_unset=True)
 
-    if "vehicle_id" in update_data and update_data["vehicle_id"] != db_trip.vehicle_id:
-        vehicle = db.query(models.Vehicle).filter(models.Vehicle.id == update_data["vehicle_id"]).first()
-        if not vehicle:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"New vehicle with ID {update_data['vehicle_id']} not found.")
-        # Example: if hasattr(vehicle, 'status') and vehicle.status != "available":
-        #     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"New vehicle {update_data['vehicle_id']} is not available.")
-
-
-    if "driver_id" in update_data and update_data["driver_id"] != db_trip.driver_id:
-        driver = db.query(models.Driver).filter(models.Driver.id == update_data["driver_id"]).first()
-        if not driver:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"New driver with ID {update_data['driver_id']} not found.")
-        # Example: if hasattr(driver, 'status') and driver.status != "active":
-        #     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"New driver {update_data['driver_id']} is not active.")
-
-    # Basic overlap check for update (simplified)
-    check_start_time = update_data.get("start_time", db_trip.start_time)
-    check_end_time = update_data.get("end_time") # Could be None if unsetting
-    if 'end_time' not in update_data and trip_payload.model_fields_set and 'end_time' not in trip_payload.model_fields_set:
-         check_end_time = db_trip.end_time # Retain existing end_time if not in payload to unset
-    elif 'end_time' in update_data and update_data['end_time'] is None:
-        check_end_time = None # Explicitly set to None
-
-
-    check_vehicle_id = update_data.get("vehicle_id", db_trip.vehicle_id)
-    check_driver_id = update_data.get("driver_id", db_trip.driver_id)
-
-    if check_end_time: # Only check overlap if trip has a defined end time
-        overlapping_query = db.query(models.Trip).filter(
-            models.Trip.id != trip_id, # Exclude self
-            or_(models.Trip.vehicle_id == check_vehicle_id, models.Trip.driver_id == check_driver_id),
-            models.Trip.end_time > check_start_time,
-            models.Trip.start_time < check_end_time
-        )
-        if overlapping_query.first():
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT,
-                                detail="The updated trip details would cause an overlap with another trip.")
-
+    # end_time sent as null reopens the trip: it then holds its vehicle and driver from start_time on
+    start_time = update_data.get("start_time", db_trip.start_time)
+    end_time = update_data.get("end_time", db_trip.end_time)
+    if schemas.ends_before_start(start_time, end_time):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=schemas.TRIP_ENDS_BEFORE_START)
 
+    was_completed, previous_vehicle_id = db_trip.status == fuel_state.COMPLETED, db_trip.vehicle_id
     for key, value in update_data.items():
         setattr(db_trip, key, value)
 
-    db.commit()
+    if was_completed:
+        # Its end time, vehicle or status may have changed: the vehicles' last completed trip can move back
+        writes.flush(db, TRIP_UPDATE_VIOLATIONS, update_data)
+        fuel_state.recompute(db, (previous_vehicle_id, db_trip.vehicle_id))
+    elif db_trip.status == fuel_state.COMPLETED:
+        writes.flush(db, TRIP_UPDATE_VIOLATIONS, update_data)
+        fuel_state.advance(db, "trip", models.Trip.id == trip_id)
+    writes.commit(db, TRIP_UPDATE_VIOLATIONS, update_data)
+    result_cache.bump("trip")
     db.refresh(db_trip)
     return db_trip
 
@@ -244,5 +272,9 @@ def delete_existing_trip(
     #     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Cannot delete trip in '{db_trip.status}' status.")
 
     db.delete(db_trip)
+    if db_trip.status == fuel_state.COMPLETED:
+        db.flush()
+        fuel_state.recompute(db, (db_trip.vehicle_id,))
     db.commit()
+    result_cache.bump("trip")
     return
\ No newline at end of file
@@ -1,27 +1,39 @@
 # routers/user.py
 from fastapi import FastAPI, Response, status, HTTPException, Depends, APIRouter, Request
 from typing import Optional, List
+from sqlalchemy import exists, select
 from sqlalchemy.orm import Session
-from .. import models, schemas, oauth2, utils # Your existing imports
-from ..database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import models, schemas, oauth2, utils, writes # Your existing imports
+from ..database import get_db, get_async_db
+from ..user_cache import user_cache
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
 
 router = APIRouter(prefix="/user", tags=['User'])
 templates = Jinja2Templates(directory="app/templates") # Ensure this path is correct
 
+# Unique indexes on users -> the 409 each write answers with
+USER_VIOLATIONS = {
+    "ix_user_email": writes.conflict("Email already registered"),
+    "ix_user_username": writes.conflict("Username already taken"),
+}
+
 # CREATE USER
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=schemas.UserOut)
-def create_user(user_create_data: schemas.UserCreate, db: Session = Depends(get_db)):
-    # Check if user already exists
-    existing_user_by_email = db.query(models.User).filter(models.User.email == user_create_data.email).first()
-    if existing_user_by_email:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already registered")
-    existing_user_by_username = db.query(models.User).filter(models.User.username == user_create_data.username).first()
-    if existing_user_by_username:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Username already taken")
+async def create_user(user_create_data: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    # Turn a taken email / username away before paying for bcrypt; the unique
+    # indexes still settle two concurrent sign-ups at commit
+    email_taken, username_taken = (await db.execute(select(
+        exists().where(models.User.email == user_create_data.email),
+        exists().where(models.User.username == user_create_data.username),
+    ))).one()
+    for taken, index in ((email_taken, "ix_user_email"), (username_taken, "ix_user_username")):
+        if taken:
+            violation = USER_VIOLATIONS[index]
+            raise HTTPException(status_code=violation.status_code, detail=violation.detail)
 
-    hashed_password = utils.hash(user_create_data.password)
+    hashed_password = await utils.hash_async(user_create_data.password) # bounded hashing pool
     
     # Create a dictionary from user_create_data, then update password
     user_data_dict = user_create_data.dict()
@@ -30,8 +42,9 @@ def create_user(user_create_data: schemas.UserCreate, db: Session = Depends(get_
     new_user = models.User(**user_data_dict) # This now uses the 'status' from UserCreate
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    # Taken email / username -> 409, from the unique indexes
+    await writes.commit_async(db, USER_VIOLATIONS)
+    await db.refresh(new_user)
     return new_user
 
 # GET ALL USERS (API)
@@ -100,6 +113,7 @@ def delete_user_by_id( # Renamed
         )
     user_query.delete(synchronize_session=False) 
     db.commit()  
+    user_cache.invalidate(id) # Deleted users must lose access immediately
     return Response(status_code=status.HTTP_204_NO_CONTENT) # FastAPI handles this correctly
 
 # UPDATE USER
@@ -121,17 +135,10 @@ def update_user_by_id( # Renamed
    
     update_data_dict = user_update_payload.dict(exclude_unset=True) # Get only fields that were actually sent
 
-    if "username" in update_data_dict and update_data_dict["username"] != db_user_to_update.username:
-        existing_user_by_username = db.query(models.User).filter(models.User.username == update_data_dict["username"]).first()
-        if existing_user_by_username:
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Username already taken")
-            
-    if "email" in update_data_dict and update_data_dict["email"] != db_user_to_update.email:
-        existing_user_by_email = db.query(models.User).filter(models.User.email == update_data_dict["email"]).first()
-        if existing_user_by_email:
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already registered")
-
-    user_query.update(update_data_dict, synchronize_session=False)
-    db.commit()
+    for key, value in update_data_dict.items():
+        setattr(db_user_to_update, key, value)
+    # Email / username taken by another user -> 409
+    writes.commit(db, USER_VIOLATIONS, update_data_dict)
+    user_cache.invalidate(id) # e.g. status changed to "inactive": re-read on the next request
     db.refresh(db_user_to_update) # Refresh the instance you fetched
     return db_user_to_update
\ No newline at end of file
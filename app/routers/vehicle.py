@@ -1,10 +1,12 @@
-from fastapi import FastAPI,Response, status, HTTPException, Depends, APIRouter
+from fastapi import FastAPI,Request,Response, status, HTTPException, Depends, APIRouter, File, UploadFile
 from typing import Optional,List, Dict 
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from .. import models ,schemas,oauth2,utils
-from ..database import  get_db
+from .. import models ,schemas,oauth2,utils,result_cache,pagination,conditional,serialization,imports, search as text_search
+from ..database import  get_db, get_read_db
+from ..jobs import jobs
+from .jobs import job_out
 
 router = APIRouter(prefix="/vehicle", tags=['Vehicle'])
 
@@ -16,22 +18,65 @@ def create_vehicle(vehicle : schemas.VehicleCreate, db:Session = Depends(get_db)
     new_vehicle = models.Vehicle(**vehicle.dict())
     db.add(new_vehicle)
     db.commit()
+    result_cache.bump("vehicle")
     db.refresh(new_vehicle)
     return new_vehicle
 
 ############################################################################################################################
 
+VEHICLE_IMPORT = imports.ImportTarget(
+    "vehicle", models.Vehicle, schemas.VehicleImportRow,
+    lookups=(
+        imports.Lookup("make", models.VehicleMake.vehicle_make, models.VehicleMake.id, "vehicle make"),
+        imports.Lookup("model", models.VehicleModel.vehicle_model, models.VehicleModel.id, "vehicle model"),
+        imports.Lookup("vehicle_type", models.VehicleType.vehicle_type, models.VehicleType.id, "vehicle type"),
+        imports.Lookup("vehicle_transmission", models.VehicleTransmission.vehicle_transmission,
+                       models.VehicleTransmission.id, "vehicle transmission"),
+        imports.Lookup("vehicle_fuel_type", models.FuelType.fuel_type, models.FuelType.id, "fuel type"),
+    ),
+    unique=(imports.Unique("plate_number", models.Vehicle.plate_number, "plate number"),),
+)
+
+@router.post("/import", response_model=schemas.JobOut, status_code=status.HTTP_202_ACCEPTED)
+async def import_vehicles(file: UploadFile = File(..., description="CSV or XLSX, one vehicle per row, header row first"),
+                          current_user = Depends(oauth2.get_current_user)):
+    """Start importing vehicles from a spreadsheet; poll GET /jobs/{id}. The job's download lists the rejected rows.
+
+    Columns are those of POST /vehicle/, except make, model, vehicle_type, vehicle_transmission and
+    vehicle_fuel_type, which hold names (e.g. "Toyota") instead of ids.
+    """
+    upload = await imports.save_upload(file)
+
+    async def run(job):
+        return await imports.run(VEHICLE_IMPORT, upload, job)
+
+    job = jobs.submit("vehicle_import", current_user.id, run, output=("vehicle_import_errors.csv", "text/csv"))
+    return job_out(job)
+
+############################################################################################################################
+
+VEHICLE_KEYSET = pagination.Keyset("vehicle", models.Vehicle.id)
+VEHICLE_SERIALIZER = serialization.RowSerializer(schemas.VehicleOut)
+VEHICLE_VERSION = models.Vehicle.updated_at
+
 @router.get("/", response_model = List[schemas.VehicleOut])
-def get_vehicles(db:Session = Depends(get_db),limit : int = 1000, skip : int = 0, search :Optional[str] = ""):
+def get_vehicles(request: Request, response: Response, db:Session = Depends(get_read_db),limit : int = 1000, skip : int = 0, search :Optional[str] = "", cursor: Optional[str] = None):
               
   
     ##filter all vehicles at the same time
-    vehicles = db.query(models.Vehicle).filter(models.Vehicle.plate_number.contains(search)).limit(limit).offset(skip).all()
-    return vehicles
+    query = db.query(models.Vehicle)
+    search = text_search.normalize(search)
+    if search:
+        query = query.filter(models.Vehicle.plate_number.contains(search))
+    page = pagination.paginate(query, VEHICLE_KEYSET, response, limit=limit, skip=skip, cursor=cursor, request=request, version=VEHICLE_VERSION)
+    return VEHICLE_SERIALIZER.response(page, response)
 ############################################################################################################################
 
 @router.get("/{id}", response_model=schemas.VehicleOut)
-def get_vehicle(id : int, db :Session = Depends(get_db),  current_user : str = Depends(oauth2.get_current_user)):
+def get_vehicle(id : int, request: Request, response: Response, db :Session = Depends(get_db),  current_user : str = Depends(oauth2.get_current_user)):
+    not_modified = conditional.check_row(db, request, response, "vehicle", VEHICLE_VERSION, models.Vehicle.id, id)
+    if not_modified:
+        return not_modified
     vehicle = db.query(models.Vehicle).filter(models.Vehicle.id == id).first()
     
     if not vehicle :
@@ -53,6 +98,7 @@ def delete_vehicle(id:int,db:Session = Depends(get_db), current_user : str = Dep
          
    vehicle_query.delete(synchronize_session = False) 
    db.commit()  
+   result_cache.bump("vehicle", "fuel", "maintenance") # the delete cascades to fuel and maintenance rows
    return Response(status_code=status.HTTP_204_NO_CONTENT)
 ############################################################################################################################
 
@@ -68,6 +114,7 @@ def update_vehicle(id:int,updated_vehicle:schemas.VehicleCreate,db:Session = Dep
    
     vehicle_query.update(updated_vehicle.dict(),synchronize_session = False)
     db.commit()
+    result_cache.bump("vehicle")
     return vehicle_query.first()  
 ############################################################################################################################
 
@@ -88,6 +135,7 @@ def update_vehicle_status(id: int, status_update: schemas.VehicleStatusUpdate, d
     # Update only the status field
     vehicle_query.update({"status": status_update.status}, synchronize_session=False)
     db.commit()
+    result_cache.bump("vehicle")
 
     # We return no content on success, as indicated by HTTP 204
     return
@@ -3,7 +3,7 @@ from typing import Optional,List, Dict
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from .. import models ,schemas,oauth2,utils
+from .. import models ,schemas,oauth2,utils,result_cache
 from ..database import  get_db
 
 router = APIRouter(prefix="/vehicle_make", tags=['Vehicle Make'])
@@ -16,6 +16,7 @@ def create_veh_make(veh_make : schemas.VehicleMakeCreate, db:Session = Depends(g
     new_veh_make = models.VehicleMake(**veh_make.dict())
     db.add(new_veh_make)
     db.commit()
+    result_cache.bump("vehicle_make")
     db.refresh(new_veh_make)
     return new_veh_make
 
@@ -52,7 +53,8 @@ def delete_veh_make(id:int,db:Session = Depends(get_db), current_user : str = De
   
          
    veh_make_query.delete(synchronize_session = False) 
-   db.commit()  
+   db.commit()
+   result_cache.bump("vehicle_make")
    return Response(status_code=status.HTTP_204_NO_CONTENT)
 ############################################################################################################################
 
@@ -68,5 +70,6 @@ def update_veh_make(id:int,updated_veh_make:schemas.VehicleMakeCreate,db:Session
    
     veh_make_query.update(updated_veh_make.dict(),synchronize_session = False)
     db.commit()
+    result_cache.bump("vehicle_make")
     return veh_make_query.first()  
 ############################################################################################################################
\ No newline at end of file
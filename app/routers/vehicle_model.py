@@ -3,7 +3,7 @@ from typing import Optional,List, Dict
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from .. import models ,schemas,oauth2,utils
+from .. import models ,schemas,oauth2,utils,result_cache
 from ..database import  get_db
 
 router = APIRouter(prefix="/vehicle_model", tags=['Vehicle Model'])
@@ -15,6 +15,7 @@ def create_veh_model(veh_model : schemas.VehicleModelCreate, db:Session = Depend
     new_veh_model = models.VehicleModel(**veh_model.dict())
     db.add(new_veh_model)
     db.commit()
+    result_cache.bump("vehicle_model")
     db.refresh(new_veh_model)
     return new_veh_model
 
@@ -51,7 +52,8 @@ def delete_veh_model(id:int,db:Session = Depends(get_db), current_user : str = D
   
          
    veh_model_query.delete(synchronize_session = False) 
-   db.commit()  
+   db.commit()
+   result_cache.bump("vehicle_model")
    return Response(status_code=status.HTTP_204_NO_CONTENT)
 ############################################################################################################################
 
@@ -67,5 +69,6 @@ def update_veh_model(id:int,updated_veh_model:schemas.VehicleModelCreate,db:Sess
    
     veh_model_query.update(updated_veh_model.dict(),synchronize_session = False)
     db.commit()
+    result_cache.bump("vehicle_model")
     return veh_model_query.first()  
 ############################################################################################################################
\ No newline at end of file
@@ -3,7 +3,7 @@ from typing import Optional,List, Dict
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from .. import models ,schemas,oauth2,utils
+from .. import models ,schemas,oauth2,utils,result_cache
 from ..database import  get_db
 
 router = APIRouter(prefix="/vehicle_transmission", tags=['Vehicle Transmission'])
@@ -16,6 +16,7 @@ def create_veh_transmission(veh_transmission : schemas.VehicleTransmissionCreate
     new_veh_transmission = models.VehicleTransmission(**veh_transmission.dict())
     db.add(new_veh_transmission)
     db.commit()
+    result_cache.bump("vehicle_transmission")
     db.refresh(new_veh_transmission)
     return new_veh_transmission
 
@@ -52,7 +53,8 @@ def delete_veh_transmission(id:int,db:Session = Depends(get_db), current_user :
   
          
    veh_transmission_query.delete(synchronize_session = False) 
-   db.commit()  
+   db.commit()
+   result_cache.bump("vehicle_transmission")
    return Response(status_code=status.HTTP_204_NO_CONTENT)
 ############################################################################################################################
 
@@ -68,5 +70,6 @@ def update_veh_transmission(id:int,updated_veh_transmission:schemas.VehicleTrans
    
     veh_transmission_query.update(updated_veh_transmission.dict(),synchronize_session = False)
     db.commit()
+    result_cache.bump("vehicle_transmission")
     return veh_transmission_query.first()  
 ############################################################################################################################
\ No newline at end of file
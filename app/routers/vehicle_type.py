@@ -3,7 +3,7 @@ from typing import Optional,List, Dict
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from .. import models ,schemas,oauth2,utils
+from .. import models ,schemas,oauth2,utils,result_cache
 from ..database import  get_db
 
 router = APIRouter(prefix="/vehicle_type", tags=['Vehicle Type'])
@@ -16,6 +16,7 @@ def create_veh_type(veh_type : schemas.VehicleTypeCreate, db:Session = Depends(g
     new_veh_type = models.VehicleType(**veh_type.dict())
     db.add(new_veh_type)
     db.commit()
+    result_cache.bump("vehicle_type")
     db.refresh(new_veh_type)
     return new_veh_type
 
@@ -52,7 +53,8 @@ def delete_veh_type(id:int,db:Session = Depends(get_db), current_user : str = De
   
          
    veh_type_query.delete(synchronize_session = False) 
-   db.commit()  
+   db.commit()
+   result_cache.bump("vehicle_type")
    return Response(status_code=status.HTTP_204_NO_CONTENT)
 ############################################################################################################################
 
@@ -68,5 +70,6 @@ def update_veh_type(id:int,updated_veh_type:schemas.VehicleTypeCreate,db:Session
    
     veh_type_query.update(updated_veh_type.dict(),synchronize_session = False)
     db.commit()
+    result_cache.bump("vehicle_type")
     return veh_type_query.first()  
 ############################################################################################################################
\ No newline at end of file
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr, Field, validator, computed_field
+from pydantic import BaseModel, EmailStr, Field, validator, computed_field, model_validator
 from typing import Optional,List
-from datetime import datetime, date
+from datetime import datetime, date, timezone
 import enum # For Python enum
 from enum import Enum
 
@@ -14,6 +14,14 @@ class EligibilityResponse(BaseModel):
     eligible: bool
     message: str
 
+# One vehicle of GET /fuel/eligibility
+class VehicleEligibility(EligibilityResponse):
+    vehicle_id: int
+    plate_number: str
+    status: Optional[str] = None
+    last_fueled_at: Optional[datetime] = None
+    last_trip_completed_at: Optional[datetime] = None
+
 
 #######################################################################################################################
 
@@ -240,8 +248,31 @@ class TripBase(BaseModel):
     notes: Optional[str] = None
     # --- END NEW OPTIONAL FIELDS ---
 
+    @model_validator(mode="after")
+    def _naive_times_as_utc(self):
+        self.start_time, self.end_time = as_utc(self.start_time), as_utc(self.end_time)
+        return self
+
+TRIP_ENDS_BEFORE_START = "end_time must not be before start_time"
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Trip times without a UTC offset are taken as UTC, so they compare with the stored timestamptz values."""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def ends_before_start(start_time: datetime, end_time: Optional[datetime]) -> bool:
+    return end_time is not None and as_utc(end_time) < as_utc(start_time)
+
 class TripCreate(TripBase):
-    pass # Inherits all from TripBase, including new fields
+    # Inherits all from TripBase, including new fields
+
+    @model_validator(mode="after")
+    def _ends_after_start(self):
+        # The trip's period (tstzrange) cannot be built otherwise
+        if ends_before_start(self.start_time, self.end_time):
+            raise ValueError(TRIP_ENDS_BEFORE_START)
+        return self
 
 class TripUpdate(BaseModel): # For PUT, allow partial updates
     vehicle_id: Optional[int] = None
@@ -256,6 +287,14 @@ class TripUpdate(BaseModel): # For PUT, allow partial updates
     notes: Optional[str] = None
     # --- END NEW OPTIONAL FIELDS ---
 
+    @model_validator(mode="after")
+    def _naive_times_as_utc(self):
+        # Only the fields sent: the handler applies model_dump(exclude_unset=True)
+        for name in ("start_time", "end_time"):
+            if name in self.model_fields_set:
+                setattr(self, name, as_utc(getattr(self, name)))
+        return self
+
 
 class VehicleStatusChartData(BaseModel):
     labels: List[str]
@@ -695,4 +734,137 @@ class DetailedReportDataResponse(BaseModel):
     fuel_records: List[FuelRecordDetail] = []
     reparation_records: List[ReparationRecordDetail] = []
     maintenance_records: List[MaintenanceRecordDetail] = []
-    purchase_records: List[PurchaseRecordDetail] = []
\ No newline at end of file
+    purchase_records: List[PurchaseRecordDetail] = []
+
+
+##################################################################################################################
+# --- Dashboard bundle (GET /dashboard-data/bundle) ---
+# One field per dashboard section; sections the client did not ask for stay None.
+class DashboardBundleResponse(BaseModel):
+    kpis: Optional[KPIStats] = None
+    performance_insights: Optional[PerformanceInsightsResponse] = None
+    alerts: Optional[AlertsResponse] = None
+    recent_pannes: Optional[List[PanneOut]] = None
+    upcoming_trips: Optional[List[TripResponse]] = None
+    monthly_activity: Optional[MonthlyActivityChartData] = None
+    vehicle_status: Optional[VehicleStatusChartData] = None
+    top_drivers: Optional[List[TopDriver]] = None
+
+
+##################################################################################################################
+# --- Reference data (GET /reference-data): dropdown lookups in one payload ---
+class ReferenceVehicle(BaseModel):
+    id: int
+    plate_number: str
+    status: Optional[str] = None
+    make: Optional[int] = None
+    model: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ReferenceDriver(BaseModel):
+    id: int
+    first_name: str
+    last_name: str
+
+    class Config:
+        from_attributes = True
+
+
+class ReferenceDataResponse(BaseModel):
+    vehicle_makes: Optional[List[VehicleMakeOut]] = None
+    vehicle_models: Optional[List[VehicleModelOut]] = None
+    vehicle_types: Optional[List[VehicleTypeOut]] = None
+    vehicle_transmissions: Optional[List[VehicleTransmissionOut]] = None
+    fuel_types: Optional[List[FuelTypeOut]] = None
+    vehicles: Optional[List[ReferenceVehicle]] = None
+    drivers: Optional[List[ReferenceDriver]] = None
+
+
+##################################################################################################################
+# --- Global search (GET /search) ---
+class SearchHit(BaseModel):
+    id: int
+    label: str
+    score: float
+
+
+class SearchGroup(BaseModel):
+    hits: List[SearchHit] = []
+    has_more: bool = False     # more matches than the requested limit
+    timed_out: bool = False    # the query for this entity hit search_statement_timeout_ms
+
+
+class SearchResponse(BaseModel):
+    term: str
+    vehicle: Optional[SearchGroup] = None
+    driver: Optional[SearchGroup] = None
+    trip: Optional[SearchGroup] = None
+    fuel: Optional[SearchGroup] = None
+    panne: Optional[SearchGroup] = None
+    reparation: Optional[SearchGroup] = None
+    maintenance: Optional[SearchGroup] = None
+
+
+##################################################################################################################
+# --- Bulk ingestion (POST /fuel/bulk, /trip/bulk, see app/bulk.py) ---
+class FuelBulkRow(FuelCreatePayload):
+    created_at: Optional[datetime] = None    # when the fuel was taken; defaults to the load time
+
+class BulkRowError(BaseModel):
+    line: int                                # line in the uploaded file (the CSV header is line 1)
+    errors: List[str]
+
+class BulkLoadResult(BaseModel):
+    received: int
+    inserted: int
+    rejected: int
+    seconds: float
+    records_per_second: float
+    errors: List[BulkRowError] = []
+
+
+##################################################################################################################
+# --- Fleet onboarding imports (POST /vehicle/import, /driver/import, see app/imports.py) ---
+class VehicleImportRow(BaseModel):
+    # make, model, type, transmission and fuel type by name; app/imports.py resolves them to ids
+    make: str
+    model: str
+    year: int
+    plate_number: str
+    mileage: float = 0.0
+    engine_size: float
+    vehicle_type: str
+    vehicle_transmission: str
+    vehicle_fuel_type: str
+    vin: str
+    color: str
+    purchase_price: float
+    purchase_date: datetime
+    status: str = "available"
+
+
+##################################################################################################################
+# --- Background jobs (GET /jobs/{job_id}) ---
+class JobOut(BaseModel):
+    id: str
+    kind: str
+    status: str                              # pending | running | done | failed
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    progress: dict = {}
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    download_url: Optional[str] = None       # set once a file result is ready
+
+
+##################################################################################################################
+# --- Availability (GET /availability) ---
+class AvailabilityResponse(BaseModel):
+    start: datetime
+    end: Optional[datetime] = None          # null: open-ended, from start on
+    vehicles: List[ReferenceVehicle]
+    drivers: List[ReferenceDriver]
@@ -0,0 +1,162 @@
+# app/search.py
+#
+# Indexed text search for the list endpoints (and GET /search).
+#
+# Each searchable table has two generated columns (models.search_columns):
+# search_text, with a pg_trgm GIN index that serves ILIKE '%term%', and
+# search_vector, a tsvector with a GIN index that serves multi-word / quoted
+# queries ("websearch" syntax). Text that lives in another table (the vehicle
+# plate of a trip, the garage of a maintenance) is matched in that table first
+# and pulled in by foreign key:
+#
+#   trip.vehicle_id = ANY((SELECT array_agg(id) FROM vehicle WHERE plate_number ILIKE '%term%'))
+#
+# so every branch of the OR is an index lookup and Postgres combines them with
+# a BitmapOr instead of scanning the big table.
+#
+#   query, ranking = search.apply(query, search.TRIP, term)
+#   return pagination.paginate(query, TRIP_KEYSET, response, limit=limit, skip=skip, rank=ranking)
+#
+# Terms are stripped; one that is empty or only whitespace is no search at all
+# (apply() returns the query unfiltered and no ranking), not a match-everything
+# ILIKE '%%' ranked by relevance.
+#
+# Results are ordered by relevance: ts_rank on the vector plus pg_trgm's
+# word_similarity of the term to the text. Vehicle (plate only) and fuel (no
+# text of its own, found through its vehicle) use just the parts they have.
+
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence, Tuple
+
+from sqlalchemy import Integer, any_, cast, func, literal, or_, select, true
+from sqlalchemy.dialects.postgresql import ARRAY, REGCONFIG
+from sqlalchemy.orm import Query
+from sqlalchemy.sql import ColumnElement
+
+from . import models
+
+
+@dataclass(frozen=True)
+class Related:
+    fk: ColumnElement      # column of the searched table, e.g. models.Trip.vehicle_id
+    key: ColumnElement     # what it references, e.g. models.Vehicle.id
+    text: ColumnElement    # text matched in the referenced table, e.g. models.Vehicle.plate_number
+
+
+@dataclass(frozen=True)
+class SearchSpec:
+    text: Optional[ColumnElement]      # trigram-indexed models.X.search_text
+    vector: Optional[ColumnElement]    # models.X.search_vector
+    related: Sequence[Related] = ()
+    exact: Optional[Callable[[str], Optional[ColumnElement]]] = None  # extra clause for special terms
+
+
+def _cost_equals(term: str):
+    try:
+        return models.Reparation.cost == float(term.replace(",", "."))
+    except ValueError:
+        return None
+
+
+TRIP = SearchSpec(
+    models.Trip.search_text, models.Trip.search_vector,
+    related=(
+        Related(models.Trip.vehicle_id, models.Vehicle.id, models.Vehicle.plate_number),
+        Related(models.Trip.driver_id, models.Driver.id, models.Driver.search_text),
+    ),
+)
+PANNE = SearchSpec(
+    models.Panne.search_text, models.Panne.search_vector,
+    related=(
+        Related(models.Panne.vehicle_id, models.Vehicle.id, models.Vehicle.plate_number),
+        Related(models.Panne.category_panne_id, models.CategoryPanne.id, models.CategoryPanne.panne_name),
+    ),
+)
+MAINTENANCE = SearchSpec(
+    models.Maintenance.search_text, models.Maintenance.search_vector,
+    related=(
+        Related(models.Maintenance.vehicle_id, models.Vehicle.id, models.Vehicle.plate_number),
+        Related(models.Maintenance.cat_maintenance_id, models.CategoryMaintenance.id, models.CategoryMaintenance.cat_maintenance),
+        Related(models.Maintenance.garage_id, models.Garage.id, models.Garage.nom_garage),
+    ),
+)
+REPARATION = SearchSpec(
+    models.Reparation.search_text, models.Reparation.search_vector,
+    related=(
+        Related(models.Reparation.panne_id, models.Panne.id, models.Panne.search_text),
+        Related(models.Reparation.garage_id, models.Garage.id, models.Garage.nom_garage),
+    ),
+    exact=_cost_equals,
+)
+DRIVER = SearchSpec(models.Driver.search_text, models.Driver.search_vector)
+VEHICLE = SearchSpec(models.Vehicle.plate_number, None)
+FUEL = SearchSpec(
+    None, None,
+    related=(Related(models.Fuel.vehicle_id, models.Vehicle.id, models.Vehicle.plate_number),),
+)
+
+
+def normalize(term: Optional[str]) -> Optional[str]:
+    """`term` without surrounding whitespace, or None when nothing is left to search for."""
+    term = (term or "").strip()
+    return term or None
+
+
+def like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def ts_query(term: str):
+    return func.websearch_to_tsquery(cast("simple", REGCONFIG), term)
+
+
+def condition(spec: SearchSpec, term: str) -> ColumnElement:
+    term = normalize(term)
+    if term is None:
+        return true()
+    pattern = like_pattern(term)
+    clauses = []
+    if spec.text is not None:
+        clauses.append(spec.text.ilike(pattern, escape="\\"))
+    if spec.vector is not None:
+        clauses.append(spec.vector.op("@@")(ts_query(term)))
+    for related in spec.related:
+        # array_agg runs once (an InitPlan); "= ANY(array)" is then an index lookup on
+        # the FK. The cast keeps it an array expression: a bare ANY (SELECT ...) would
+        # be planned as a per-row subplan.
+        matching_ids = (
+            select(func.array_agg(related.key))
+            .where(related.text.ilike(pattern, escape="\\"))
+            .correlate(None)
+            .scalar_subquery()
+        )
+        clauses.append(related.fk == any_(cast(matching_ids, ARRAY(Integer))))
+    if spec.exact is not None:
+        exact = spec.exact(term)
+        if exact is not None:
+            clauses.append(exact)
+    return or_(*clauses)
+
+
+def rank(spec: SearchSpec, term: str) -> ColumnElement:
+    term = term.strip()
+    parts = []
+    if spec.vector is not None:
+        parts.append(func.ts_rank(spec.vector, ts_query(term)))
+    if spec.text is not None:
+        parts.append(func.word_similarity(term, spec.text))
+    if not parts:
+        return literal(0.0)   # found only through related rows: every hit ranks the same
+    return sum(parts[1:], parts[0])
+
+
+def apply(query: Query, spec: SearchSpec, term: Optional[str]) -> Tuple[Query, Optional[ColumnElement]]:
+    """Filter `query` to rows matching `term`; returns it with the relevance expression.
+
+    A blank term leaves `query` as it is, with no relevance expression (the list keeps its cursors).
+    """
+    term = normalize(term)
+    if term is None:
+        return query, None
+    return query.filter(condition(spec, term)), rank(spec, term)
@@ -0,0 +1,114 @@
+# app/serialization.py
+#
+# Fast JSON for the API.
+#
+# ORJSONResponse is the application's default response class (app/main.py), so
+# every endpoint's final encoding step uses orjson instead of json.dumps.
+#
+# The big list endpoints also skip FastAPI's response_model pass, which
+# validates every ORM row into a Pydantic model (from_attributes) and dumps it
+# again. A RowSerializer is built once from the response schema: a flat list of
+# the fields to read, with nested serializers for nested schemas. It turns ORM
+# objects, or Core result rows with matching column labels, straight into
+# dicts, and ORJSONResponse encodes them natively:
+#
+#   TRIP_SERIALIZER = serialization.RowSerializer(schemas.TripResponse)
+#   return TRIP_SERIALIZER.response(pagination.paginate(query, ...), response)
+#
+# The rows come from our own tables, so they are already valid; the output is
+# the same JSON that response_model would produce (benchmarks/serialization.py
+# checks this). The route keeps response_model for the OpenAPI schema.
+
+import typing
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Iterable, List, Optional, Type
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# Z for UTC offsets, as Pydantic writes them
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """`content` as the API's JSON: what ORJSONResponse sends."""
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _nested_model(annotation) -> tuple:
+    """(model, is_list) for BaseModel, Optional[BaseModel] and List[BaseModel] fields; (None, False) otherwise."""
+    origin = typing.get_origin(annotation)
+    if origin in (list, List):
+        model, _ = _nested_model(typing.get_args(annotation)[0])
+        return model, model is not None
+    if origin is typing.Union:
+        for arg in typing.get_args(annotation):
+            if arg is not type(None):
+                return _nested_model(arg)
+        return None, False
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    return None, False
+
+
+class RowSerializer:
+    """Dicts in the shape of `schema`, read attribute by attribute from ORM objects or result rows."""
+
+    def __init__(self, schema: Type[BaseModel]):
+        if schema.model_computed_fields:
+            raise TypeError(f"{schema.__name__} has computed fields, serialize it through the model")
+        self.schema = schema
+        self.fields = []   # (output name, attribute, nested serializer or None, nested is a list, default)
+        for name, field in schema.model_fields.items():
+            model, is_list = _nested_model(field.annotation)
+            nested = RowSerializer(model) if model is not None else None
+            default = None if field.is_required() else field.get_default(call_default_factory=True)
+            self.fields.append((field.serialization_alias or name, name, nested, is_list, default))
+
+    def __call__(self, obj) -> Optional[dict]:
+        if obj is None:
+            return None
+        out = {}
+        for key, attribute, nested, is_list, default in self.fields:
+            value = getattr(obj, attribute, default)
+            if nested is not None and value is not None:
+                value = [nested(item) for item in value] if is_list else nested(value)
+            elif isinstance(value, Enum):
+                value = value.value
+            out[key] = value
+        return out
+
+    def many(self, rows: Iterable) -> list:
+        return [self(row) for row in rows]
+
+    def response(self, rows, response: Optional[Response] = None) -> Response:
+        """JSON response for `rows`; a Response (the 304 from pagination.paginate) passes through."""
+        if isinstance(rows, Response):
+            return rows
+        return render(self.many(rows), response)
+
+
+def render(content, response: Optional[Response] = None, status_code: int = 200) -> ORJSONResponse:
+    """ORJSONResponse carrying the headers already set on the endpoint's `response` parameter.
+
+    A Response returned from an endpoint is sent as is, so the cursor / ETag
+    headers set on the injected one have to be copied over.
+    """
+    headers = {key: value for key, value in response.headers.items() if key != "content-length"} if response is not None else None
+    return ORJSONResponse(content, status_code=status_code, headers=headers)
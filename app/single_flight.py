@@ -0,0 +1,85 @@
+# app/single_flight.py
+#
+# Request coalescing ("single flight") for expensive async computations.
+#
+# When several requests need the same result at the same moment (the whole
+# office opening the dashboard at 8am), only the first caller for a key
+# computes it; the others await that computation and share its result or its
+# exception. result_cache.cached() routes every cache miss through here.
+#
+# The leader computes in its own request (and DB session). If the leader is
+# cancelled, waiting callers retry and one of them becomes the new leader.
+
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from . import metrics
+
+
+class _LeaderCancelled(Exception):
+    pass
+
+
+class SingleFlight:
+    def __init__(self, max_tracked_keys: int = 200):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        # label -> {"leaders": n, "coalesced": n}; bounded, most recently used last
+        self._per_key: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self._max_tracked_keys = max_tracked_keys
+        self._leaders = metrics.counter("single_flight.leaders")
+        self._coalesced = metrics.counter("single_flight.coalesced")
+
+    def _record(self, label: str, field: str):
+        entry = self._per_key.pop(label, None) or {"leaders": 0, "coalesced": 0}
+        entry[field] += 1
+        self._per_key[label] = entry
+        while len(self._per_key) > self._max_tracked_keys:
+            self._per_key.popitem(last=False)
+
+    async def do(self, key: Hashable, compute: Callable[[], Awaitable[Any]], label: str = None) -> Any:
+        label = label or repr(key)
+        while True:
+            future = self._in_flight.get(key)
+            if future is None:
+                break
+            self._coalesced.inc()
+            self._record(label, "coalesced")
+            try:
+                # shield: a cancelled follower must not cancel the shared future
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                continue # the leader went away; try to become the leader ourselves
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self._leaders.inc()
+        self._record(label, "leaders")
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            future.exception() # mark retrieved; followers (if any) retry
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._in_flight),
+            "leaders": self._leaders.value,
+            "coalesced": self._coalesced.value,
+            "by_key": {label: dict(counts) for label, counts in self._per_key.items() if counts["coalesced"]},
+        }
+
+
+single_flight = SingleFlight()
+metrics.register_collector("single_flight", single_flight.stats)
@@ -1,4 +1,13 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from passlib.context import CryptContext
+
+from . import metrics
+from .config import settings
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated = "auto")
 
 
@@ -6,4 +15,70 @@ def hash(password : str):
     return pwd_context.hash(password)
 
 def verify(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+# --- Bounded executor for bcrypt ---
+# bcrypt is deliberately slow (~100-300ms per call). Running it on FastAPI's
+# shared threadpool lets a login burst starve every other sync route, so the
+# async variants below use their own small pool. bcrypt releases the GIL, so
+# threads give real parallelism here. At most workers + queue_limit calls are
+# admitted at once; anything beyond that fails fast with PasswordHasherBusy
+# (mapped to 503 + Retry-After in app/main.py) instead of queueing forever.
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing pool and its queue are full."""
+
+
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers, thread_name_prefix="password-hash"
+)
+_hash_slots = threading.BoundedSemaphore(
+    settings.password_hash_workers + settings.password_hash_queue_limit
+)
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+_rejected = metrics.counter("password_hash.rejected")
+_wait = metrics.histogram("password_hash.seconds")
+
+
+def _pool_gauges() -> dict:
+    return {
+        "workers": settings.password_hash_workers,
+        "queue_limit": settings.password_hash_queue_limit,
+        "in_flight": _in_flight,
+    }
+
+metrics.register_collector("password_hash", _pool_gauges)
+
+
+def _release_slot(_future):
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight -= 1
+    _hash_slots.release()
+
+
+async def _run_bounded(fn, *args):
+    global _in_flight
+    if not _hash_slots.acquire(blocking=False):
+        _rejected.inc()
+        raise PasswordHasherBusy()
+    with _in_flight_lock:
+        _in_flight += 1
+    # The slot is released when the thread finishes, not when the request does,
+    # so a cancelled request cannot let more than the limit run at once.
+    future = _hash_executor.submit(fn, *args)
+    future.add_done_callback(_release_slot)
+    started = time.perf_counter()
+    try:
+        return await asyncio.wrap_future(future)
+    finally:
+        _wait.observe(time.perf_counter() - started)
+
+
+async def hash_async(password: str) -> str:
+    return await _run_bounded(hash, password)
+
+async def verify_async(plain_password, hashed_password) -> bool:
+    return await _run_bounded(verify, plain_password, hashed_password)
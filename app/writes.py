@@ -0,0 +1,97 @@
+# app/writes.py
+#
+# Let the database check writes instead of looking rows up first.
+#
+# Foreign keys already guarantee that a referenced vehicle / panne / garage
+# exists and unique constraints that a CNI number or email is not taken, and
+# unlike a SELECT before the write they cannot be raced by a concurrent
+# request. A handler names the constraints it expects to trip and the answer
+# the API gives for each, writes, and lets flush() / commit() translate the
+# IntegrityError:
+#
+#   DRIVER_CREATE_VIOLATIONS = {
+#       "driver_email_key": writes.conflict("Driver with email '{email}' already exists."),
+#   }
+#   db.add(models.Driver(**values))
+#   writes.commit(db, DRIVER_CREATE_VIOLATIONS, values)
+#
+# Details are str.format()-ed with `values` (the payload), so they read as
+# before. The transaction is rolled back before the HTTPException is raised.
+# Violations of constraints that are not listed are re-raised unchanged.
+#
+# Constraint names are PostgreSQL's defaults for the model definitions
+# (<table>_<column>_fkey, <table>_<column>_key) and SQLAlchemy's ix_<table>_<column>
+# for unique indexes.
+
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+
+@dataclass(frozen=True)
+class Violation:
+    status_code: int
+    detail: str      # str.format() template, filled from the values passed to flush() / commit()
+
+
+def not_found(detail: str) -> Violation:
+    return Violation(status.HTTP_404_NOT_FOUND, detail)
+
+
+def conflict(detail: str) -> Violation:
+    return Violation(status.HTTP_409_CONFLICT, detail)
+
+
+def constraint_name(error: exc.IntegrityError) -> Optional[str]:
+    """Name of the violated constraint: psycopg2 reports it in .diag, asyncpg on the wrapped exception."""
+    diag = getattr(error.orig, "diag", None)
+    if diag is not None:
+        return diag.constraint_name
+    return getattr(error.orig.__cause__, "constraint_name", None)
+
+
+def _translate(error: exc.IntegrityError, violations: Mapping[str, Violation], values: Mapping) -> Optional[HTTPException]:
+    violation = violations.get(constraint_name(error))
+    if violation is None:
+        return None
+    return HTTPException(status_code=violation.status_code, detail=violation.detail.format(**values))
+
+
+def flush(db: Session, violations: Mapping[str, Violation], values: Mapping = {}):
+    """db.flush(), with the listed constraint violations raised as their HTTPException."""
+    try:
+        db.flush()
+    except exc.IntegrityError as error:
+        db.rollback()
+        translated = _translate(error, violations, values)
+        if translated is None:
+            raise
+        raise translated from error
+
+
+def commit(db: Session, violations: Mapping[str, Violation], values: Mapping = {}):
+    """db.commit(), with the listed constraint violations raised as their HTTPException."""
+    try:
+        db.commit()
+    except exc.IntegrityError as error:
+        db.rollback()
+        translated = _translate(error, violations, values)
+        if translated is None:
+            raise
+        raise translated from error
+
+
+async def commit_async(db: AsyncSession, violations: Mapping[str, Violation], values: Mapping = {}):
+    """commit() for an AsyncSession."""
+    try:
+        await db.commit()
+    except exc.IntegrityError as error:
+        await db.rollback()
+        translated = _translate(error, violations, values)
+        if translated is None:
+            raise
+        raise translated from error
@@ -0,0 +1,365 @@
+# app/xlsx.py
+#
+# Minimal streaming XLSX (Office Open XML spreadsheet) writer and reader.
+#
+# Rows are written straight into a deflate-compressed zip entry and the
+# compressed bytes are handed back through drain(), so a workbook of any size
+# is produced in bounded memory and can be sent as a StreamingResponse:
+#
+#   book = StreamingWorkbook()
+#   book.begin_sheet("Fuel Details", [("ID", "int"), ("Date", "datetime"), ...])
+#   for row in rows:
+#       book.write_row(row)
+#       yield book.drain()
+#   yield book.close()
+#
+# Only what the exports need is supported: inline strings (no shared-string
+# table to keep in memory), numbers, dates and datetimes, a bold header row.
+# Zip64 is not forced, so one sheet is limited to 2 GiB of uncompressed XML
+# (several million rows).
+#
+# read_rows goes the other way for uploaded workbooks (app/imports.py): the
+# first worksheet is parsed incrementally and handed back one row at a time,
+# cells as text, dates as ISO strings. Only the shared-string table is held in
+# memory, since any row may refer to any entry of it.
+
+import posixpath
+import re
+import zipfile
+from datetime import date, datetime, timedelta
+from typing import IO, Dict, Iterator, List, Optional, Sequence, Tuple
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+_ILLEGAL_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+# cellXfs indexes in STYLES
+_STYLE_DATE = 1
+_STYLE_DATETIME = 2
+_STYLE_HEADER = 3
+_STYLE_NUMBER = 4
+
+_COLUMN_WIDTHS = {"int": 10, "number": 14, "date": 12, "datetime": 18, "text": 28}
+
+CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    f'<styleSheet xmlns="{_MAIN_NS}">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="5">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+class _Sink:
+    """Write-only, unseekable file object; zipfile then uses data descriptors."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _text_cell(value: str, style: int = 0) -> str:
+    text = escape(_ILLEGAL_XML_CHARS.sub("", value))
+    style_attr = f' s="{style}"' if style else ""
+    return f'<c t="inlineStr"{style_attr}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _serial(value: datetime) -> float:
+    delta = value.replace(tzinfo=None) - _EXCEL_EPOCH
+    return delta.days + delta.seconds / 86400 + delta.microseconds / 86400e6
+
+
+def _cell(value, kind: str) -> str:
+    if value is None:
+        return "<c/>"
+    if kind == "int":
+        return f"<c><v>{int(value)}</v></c>"
+    if kind == "number":
+        return f'<c s="{_STYLE_NUMBER}"><v>{float(value)!r}</v></c>'
+    if kind == "date":
+        if isinstance(value, datetime):
+            value = value.date()
+        return f'<c s="{_STYLE_DATE}"><v>{(value - _EXCEL_EPOCH.date()).days}</v></c>'
+    if kind == "datetime":
+        if not isinstance(value, datetime):
+            value = datetime.combine(value, datetime.min.time())
+        return f'<c s="{_STYLE_DATETIME}"><v>{_serial(value)!r}</v></c>'
+    return _text_cell(str(value))
+
+
+def _sheet_name(title: str, taken: Sequence[str]) -> str:
+    base = _INVALID_SHEET_CHARS.sub(" ", title).strip() or "Sheet"
+    base = base[:31]
+    name, suffix = base, 2
+    while name.lower() in (existing.lower() for existing in taken):
+        tail = f" ({suffix})"
+        name = base[:31 - len(tail)] + tail
+        suffix += 1
+    return name
+
+
+class StreamingWorkbook:
+    def __init__(self, compresslevel: int = 6):
+        self._sink = _Sink()
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+        self._sheet_names: List[str] = []
+        self._sheet = None
+        self._kinds: Tuple[str, ...] = ()
+
+    def begin_sheet(self, title: str, columns: Sequence[Tuple[str, str]]):
+        """Start a new worksheet; `columns` is a sequence of (header, kind)."""
+        self.end_sheet()
+        self._sheet_names.append(_sheet_name(title, self._sheet_names))
+        self._kinds = tuple(kind for _, kind in columns)
+        self._sheet = self._zip.open(f"xl/worksheets/sheet{len(self._sheet_names)}.xml", "w")
+        widths = "".join(
+            f'<col min="{index}" max="{index}" width="{_COLUMN_WIDTHS.get(kind, 20)}" customWidth="1"/>'
+            for index, (_, kind) in enumerate(columns, start=1)
+        )
+        header = "".join(_text_cell(name, _STYLE_HEADER) for name, _ in columns)
+        self._write(
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<worksheet xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}">'
+            '<sheetViews><sheetView workbookViewId="0">'
+            '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+            '</sheetView></sheetViews>'
+            f'<cols>{widths}</cols><sheetData><row>{header}</row>'
+        )
+
+    def write_row(self, values: Sequence):
+        self._write("<row>" + "".join(_cell(value, kind) for value, kind in zip(values, self._kinds)) + "</row>")
+
+    def end_sheet(self):
+        if self._sheet is not None:
+            self._write("</sheetData></worksheet>")
+            self._sheet.close()
+            self._sheet = None
+
+    def drain(self) -> bytes:
+        """Compressed bytes produced since the last call."""
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        """Write the workbook parts and the zip directory; returns the remaining bytes."""
+        if not self._sheet_names:
+            self.begin_sheet("Sheet1", [])
+        self.end_sheet()
+        count = len(self._sheet_names)
+        sheets = range(1, count + 1)
+        self._zip.writestr("[Content_Types].xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            + "".join(
+                f'<Override PartName="/xl/worksheets/sheet{n}.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                for n in sheets
+            )
+            + '</Types>'
+        ))
+        self._zip.writestr("_rels/.rels", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        ))
+        self._zip.writestr("xl/workbook.xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}"><sheets>'
+            + "".join(
+                f'<sheet name="{escape(name, {chr(34): "&quot;"})}" sheetId="{n}" r:id="rId{n}"/>'
+                for n, name in zip(sheets, self._sheet_names)
+            )
+            + '</sheets></workbook>'
+        ))
+        self._zip.writestr("xl/_rels/workbook.xml.rels", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + "".join(
+                f'<Relationship Id="rId{n}" Type="{_REL_NS}/worksheet" Target="worksheets/sheet{n}.xml"/>'
+                for n in sheets
+            )
+            + f'<Relationship Id="rId{count + 1}" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+            '</Relationships>'
+        ))
+        self._zip.writestr("xl/styles.xml", STYLES)
+        self._zip.close()
+        return self.drain()
+
+    def _write(self, xml: str):
+        self._sheet.write(xml.encode("utf-8"))
+
+
+# --- Reading -----------------------------------------------------------------
+
+_PACKAGE_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+# Built-in number formats that display dates / times
+_DATE_FORMAT_IDS = set(range(14, 23)) | {45, 46, 47}
+_DATE_FORMAT_CODE = re.compile(r"[dmyhs]", re.IGNORECASE)
+# Quoted text, escaped characters and [colour] / [$-locale] sections of a format code
+_FORMAT_LITERALS = re.compile(r'"[^"]*"|\\.|\[[^]]*\]')
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _column_index(reference: str) -> int:
+    """0-based column of a cell reference such as "AB12"."""
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - 64
+    return index - 1
+
+
+def _first_sheet_path(book: zipfile.ZipFile) -> str:
+    workbook = ElementTree.fromstring(book.read("xl/workbook.xml"))
+    sheet = next(element for element in workbook.iter() if _local(element.tag) == "sheet")
+    rel_id = sheet.get(f"{{{_REL_NS}}}id")
+    rels = ElementTree.fromstring(book.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels.iter(f"{{{_PACKAGE_REL_NS}}}Relationship"):
+        if rel.get("Id") == rel_id:
+            target = rel.get("Target")
+            return target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+    raise ValueError("Workbook has no worksheet")
+
+
+def _shared_strings(book: zipfile.ZipFile) -> List[str]:
+    if "xl/sharedStrings.xml" not in book.namelist():
+        return []
+    strings = []
+    with book.open("xl/sharedStrings.xml") as part:
+        for _, element in ElementTree.iterparse(part):
+            if _local(element.tag) == "si":
+                strings.append(_string_item(element))
+                element.clear()
+    return strings
+
+
+def _string_item(si) -> str:
+    """Text of a shared string: plain <t>, or rich-text runs <r><t>; phonetic hints (rPh) are skipped."""
+    parts = []
+    for child in si:
+        if _local(child.tag) == "t":
+            parts.append(child.text or "")
+        elif _local(child.tag) == "r":
+            parts.extend(node.text or "" for node in child if _local(node.tag) == "t")
+    return "".join(parts)
+
+
+def _date_styles(book: zipfile.ZipFile) -> List[bool]:
+    """For each cellXfs index: does the style display a date?"""
+    if "xl/styles.xml" not in book.namelist():
+        return []
+    styles = ElementTree.fromstring(book.read("xl/styles.xml"))
+    custom: Dict[int, str] = {}
+    for element in styles.iter():
+        if _local(element.tag) == "numFmt":
+            custom[int(element.get("numFmtId"))] = element.get("formatCode", "")
+    flags = []
+    for group in styles:
+        if _local(group.tag) == "cellXfs":
+            for xf in group:
+                format_id = int(xf.get("numFmtId", 0))
+                if format_id in custom:
+                    flags.append(bool(_DATE_FORMAT_CODE.search(_FORMAT_LITERALS.sub("", custom[format_id]))))
+                else:
+                    flags.append(format_id in _DATE_FORMAT_IDS)
+    return flags
+
+
+def _from_serial(value: str) -> str:
+    moment = _EXCEL_EPOCH + timedelta(seconds=round(float(value) * 86400))
+    return moment.date().isoformat() if moment.time() == datetime.min.time() else moment.isoformat()
+
+
+def read_rows(fp: IO[bytes]) -> Iterator[List[Optional[str]]]:
+    """Rows of the workbook's first worksheet, as lists of cell text (None for empty cells).
+
+    `fp` must be seekable (a zip is read from its directory at the end).
+    """
+    with zipfile.ZipFile(fp) as book:
+        strings = _shared_strings(book)
+        date_styles = _date_styles(book)
+        with book.open(_first_sheet_path(book)) as part:
+            sheet_data = None
+            for event, element in ElementTree.iterparse(part, events=("start", "end")):
+                name = _local(element.tag)
+                if event == "start":
+                    if name == "sheetData":
+                        sheet_data = element
+                    continue
+                if name != "row":
+                    continue
+                row: List[Optional[str]] = []
+                for cell in element:
+                    if _local(cell.tag) != "c":
+                        continue
+                    reference = cell.get("r")
+                    if reference:
+                        row.extend([None] * (_column_index(reference) - len(row)))
+                    row.append(_cell_text(cell, strings, date_styles))
+                while row and row[-1] is None:
+                    row.pop()
+                yield row
+                # Rows already read are dropped, so memory stays flat
+                if sheet_data is not None:
+                    sheet_data.clear()
+
+
+def _cell_text(cell, strings: List[str], date_styles: List[bool]) -> Optional[str]:
+    kind = cell.get("t", "n")
+    if kind == "inlineStr":
+        return "".join(node.text or "" for node in cell.iter() if _local(node.tag) == "t")
+    value = next((node.text for node in cell if _local(node.tag) == "v"), None)
+    if value is None or value == "":
+        return None
+    if kind == "s":
+        return strings[int(value)]
+    if kind == "b":
+        return "true" if value == "1" else "false"
+    if kind == "n":
+        style = int(cell.get("s", 0))
+        if style < len(date_styles) and date_styles[style]:
+            return _from_serial(value)
+        # Whole numbers without the ".0" Excel sometimes stores
+        if value.endswith(".0"):
+            value = value[:-2]
+    return value
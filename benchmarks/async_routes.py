@@ -0,0 +1,176 @@
+# benchmarks/async_routes.py
+#
+# Latency of GET /vehicle/ while other clients keep an expense aggregate busy,
+# against the configured database (.env): what a slow analytics request does
+# to the rest of the worker. Serves app.main.app with uvicorn (one worker, as
+# in the Dockerfile) plus two routes that run the same aggregate over the raw
+# fuel / maintenance / reparation tables:
+#
+#   /bench/expense-summary/async : through AsyncSession, as the dashboard and
+#                                  analytics routes do since the async layer
+#   /bench/expense-summary/sync  : through the sync Session inside async def,
+#                                  as they did before it
+#
+# (/analytics-data/expense-summary itself now reads the rollups and the result
+# cache, so it no longer makes a load.) For each mode, --load clients request
+# the aggregate back to back while one client times GET /vehicle/ for
+# --seconds. Adds --records fuel records first and deletes them at the end.
+#
+#   python -m benchmarks.async_routes [--records 500000] [--load 4] [--seconds 10]
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from fastapi import APIRouter, Depends
+from sqlalchemy import func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import aggregation, models
+from app.database import SessionLocal, get_async_db, get_db
+from app.main import app
+
+PERIOD_START = datetime(2091, 1, 1, tzinfo=timezone.utc)
+PERIOD_END = PERIOD_START + timedelta(days=365)
+# The analytics routes pass naive bounds (datetime.combine of the query dates)
+RANGE = (PERIOD_START.replace(tzinfo=None), PERIOD_END.replace(tzinfo=None))
+
+
+def _series():
+    return [
+        aggregation.Series("fuel_cost", models.Fuel.created_at, func.sum(models.Fuel.cost)),
+        aggregation.Series("maintenance_cost", models.Maintenance.maintenance_date, func.sum(models.Maintenance.maintenance_cost)),
+        aggregation.Series("reparation_cost", models.Reparation.repair_date, func.sum(models.Reparation.cost)),
+    ]
+
+
+bench = APIRouter(prefix="/bench")
+
+
+@bench.get("/expense-summary/async")
+async def expense_summary_async(db: AsyncSession = Depends(get_async_db)):
+    return (await aggregation.fetch_time_series(db, _series(), *RANGE, "day")).totals
+
+
+@bench.get("/expense-summary/sync")
+async def expense_summary_sync(db: Session = Depends(get_db)):
+    # Blocks the event loop for the whole query
+    rows = db.execute(aggregation.build_time_series_query(_series(), *RANGE, "day")).all()
+    return {"buckets": len(rows)}
+
+
+app.include_router(bench)
+
+
+def populate(db, records: int):
+    vehicle = db.execute(text("SELECT id FROM vehicle ORDER BY id LIMIT 1")).scalar()
+    fuel_type = db.execute(text("SELECT id FROM fuel_type ORDER BY id LIMIT 1")).scalar()
+    if vehicle is None or fuel_type is None:
+        raise SystemExit("Needs at least one vehicle and one fuel type in the database")
+    db.execute(text("""
+        INSERT INTO fuel (vehicle_id, fuel_type_id, quantity, price_little, cost, created_at)
+        SELECT :vehicle, :fuel_type, 40, 1.5, 60, :start + (n % 365) * interval '1 day' + (n % 86400) * interval '1 second'
+        FROM generate_series(1, :records) AS n
+    """), {"vehicle": vehicle, "fuel_type": fuel_type, "start": PERIOD_START, "records": records})
+    db.commit()
+    db.execute(text("ANALYZE fuel"))
+    db.commit()
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+async def wait_until_up(client: httpx.AsyncClient):
+    for _ in range(200):
+        try:
+            await client.get("/vehicle/", params={"limit": 1})
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    raise SystemExit("uvicorn did not start")
+
+
+async def run_mode(client: httpx.AsyncClient, load_path, load: int, seconds: float):
+    """(sorted /vehicle/ latencies, aggregates completed) while `load` clients request `load_path`."""
+    stop = time.perf_counter() + seconds
+    completed = 0
+
+    async def loader():
+        nonlocal completed
+        while time.perf_counter() < stop:
+            (await client.get(load_path)).raise_for_status()
+            completed += 1
+
+    async def prober():
+        latencies = []
+        while time.perf_counter() < stop:
+            began = time.perf_counter()
+            (await client.get("/vehicle/", params={"limit": 10})).raise_for_status()
+            latencies.append(time.perf_counter() - began)
+            await asyncio.sleep(0.01)
+        return sorted(latencies)
+
+    loaders = [asyncio.create_task(loader()) for _ in range(load if load_path else 0)]
+    latencies = await prober()
+    await asyncio.gather(*loaders)
+    return latencies, completed
+
+
+async def compare(base_url: str, load: int, seconds: float):
+    limits = httpx.Limits(max_connections=load + 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        await wait_until_up(client)
+        for label, path in (("no load", None),
+                            ("async aggregate", "/bench/expense-summary/async"),
+                            ("sync aggregate (before)", "/bench/expense-summary/sync")):
+            if path:
+                (await client.get(path)).raise_for_status()   # warm up
+            latencies, completed = await run_mode(client, path, load, seconds)
+            p50, p99 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+            print(f"{label:<24} /vehicle/ p50 {p50 * 1000:8.1f} ms  p99 {p99 * 1000:8.1f} ms"
+                  f"  ({len(latencies)} requests, {completed / seconds:5.1f} aggregates/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GET /vehicle/ latency under a concurrent expense aggregate load")
+    parser.add_argument("--records", type=int, default=500_000)
+    parser.add_argument("--load", type=int, default=4, help="clients requesting the aggregate")
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    db = SessionLocal()
+    port = free_port()
+    server = None
+    try:
+        populate(db, args.records)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "benchmarks.async_routes:app", "--port", str(port), "--log-level", "warning"],
+            env={**os.environ, "LOG_LEVEL": "WARNING"},
+        )
+        print(f"{args.records} fuel records, {args.load} aggregate clients, {args.seconds:.0f} s per mode")
+        asyncio.run(compare(f"http://127.0.0.1:{port}", args.load, args.seconds))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        db.rollback()
+        db.execute(text("DELETE FROM fuel WHERE created_at >= :start AND created_at <= :end"),
+                   {"start": PERIOD_START, "end": PERIOD_END})
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# benchmarks/availability.py
+#
+# GET /availability and the trip overlap constraints at scale, against the
+# configured database (.env). Inside one transaction that is rolled back at the
+# end, it adds --vehicles vehicles, as many drivers, and --trips back-to-back
+# trips spread over them (every insert goes through the exclusion constraints),
+# then times for random windows:
+#
+#   availability : free_vehicles + free_drivers (app/availability.py)
+#   per vehicle  : one overlap query per vehicle, as the trip form would need
+#                  without a batch answer
+#   insert       : one trip insert checked by the constraints, and one rejected
+#
+#   python -m benchmarks.availability [--trips 200000] [--vehicles 500] [--repeat 20]
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import exc, select, text
+
+from app import availability, models
+from app.database import SessionLocal
+
+TRIP_HOURS = 4
+SLOT_HOURS = 6     # one trip per vehicle every SLOT_HOURS, so trips of a vehicle never overlap
+
+
+def populate(db, vehicles: int, trips: int, start: datetime):
+    template = db.scalar(select(models.Vehicle.id).order_by(models.Vehicle.id).limit(1))
+    if template is None:
+        raise SystemExit("Needs at least one vehicle in the database")
+    vehicle_ids = db.scalars(text("""
+        INSERT INTO vehicle (make, model, year, plate_number, engine_size, vehicle_type, vehicle_transmission,
+                             vehicle_fuel_type, vin, color, purchase_price, purchase_date)
+        SELECT make, model, year, 'BENCH-' || n, engine_size, vehicle_type, vehicle_transmission,
+               vehicle_fuel_type, vin, color, purchase_price, purchase_date
+        FROM vehicle, generate_series(1, :count) AS n WHERE id = :template
+        RETURNING id
+    """), {"count": vehicles, "template": template}).all()
+    driver_ids = db.scalars(text("""
+        INSERT INTO driver (last_name, first_name, cni_number, email, matricule)
+        SELECT 'Bench', 'Driver ' || n, 'BENCH-' || n, 'bench' || n || '@bench.invalid', 'BENCH-' || n
+        FROM generate_series(1, :count) AS n
+        RETURNING id
+    """), {"count": vehicles}).all()
+    began = time.perf_counter()
+    db.execute(text("""
+        INSERT INTO trip (vehicle_id, driver_id, start_location, end_location, start_time, end_time, status)
+        SELECT pair.vehicle_id, pair.driver_id, 'bench', 'bench',
+               :start + slot * make_interval(hours => :slot_hours) + pair.n * interval '1 minute',
+               :start + slot * make_interval(hours => :slot_hours) + pair.n * interval '1 minute'
+                      + make_interval(hours => :trip_hours),
+               'Completed'
+        FROM unnest(:vehicle_ids, :driver_ids) WITH ORDINALITY AS pair (vehicle_id, driver_id, n),
+             generate_series(0, :per_vehicle - 1) AS slot
+    """), {"start": start, "slot_hours": SLOT_HOURS, "trip_hours": TRIP_HOURS, "vehicle_ids": vehicle_ids,
+           "driver_ids": driver_ids, "per_vehicle": trips // vehicles})
+    seconds = time.perf_counter() - began
+    db.execute(text("ANALYZE trip"))
+    print(f"inserted {trips // vehicles * vehicles:,} trips for {vehicles} vehicles / drivers "
+          f"in {seconds:.1f} s ({trips / seconds:,.0f} trips/s through the exclusion constraints)")
+    return vehicle_ids, driver_ids
+
+
+def measure(label: str, run, repeat: int):
+    run()   # warm up
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - began)
+    timings.sort()
+    print(f"{label:<30} median {timings[len(timings) // 2] * 1000:8.2f} ms   worst {timings[-1] * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Availability queries and overlap constraints at scale")
+    parser.add_argument("--trips", type=int, default=200_000)
+    parser.add_argument("--vehicles", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    start = datetime(2040, 1, 1, tzinfo=timezone.utc)
+    span_hours = args.trips // args.vehicles * SLOT_HOURS
+    rng = random.Random(7)
+
+    def window():
+        begin = start + timedelta(hours=rng.uniform(0, span_hours - TRIP_HOURS))
+        return begin, begin + timedelta(hours=TRIP_HOURS)
+
+    try:
+        vehicle_ids, driver_ids = populate(db, args.vehicles, args.trips, start)
+
+        def batch():
+            begin, end = window()
+            db.execute(availability.free_vehicles(begin, end)).all()
+            db.execute(availability.free_drivers(begin, end)).all()
+
+        def per_vehicle():
+            begin, end = window()
+            for vehicle_id in vehicle_ids:
+                db.execute(select(models.Trip.id).where(
+                    models.Trip.vehicle_id == vehicle_id, models.Trip.end_time > begin, models.Trip.start_time < end,
+                ).limit(1)).first()
+
+        def insert(overlapping: bool):
+            begin, end = window()
+            if not overlapping:
+                # Past the last slot: free for everyone
+                begin, end = begin + timedelta(hours=span_hours), end + timedelta(hours=span_hours)
+            savepoint = db.begin_nested()
+            try:
+                db.add(models.Trip(vehicle_id=vehicle_ids[0], driver_id=driver_ids[0], start_location="bench",
+                                   end_location="bench", start_time=begin, end_time=end))
+                db.flush()
+            except exc.IntegrityError:
+                pass
+            savepoint.rollback()
+
+        plan = "\n".join(db.scalars(text("EXPLAIN " + str(
+            availability.free_vehicles(start, start + timedelta(hours=TRIP_HOURS))
+            .compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+        ))))
+        print("availability uses ix_trip_period_scheduled:", "ix_trip_period_scheduled" in plan)
+
+        measure("availability (batch)", batch, args.repeat)
+        measure(f"per vehicle ({len(vehicle_ids)} queries)", per_vehicle, max(1, args.repeat // 4))
+        measure("insert trip (free)", lambda: insert(False), args.repeat)
+        measure("insert trip (overlap -> 409)", lambda: insert(True), args.repeat)
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
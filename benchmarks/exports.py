@@ -0,0 +1,129 @@
+# benchmarks/exports.py
+#
+# Peak memory of the expense exports over a large period, against the
+# configured database (.env). Adds --rows fuel records (committed: the exports
+# read through their own sessions) in an otherwise empty period, then for each
+# format reports the time, the output size and the peak RSS growth of this
+# process while the export ran:
+#
+#   csv  : exports.csv_chunks, consumed as StreamingResponse would
+#   xlsx : exports.xlsx_chunks
+#   pdf  : exports.pdf_job, the background job body, with a 10 ms ticker on
+#          the event loop; how late it fires shows whether building the
+#          report holds up requests
+#
+# Peak RSS is VmHWM from /proc/self/status, reset before each format by
+# writing 5 to /proc/self/clear_refs (Linux). The records are deleted again at
+# the end.
+#
+#   python -m benchmarks.exports [--rows 1000000]
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app import exports
+from app.database import AsyncSessionLocal, SessionLocal
+
+PERIOD_START = datetime(2090, 1, 1, tzinfo=timezone.utc)
+
+
+def memory_kib() -> dict:
+    with open("/proc/self/status") as status:
+        return {line.split(":")[0]: int(line.split()[1]) for line in status if line.startswith(("VmRSS", "VmHWM"))}
+
+
+def reset_peak():
+    with open("/proc/self/clear_refs", "w") as clear_refs:
+        clear_refs.write("5")
+
+
+def populate(db, rows: int):
+    vehicle = db.execute(text("SELECT id FROM vehicle ORDER BY id LIMIT 1")).scalar()
+    fuel_type = db.execute(text("SELECT id FROM fuel_type ORDER BY id LIMIT 1")).scalar()
+    if vehicle is None or fuel_type is None:
+        raise SystemExit("Needs at least one vehicle and one fuel type in the database")
+    db.execute(text("""
+        INSERT INTO fuel (vehicle_id, fuel_type_id, quantity, price_little, cost, created_at)
+        SELECT :vehicle, :fuel_type, 40, 1.5, 60, :start + n * interval '1 second'
+        FROM generate_series(1, :rows) AS n
+    """), {"vehicle": vehicle, "fuel_type": fuel_type, "start": PERIOD_START, "rows": rows})
+    db.commit()
+
+
+async def consume(chunks) -> int:
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+    return size
+
+
+async def pdf_with_ticker(path: str, start: datetime, end: datetime) -> list:
+    """Run the PDF job; returns the sorted lateness of a 10 ms ticker on the loop meanwhile."""
+    lateness = []
+    job = asyncio.ensure_future(exports.pdf_job(path, ["fuel"], start, end, {}))
+    while not job.done():
+        due = time.perf_counter() + 0.01
+        await asyncio.sleep(0.01)
+        lateness.append(time.perf_counter() - due)
+    await job
+    return sorted(lateness)
+
+
+async def measure(label: str, run):
+    reset_peak()
+    before = memory_kib()["VmRSS"]
+    began = time.perf_counter()
+    size, note = await run()
+    elapsed = time.perf_counter() - began
+    peak = memory_kib()["VmHWM"] - before
+    print(f"{label:<5} {size / 2**20:8.1f} MiB out {elapsed:7.1f} s   peak RSS +{peak / 1024:7.1f} MiB{note}")
+
+
+async def run_exports(start: datetime, end: datetime):
+    async def csv():
+        return await consume(exports.csv_chunks(AsyncSessionLocal, "fuel", start, end)), ""
+
+    async def xlsx():
+        return await consume(exports.xlsx_chunks(AsyncSessionLocal, ["fuel"], start, end)), ""
+
+    async def pdf():
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        os.close(fd)
+        try:
+            lateness = await pdf_with_ticker(path, start, end)
+            p50, p99 = lateness[len(lateness) // 2], lateness[int(len(lateness) * 0.99)]
+            return os.path.getsize(path), f"   ticker late p50 {p50 * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms"
+        finally:
+            os.remove(path)
+
+    await measure("csv", csv)
+    await measure("xlsx", xlsx)
+    await measure("pdf", pdf)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak RSS of the CSV / XLSX / PDF expense exports")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    start, end = PERIOD_START, PERIOD_START + timedelta(seconds=args.rows + 1)
+    db = SessionLocal()
+    try:
+        populate(db, args.rows)
+        print(f"{args.rows} fuel records")
+        asyncio.run(run_exports(start, end))
+    finally:
+        db.rollback()
+        db.execute(text("DELETE FROM fuel WHERE created_at >= :start AND created_at <= :end"), {"start": start, "end": end})
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
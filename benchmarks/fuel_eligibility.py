@@ -0,0 +1,135 @@
+# benchmarks/fuel_eligibility.py
+#
+# Fuel eligibility for a whole fleet, against the configured database (.env).
+# Inside one transaction that is rolled back at the end, it adds --vehicles
+# vehicles (and a driver each) with --records fuel records and completed trips
+# apiece, fills their vehicle_fuel_state rows, then times:
+#
+#   per vehicle : the former /fuel/check-eligibility/{id} -- vehicle, latest
+#                 fuel record, completed trip since -- once per vehicle, as the
+#                 fuel form had to
+#   batch       : GET /fuel/eligibility's single query (app/fuel_state.py)
+#
+# and the cost the state adds to a fuel insert (advance()).
+#
+#   python -m benchmarks.fuel_eligibility [--vehicles 1000] [--records 20] [--repeat 10]
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import desc, text
+
+from app import fuel_state, models
+from app.database import SessionLocal
+
+
+def populate(db, vehicles: int, records: int):
+    template = db.execute(text("SELECT id FROM vehicle ORDER BY id LIMIT 1")).scalar()
+    fuel_type = db.execute(text("SELECT id FROM fuel_type ORDER BY id LIMIT 1")).scalar()
+    if template is None or fuel_type is None:
+        raise SystemExit("Needs at least one vehicle and one fuel type in the database")
+    vehicle_ids = db.scalars(text("""
+        INSERT INTO vehicle (make, model, year, plate_number, engine_size, vehicle_type, vehicle_transmission,
+                             vehicle_fuel_type, vin, color, purchase_price, purchase_date, status)
+        SELECT make, model, year, 'BENCH-' || n, engine_size, vehicle_type, vehicle_transmission,
+               vehicle_fuel_type, vin, color, purchase_price, purchase_date, 'available'
+        FROM vehicle, generate_series(1, :count) AS n WHERE id = :template
+        RETURNING id
+    """), {"count": vehicles, "template": template}).all()
+    driver_ids = db.scalars(text("""
+        INSERT INTO driver (last_name, first_name, cni_number, email, matricule)
+        SELECT 'Bench', 'Driver ' || n, 'BENCH-' || n, 'bench' || n || '@bench.invalid', 'BENCH-' || n
+        FROM generate_series(1, :count) AS n
+        RETURNING id
+    """), {"count": vehicles}).all()
+    start = datetime(2040, 1, 1, tzinfo=timezone.utc)
+    # Fueled every other day, a completed trip on the days between; every third vehicle's last fueling has no trip after it
+    db.execute(text("""
+        INSERT INTO fuel (vehicle_id, fuel_type_id, quantity, price_little, cost, created_at)
+        SELECT pair.vehicle_id, :fuel_type, 40, 1.5, 60, :start + (2 * k + (pair.n % 3 = 0)::int) * interval '1 day'
+        FROM unnest(:vehicle_ids) WITH ORDINALITY AS pair (vehicle_id, n), generate_series(0, :records - 1) AS k
+    """), {"fuel_type": fuel_type, "start": start, "vehicle_ids": vehicle_ids, "records": records})
+    db.execute(text("""
+        INSERT INTO trip (vehicle_id, driver_id, start_location, end_location, start_time, end_time, status)
+        SELECT pair.vehicle_id, pair.driver_id, 'bench', 'bench',
+               :start + (2 * k + 1) * interval '1 day', :start + (2 * k + 1) * interval '1 day' + interval '2 hours',
+               'Completed'
+        FROM unnest(:vehicle_ids, :driver_ids) WITH ORDINALITY AS pair (vehicle_id, driver_id, n),
+             generate_series(0, :records - 1) AS k
+    """), {"start": start, "vehicle_ids": vehicle_ids, "driver_ids": driver_ids, "records": records})
+    fuel_state.recompute(db, vehicle_ids)
+    db.execute(text("ANALYZE fuel; ANALYZE trip; ANALYZE vehicle_fuel_state"))
+    return vehicle_ids, fuel_type
+
+
+def per_vehicle(db, vehicle_ids):
+    """The three sequential queries /fuel/check-eligibility/{id} used to run, for each vehicle."""
+    eligible = {}
+    for vehicle_id in vehicle_ids:
+        vehicle = db.query(models.Vehicle).filter(models.Vehicle.id == vehicle_id).first()
+        if vehicle.status != "available":
+            eligible[vehicle_id] = False
+            continue
+        last_fuel = db.query(models.Fuel).filter(models.Fuel.vehicle_id == vehicle_id).order_by(desc(models.Fuel.created_at)).first()
+        eligible[vehicle_id] = last_fuel is None or db.query(models.Trip).filter(
+            models.Trip.vehicle_id == vehicle_id, models.Trip.status == "Completed",
+            models.Trip.end_time > last_fuel.created_at,
+        ).first() is not None
+    return eligible
+
+
+def batch(db):
+    return {row.id: fuel_state.assess(row.status, row.last_fueled_at, row.last_trip_completed_at)[0]
+            for row in db.execute(fuel_state.eligibility_query())}
+
+
+def measure(label: str, run, repeat: int) -> float:
+    run()   # warm up
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - began)
+    best = min(timings)
+    print(f"{label:<28} best {best * 1000:9.2f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fleet fuel eligibility: per-vehicle queries vs one query")
+    parser.add_argument("--vehicles", type=int, default=1000)
+    parser.add_argument("--records", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        vehicle_ids, fuel_type = populate(db, args.vehicles, args.records)
+        fleet = db.scalars(text("SELECT id FROM vehicle")).all()
+        assert per_vehicle(db, fleet) == batch(db), "batch eligibility differs from the per-vehicle checks"
+        print(f"{len(fleet)} vehicles, {args.records} fuel records and completed trips each, answers identical")
+
+        slow = measure(f"per vehicle ({3 * len(fleet)} queries)", lambda: per_vehicle(db, fleet), args.repeat)
+        fast = measure("batch (1 query)", lambda: batch(db), args.repeat)
+        print(f"speedup                      x{slow / fast:.0f}")
+
+        def insert_fuel(with_state: bool):
+            savepoint = db.begin_nested()
+            fuel = models.Fuel(vehicle_id=vehicle_ids[0], fuel_type_id=fuel_type, quantity=1, price_little=1, cost=1)
+            db.add(fuel)
+            db.flush()
+            if with_state:
+                fuel_state.advance(db, "fuel", models.Fuel.id == fuel.id)
+            savepoint.rollback()
+
+        plain = measure("fuel insert", lambda: insert_fuel(False), args.repeat * 10)
+        kept = measure("fuel insert + advance()", lambda: insert_fuel(True), args.repeat * 10)
+        print(f"state upkeep per insert      {(kept - plain) * 1000:9.2f} ms")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
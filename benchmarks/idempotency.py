@@ -0,0 +1,112 @@
+# benchmarks/idempotency.py
+#
+# What an Idempotency-Key costs POST /fuel/ and POST /panne/, against the
+# configured database (.env). The handlers are called directly with a
+# session (no HTTP, no auth), per request:
+#
+#   no key  : the create as before
+#   new key : the create with its response stored under a new key
+#   replay  : a retry with a key already used -- the stored response
+#
+# in round trips (statements, COMMITs and ROLLBACKs) and milliseconds, and the
+# average size of a stored key. The records and keys created are deleted again
+# at the end.
+#
+#   python -m benchmarks.idempotency [--repeat 200]
+
+import argparse
+import time
+import uuid
+from datetime import datetime, timezone
+
+import orjson
+from sqlalchemy import event, select, text
+
+from app import models, schemas
+from app.database import SessionLocal, engine
+from app.routers import fuel, panne
+
+
+class RoundTrips:
+    def __init__(self):
+        self.count = 0
+        for name in ("before_cursor_execute", "commit", "rollback"):
+            event.listen(engine, name, self._seen)
+
+    def _seen(self, *args, **kwargs):
+        self.count += 1
+
+
+def measure(label: str, call, repeat: int, round_trips: RoundTrips) -> float:
+    call(0)   # warm up
+    before, began = round_trips.count, time.perf_counter()
+    for i in range(1, repeat + 1):
+        call(i)
+    elapsed = (time.perf_counter() - began) / repeat
+    per_call = (round_trips.count - before) / repeat
+    print(f"{label:<28} {per_call:8.1f} round trips {elapsed * 1000:8.2f} ms")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of Idempotency-Key on the create endpoints")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    round_trips = RoundTrips()
+    tag = uuid.uuid4().hex[:8]
+    vehicle = db.query(models.Vehicle).first()
+    fuel_type = db.query(models.FuelType).first()
+    category = db.query(models.CategoryPanne).first()
+    if not all((vehicle, fuel_type, category)):
+        raise SystemExit("Needs at least one vehicle, fuel type and panne category in the database")
+    created = {"fuel": [], "panne": []}
+    key = models.IdempotencyKey
+    keys = key.key.like(f"{tag}-%")
+
+    def fuel_payload():
+        return schemas.FuelCreatePayload(vehicle_id=vehicle.id, fuel_type_id=fuel_type.id, quantity=1, price_little=1)
+
+    def panne_payload():
+        return schemas.PanneCreate(vehicle_id=vehicle.id, category_panne_id=category.id,
+                                   description=f"bench-{tag}", panne_date=datetime.now(timezone.utc))
+
+    def create(scope, handler, payload, key):
+        result = handler(payload, db, key) if scope == "fuel" else handler(payload, db, None, key)
+        if key is None:
+            created[scope].append(result.id)
+        return result
+
+    scenarios = (("fuel", fuel.create_new_fuel_record, fuel_payload()),
+                 ("panne", panne.create_new_panne, panne_payload()))
+    try:
+        for scope, handler, payload in scenarios:
+            plain = measure(f"POST /{scope}/ no key", lambda i: create(scope, handler, payload, None),
+                            args.repeat, round_trips)
+            keyed = measure(f"POST /{scope}/ new key", lambda i: create(scope, handler, payload, f"{tag}-{i}"),
+                            args.repeat, round_trips)
+            measure(f"POST /{scope}/ replay", lambda i: create(scope, handler, payload, f"{tag}-{i}"),
+                    args.repeat, round_trips)
+            print(f"{'key upkeep per create':<28} {(keyed - plain) * 1000:29.2f} ms")
+
+        size = db.execute(text("SELECT avg(pg_column_size(idempotency_key.*)) FROM idempotency_key WHERE key LIKE :keys"),
+                          {"keys": f"{tag}-%"}).scalar()
+        print(f"stored key                   {size:8.0f} bytes on average")
+    finally:
+        db.rollback()
+        # The keyed creates: their ids are in the stored responses
+        for scope, handler, _ in scenarios:
+            for body in db.scalars(select(key.body).where(key.scope == scope, keys)):
+                created[scope].append(orjson.loads(body)["id"])
+        db.execute(key.__table__.delete().where(keys))
+        db.commit()
+        for fuel_id in created["fuel"]:
+            fuel.delete_existing_fuel_record(fuel_id, db)
+        for panne_id in created["panne"]:
+            panne.delete_existing_panne(panne_id, db, None)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# benchmarks/logins.py
+#
+# Latency of the CRUD list routes while clients keep logging in, against the
+# configured database (.env): what a login burst does to the rest of the
+# worker. Serves app.main.app with uvicorn (one worker, as in the Dockerfile)
+# plus one route that logs in the way POST /login/ did before the bounded
+# hashing pool:
+#
+#   /login/            : async, bcrypt on the bounded pool (app/utils.py),
+#                        503 + Retry-After once it is full
+#   /bench/login-sync  : sync def with the sync Session, bcrypt on FastAPI's
+#                        shared threadpool, as it was before
+#
+# For each mode, --logins clients log in back to back while one client times
+# GET /trip/?limit=10 and GET /fuel/?limit=10 (sync routes, served from the
+# shared threadpool) for --seconds. Adds a user to log in as and deletes it at
+# the end.
+#
+#   python -m benchmarks.logins [--logins 64] [--seconds 10]
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security.oauth2 import OAuth2PasswordRequestForm
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app import models, oauth2, utils
+from app.database import SessionLocal, get_db
+from app.main import app
+
+USERNAME = "bench-login"
+PASSWORD = "bench-login-password"
+PROBED = ("/trip/", "/fuel/")
+
+bench = APIRouter(prefix="/bench")
+
+
+@bench.post("/login-sync")
+def login_sync(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = db.query(models.User).filter(models.User.username == form.username).first()
+    if not user or not utils.verify(form.password, user.password):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
+    return {"access_token": oauth2.create_access_token({"sub": user.username, "user_id": user.id,
+                                                        "status": user.status}),
+            "token_type": "bearer"}
+
+
+app.include_router(bench)
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+async def wait_until_up(client: httpx.AsyncClient):
+    for _ in range(200):
+        try:
+            await client.get("/docs")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    raise SystemExit("uvicorn did not start")
+
+
+async def run_mode(client: httpx.AsyncClient, headers: dict, login_path, logins: int, seconds: float):
+    """(sorted CRUD latencies, Counter of login status codes) while `logins` clients log in at `login_path`."""
+    stop = time.perf_counter() + seconds
+    answers = Counter()
+    credentials = {"username": USERNAME, "password": PASSWORD}
+
+    async def login():
+        while time.perf_counter() < stop:
+            response = await client.post(login_path, data=credentials)
+            answers[response.status_code] += 1
+            if response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+                await asyncio.sleep(float(response.headers.get("retry-after", 1)))
+
+    async def prober():
+        latencies = []
+        while time.perf_counter() < stop:
+            for path in PROBED:
+                began = time.perf_counter()
+                (await client.get(path, params={"limit": 10}, headers=headers)).raise_for_status()
+                latencies.append(time.perf_counter() - began)
+            await asyncio.sleep(0.01)
+        return sorted(latencies)
+
+    logging_in = [asyncio.create_task(login()) for _ in range(logins if login_path else 0)]
+    latencies = await prober()
+    await asyncio.gather(*logging_in)
+    return latencies, answers
+
+
+async def compare(base_url: str, logins: int, seconds: float):
+    limits = httpx.Limits(max_connections=logins + 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        await wait_until_up(client)
+        token = (await client.post("/login/", data={"username": USERNAME, "password": PASSWORD})).json()
+        headers = {"Authorization": f"Bearer {token['access_token']}"}
+        for label, path in (("no logins", None),
+                            ("logins on the hash pool", "/login/"),
+                            ("logins on the threadpool", "/bench/login-sync")):
+            latencies, answers = await run_mode(client, headers, path, logins, seconds)
+            p50, p99 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+            logged_in = ", ".join(f"{count} x {code}" for code, count in sorted(answers.items())) or "-"
+            print(f"{label:<25} CRUD p50 {p50 * 1000:8.1f} ms  p99 {p99 * 1000:8.1f} ms"
+                  f"  ({len(latencies)} requests; logins: {logged_in})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CRUD route latency while clients log in concurrently")
+    parser.add_argument("--logins", type=int, default=64, help="clients logging in back to back")
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    db = SessionLocal()
+    port = free_port()
+    server = None
+    try:
+        db.add(models.User(username=USERNAME, email=f"{USERNAME}@bench.invalid", password=utils.hash(PASSWORD),
+                           status="active"))
+        db.commit()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "benchmarks.logins:app", "--port", str(port), "--log-level", "warning"],
+            env={**os.environ, "LOG_LEVEL": "WARNING"},
+        )
+        print(f"{args.logins} clients logging in, {args.seconds:.0f} s per mode")
+        asyncio.run(compare(f"http://127.0.0.1:{port}", args.logins, args.seconds))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        db.rollback()
+        db.execute(delete(models.User).where(models.User.username == USERNAME))
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/pagination.py
+#
+# Page 1 against a deep page of the list endpoints, against the configured
+# database (.env). Inside one transaction that is rolled back at the end, it
+# adds --rows records to each of the fuel, maintenance and panne tables, then
+# times pagination.paginate with each list's keyset (as the routers call it)
+# for:
+#
+#   page 1          : no cursor, no skip
+#   page N (skip)   : skip=(N - 1) * limit, the OFFSET the lists used before
+#   page N (cursor) : the X-Next-Cursor of page N - 1
+#
+# The page N cursor is built from the last row of page N - 1, read once
+# beforehand. Also prints whether the cursor page is an index scan on the
+# list's (date, id) index.
+#
+#   python -m benchmarks.pagination [--rows 5000000] [--page 10000] [--limit 100] [--repeat 10]
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+from fastapi import Response
+from sqlalchemy import text
+
+from app import models, pagination
+from app.database import SessionLocal
+from app.routers.fuel import FUEL_KEYSET
+from app.routers.maintenance import MAINTENANCE_KEYSET
+from app.routers.panne import PANNE_KEYSET
+
+PERIOD_START = datetime(2060, 1, 1, tzinfo=timezone.utc)
+
+# model, keyset, index the cursor page should use, INSERT of :rows records one second apart
+TABLES = {
+    "fuel": (models.Fuel, FUEL_KEYSET, "ix_fuel_created_at_id", """
+        INSERT INTO fuel (vehicle_id, fuel_type_id, quantity, price_little, cost, created_at)
+        SELECT :vehicle, (SELECT min(id) FROM fuel_type), 40, 1.5, 60, :start + n * interval '1 second'
+        FROM generate_series(1, :rows) AS n
+    """),
+    "maintenance": (models.Maintenance, MAINTENANCE_KEYSET, "ix_maintenance_maintenance_date_id", """
+        INSERT INTO maintenance (cat_maintenance_id, vehicle_id, garage_id, maintenance_cost, receipt,
+                                 maintenance_date, status)
+        SELECT (SELECT min(id) FROM category_maintenance), :vehicle, (SELECT min(id) FROM garage), 100,
+               'bench ' || n, :start + n * interval '1 second', 'active'
+        FROM generate_series(1, :rows) AS n
+    """),
+    "panne": (models.Panne, PANNE_KEYSET, "ix_panne_panne_date_id", """
+        INSERT INTO panne (vehicle_id, category_panne_id, description, status, panne_date)
+        SELECT :vehicle, (SELECT min(id) FROM category_panne), 'bench ' || n, 'active',
+               :start + n * interval '1 second'
+        FROM generate_series(1, :rows) AS n
+    """),
+}
+
+
+def populate(db, rows: int):
+    vehicle = db.execute(text("SELECT id FROM vehicle ORDER BY id LIMIT 1")).scalar()
+    if vehicle is None:
+        raise SystemExit("Needs at least one vehicle in the database")
+    missing = [table for table in ("fuel_type", "category_maintenance", "garage", "category_panne")
+               if db.execute(text(f"SELECT 1 FROM {table} LIMIT 1")).first() is None]
+    if missing:
+        raise SystemExit(f"Needs at least one row in {', '.join(missing)}")
+    for name, (_, _, _, insert) in TABLES.items():
+        began = time.perf_counter()
+        db.execute(text(insert), {"vehicle": vehicle, "start": PERIOD_START, "rows": rows})
+        db.execute(text(f"ANALYZE {name}"))
+        print(f"inserted {rows:,} {name} records in {time.perf_counter() - began:.1f} s")
+
+
+def measure(label: str, run, repeat: int):
+    run()   # warm up
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - began)
+    timings.sort()
+    print(f"{label:<34} median {timings[len(timings) // 2] * 1000:8.2f} ms   worst {timings[-1] * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Page 1 against page N of the list endpoints, by OFFSET and by cursor")
+    parser.add_argument("--rows", type=int, default=5_000_000, help="records added to each table")
+    parser.add_argument("--page", type=int, default=10_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    skip = (args.page - 1) * args.limit
+    db = SessionLocal()
+    try:
+        populate(db, args.rows)
+        for name, (model, keyset, index, _) in TABLES.items():
+            def page(**kwargs):
+                return pagination.paginate(db.query(model), keyset, Response(), limit=args.limit, **kwargs)
+
+            previous_last = db.query(model).order_by(*keyset.order_by()).offset(skip - 1).first()
+            cursor = keyset.encode(previous_last, "next")
+            assert [row.id for row in page(cursor=cursor)] == [row.id for row in page(skip=skip)]
+
+            plan = "\n".join(db.scalars(text("EXPLAIN " + str(
+                db.query(model).filter(keyset.after(keyset.values_of(previous_last)))
+                .order_by(*keyset.order_by()).limit(args.limit + 1)
+                .statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+            ))))
+            print(f"{name}: cursor page uses {index}:", index in plan)
+
+            measure(f"{name} page 1", page, args.repeat)
+            measure(f"{name} page {args.page:,} (skip)", lambda: page(skip=skip), args.repeat)
+            measure(f"{name} page {args.page:,} (cursor)", lambda: page(cursor=cursor), args.repeat)
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
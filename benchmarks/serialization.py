@@ -0,0 +1,95 @@
+# benchmarks/serialization.py
+#
+# Response serialization for a 1,000-trip list page, nested vehicle and driver
+# included, without a database:
+#
+#   response_model : what FastAPI does with List[TripResponse] -- validate every
+#                    ORM object (from_attributes), dump to JSON types, json.dumps
+#   RowSerializer  : app/serialization.py -- read the attributes into dicts,
+#                    orjson.dumps
+#
+# Both outputs are parsed and compared before timing, so a schema change that
+# makes the fast path drift from response_model fails here.
+#
+#   python -m benchmarks.serialization [--rows 1000] [--repeat 20]
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app import models, schemas, serialization
+
+
+def build_trips(count: int) -> list:
+    """Transient Trip objects with their vehicle and driver attached, as a joinedload would leave them."""
+    start = datetime(2026, 1, 1, 6, 30, tzinfo=timezone.utc)
+    vehicles = [
+        models.Vehicle(id=i, plate_number=f"AB-{i:04d}", vin=f"VIN{i}", color="white", make=1, model=1)
+        for i in range(1, 51)
+    ]
+    drivers = [
+        models.Driver(id=i, first_name=f"First{i}", last_name=f"Last{i}", cni_number=f"C{i}",
+                      email=f"d{i}@example.com", matricule=f"M{i}")
+        for i in range(1, 21)
+    ]
+    trips = []
+    for i in range(1, count + 1):
+        vehicle, driver = vehicles[i % len(vehicles)], drivers[i % len(drivers)]
+        begin = start + timedelta(hours=i)
+        trips.append(models.Trip(
+            id=i, vehicle_id=vehicle.id, driver_id=driver.id, vehicle=vehicle, driver=driver,
+            start_location=f"Depot {i % 7}", end_location=f"Site {i % 13}",
+            start_time=begin, end_time=begin + timedelta(hours=3) if i % 4 else None,
+            status="Completed" if i % 4 else "planned",
+            purpose="delivery" if i % 2 else None, notes=None if i % 3 else f"note {i}",
+            created_at=begin - timedelta(days=1), updated_at=begin,
+        ))
+    return trips
+
+
+def response_model_path(adapter: TypeAdapter, trips: list) -> bytes:
+    content = adapter.dump_python(adapter.validate_python(trips, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def row_serializer_path(serializer: serialization.RowSerializer, trips: list) -> bytes:
+    return serialization.ORJSONResponse(serializer.many(trips)).body
+
+
+def measure(label: str, run, repeat: int, rows: int) -> float:
+    run()   # warm up
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - began)
+    best = min(timings)
+    print(f"{label:<16} best {best * 1000:8.2f} ms   {rows / best:12,.0f} rows/s")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    trips = build_trips(args.rows)
+    adapter = TypeAdapter(List[schemas.TripResponse])
+    serializer = serialization.RowSerializer(schemas.TripResponse)
+
+    baseline, fast = response_model_path(adapter, trips), row_serializer_path(serializer, trips)
+    assert json.loads(baseline) == json.loads(fast), "RowSerializer output differs from response_model"
+    print(f"{args.rows} trips, {len(fast):,} bytes of JSON, outputs identical")
+
+    slow_time = measure("response_model", lambda: response_model_path(adapter, trips), args.repeat, args.rows)
+    fast_time = measure("RowSerializer", lambda: row_serializer_path(serializer, trips), args.repeat, args.rows)
+    print(f"speedup          x{slow_time / fast_time:.1f}")
+
+
+if __name__ == "__main__":
+    main()
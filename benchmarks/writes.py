@@ -0,0 +1,140 @@
+# benchmarks/writes.py
+#
+# Database round trips and latency of the create / update handlers, on their
+# success path and on the 404 / 409 paths, against the configured database
+# (.env). The handlers are called directly with a session, so the numbers are
+# the database work only: no HTTP, no auth.
+#
+# A round trip is a statement, a COMMIT or a ROLLBACK. The records created are
+# deleted again at the end.
+#
+#   python -m benchmarks.writes [--repeat 200]
+
+import argparse
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app import availability, models, schemas
+from app.database import SessionLocal, engine
+from app.routers import driver, fuel, reparation, trip
+
+MISSING_ID = 2_000_000_000
+
+
+class RoundTrips:
+    def __init__(self):
+        self.count = 0
+        for name in ("before_cursor_execute", "commit", "rollback"):
+            event.listen(engine, name, self._seen)
+
+    def _seen(self, *args, **kwargs):
+        self.count += 1
+
+
+def attempt(call, i, db) -> str:
+    try:
+        call(i)
+    except HTTPException as error:
+        db.rollback()
+        return str(error.status_code)
+    return "ok"
+
+
+def measure(label: str, call, repeat: int, round_trips: RoundTrips, db):
+    attempt(call, 0, db)   # warm up
+    before, began = round_trips.count, time.perf_counter()
+    for i in range(1, repeat + 1):
+        outcome = attempt(call, i, db)
+    elapsed = time.perf_counter() - began
+    per_call = (round_trips.count - before) / repeat
+    print(f"{label:<34} {outcome:>4} {per_call:8.1f} round trips {elapsed / repeat * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Round trips per create / update handler")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    round_trips = RoundTrips()
+    tag = uuid.uuid4().hex[:8]
+    vehicle = db.query(models.Vehicle).first()
+    fuel_type = db.query(models.FuelType).first()
+    panne = db.query(models.Panne).first()
+    garage = db.query(models.Garage).first()
+    if not all((vehicle, fuel_type, panne, garage)):
+        raise SystemExit("Needs at least one vehicle, fuel type, panne and garage in the database")
+    created = {"driver": [], "fuel": [], "reparation": [], "trip": []}
+    now = datetime.now(timezone.utc)
+
+    def new_driver(i):
+        payload = schemas.DriverCreate(last_name="Bench", first_name=f"{tag}-{i}", cni_number=f"B{tag}{i}",
+                                       email=f"{tag}{i}@bench.invalid", matricule=f"B{tag}{i}")
+        created["driver"].append(driver.create_new_driver(payload, db).id)
+
+    def duplicate_driver(i):
+        driver.create_new_driver(schemas.DriverCreate(last_name="Bench", first_name="dup", cni_number=f"B{tag}1",
+                                                      email=f"dup{tag}{i}@bench.invalid", matricule=f"D{tag}{i}"), db)
+
+    def update_driver(i):
+        driver_id = created["driver"][i % len(created["driver"])]
+        payload = schemas.DriverCreate(last_name="Bench", first_name=f"{tag}-{i}", cni_number=f"U{tag}{i}",
+                                       email=f"u{tag}{i}@bench.invalid", matricule=f"U{tag}{i}")
+        driver.update_existing_driver(driver_id, payload, db)
+
+    def new_fuel(i):
+        payload = schemas.FuelCreatePayload(vehicle_id=vehicle.id, fuel_type_id=fuel_type.id, quantity=1, price_little=1)
+        created["fuel"].append(fuel.create_new_fuel_record(payload, db, None).id)
+
+    def fuel_missing_vehicle(i):
+        fuel.create_new_fuel_record(schemas.FuelCreatePayload(vehicle_id=MISSING_ID, fuel_type_id=fuel_type.id,
+                                                               quantity=1, price_little=1), db, None)
+
+    def update_fuel(i):
+        fuel.update_existing_fuel_record(created["fuel"][i % len(created["fuel"])],
+                                         schemas.FuelUpdatePayload(fuel_type_id=fuel_type.id, quantity=2), db)
+
+    def new_reparation(i):
+        payload = schemas.ReparationCreate(panne_id=panne.id, garage_id=garage.id, receipt=f"bench-{tag}", repair_date=now)
+        created["reparation"].append(reparation.create_reparation(payload, db, None).id)
+
+    # One-hour trips one after the other, on a vehicle with nothing scheduled from trips_from on
+    trips_from = now + timedelta(days=365 * 20)
+    trip_vehicle = db.execute(availability.free_vehicles(trips_from)).first()
+    if trip_vehicle is None:
+        raise SystemExit("Needs a vehicle without open-ended trips in the database")
+
+    def new_trip(i):
+        start = trips_from + timedelta(hours=i)
+        payload = schemas.TripCreate(vehicle_id=trip_vehicle.id, driver_id=created["driver"][0], start_location="bench",
+                                     end_location="bench", start_time=start, end_time=start + timedelta(hours=1))
+        created["trip"].append(trip.create_new_trip(payload, db).id)
+
+    try:
+        measure("POST /driver/", new_driver, args.repeat, round_trips, db)
+        measure("POST /driver/ (duplicate CNI)", duplicate_driver, args.repeat, round_trips, db)
+        measure("PUT /driver/{id}", update_driver, args.repeat, round_trips, db)
+        measure("POST /fuel/", new_fuel, args.repeat, round_trips, db)
+        measure("POST /fuel/ (unknown vehicle)", fuel_missing_vehicle, args.repeat, round_trips, db)
+        measure("PUT /fuel/{id}", update_fuel, args.repeat, round_trips, db)
+        measure("POST /reparation/", new_reparation, args.repeat, round_trips, db)
+        measure("POST /trip/", new_trip, args.repeat, round_trips, db)
+    finally:
+        db.rollback()
+        for trip_id in created["trip"]:
+            trip.delete_existing_trip(trip_id, db)
+        for reparation_id in created["reparation"]:
+            reparation.delete_reparation(reparation_id, db, None)
+        for fuel_id in created["fuel"]:
+            fuel.delete_existing_fuel_record(fuel_id, db)
+        for driver_id in created["driver"]:
+            driver.delete_existing_driver(driver_id, db)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# Fixtures for the tests that need Postgres (the database configured in .env).
+#
+# `seeded` builds the schema from models.Base.metadata in a scratch schema,
+# fills it with enough rows for the planner to prefer indexes where they
+# apply (the rollup and fuel state tables through app/rollups.py and
+# app/fuel_state.py, as the write handlers fill them), and ANALYZEs it, all inside one transaction that is rolled back at
+# the end: the configured database is left as it was. Tests that use it are
+# skipped when the database cannot be reached.
+#
+# `db` is a Session on the configured database whose commits only release a
+# savepoint; everything is rolled back after the test. `client` is a
+# TestClient for app.main.app on that session, signed in as a test user.
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Enum, exc, text
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app import database, fuel_state, models, oauth2, rollups
+from app.database import engine
+from app.user_cache import CachedUser
+
+SCHEMA = "test_seeded"
+
+# Rows per table; the trip / fuel / maintenance / panne / reparation dates spread over DAYS days
+VEHICLES = 2000
+DRIVERS = 2000
+RECORDS = 50000
+DAYS = 1000
+
+SEED = """
+INSERT INTO fuel_type (fuel_type) VALUES ('Diesel'), ('Petrol'), ('Electric');
+INSERT INTO category_panne (panne_name) SELECT 'category ' || n FROM generate_series(1, 20) AS n;
+INSERT INTO category_maintenance (cat_maintenance) SELECT 'category ' || n FROM generate_series(1, 20) AS n;
+INSERT INTO garage (nom_garage) SELECT 'garage ' || n FROM generate_series(1, 50) AS n;
+
+INSERT INTO vehicle (plate_number, vin, color, status, purchase_date)
+SELECT 'PL-' || lpad(n::text, 6, '0'), 'VIN' || n, 'white', 'available',
+       timestamptz '2020-01-01' + (n % :days) * interval '1 day'
+FROM generate_series(1, :vehicles) AS n;
+
+INSERT INTO driver (last_name, first_name, cni_number, email, matricule)
+SELECT 'Driver', 'No ' || n, 'CNI' || n, 'driver' || n || '@test.invalid', 'M' || n
+FROM generate_series(1, :drivers) AS n;
+
+INSERT INTO fuel (vehicle_id, fuel_type_id, quantity, price_little, cost, created_at)
+SELECT 1 + n % :vehicles, 1 + n % 3, 40, 1.5, 60, timestamptz '2024-01-01' + (n % :days) * interval '1 day' + (n % 24) * interval '1 hour'
+FROM generate_series(1, :records) AS n;
+
+INSERT INTO maintenance (cat_maintenance_id, vehicle_id, garage_id, maintenance_cost, receipt, maintenance_date, status)
+SELECT 1 + n % 20, 1 + n % :vehicles, 1 + n % 50, 100, 'receipt ' || n,
+       timestamptz '2024-01-01' + (n % :days) * interval '1 day', 'active'
+FROM generate_series(1, :records) AS n;
+
+INSERT INTO panne (vehicle_id, category_panne_id, description, status, panne_date)
+SELECT 1 + n % :vehicles, 1 + n % 20, 'panne ' || n, 'active', timestamptz '2024-01-01' + (n % :days) * interval '1 day'
+FROM generate_series(1, :records) AS n;
+
+INSERT INTO reparation (panne_id, cost, receipt, garage_id, repair_date, status)
+SELECT n, 50 + n % 500, 'repair ' || n, 1 + n % 50, timestamptz '2024-01-01' + (n % :days) * interval '1 day', 'Completed'
+FROM generate_series(1, :records) AS n;
+
+-- Trip n drives vehicle and driver n % :vehicles in slot n / :vehicles, so no two overlap.
+-- Nearly all completed; a few planned, in progress or cancelled
+INSERT INTO trip (vehicle_id, driver_id, start_location, end_location, start_time, end_time, status)
+SELECT 1 + n % :vehicles, 1 + n % :vehicles, 'from ' || n, 'to ' || n,
+       timestamptz '2024-01-01' + (n / :vehicles) * interval '1 day',
+       timestamptz '2024-01-01' + (n / :vehicles) * interval '1 day' + interval '2 hours',
+       CASE WHEN n % 100 = 0 THEN 'planned' WHEN n % 100 = 1 THEN 'In Progress'
+            WHEN n % 100 = 2 THEN 'Cancelled' ELSE 'Completed' END
+FROM generate_series(1, :records) AS n;
+"""
+
+
+def _is_trigram(index) -> bool:
+    return "gin_trgm_ops" in index.dialect_options["postgresql"].get("ops", {}).values()
+
+
+@pytest.fixture(scope="session")
+def connection():
+    try:
+        conn = engine.connect()
+    except exc.OperationalError as error:
+        pytest.skip(f"Postgres is not reachable: {error.orig}")
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def db():
+    try:
+        conn = engine.connect()
+    except exc.OperationalError as error:
+        pytest.skip(f"Postgres is not reachable: {error.orig}")
+    transaction = conn.begin()
+    session = Session(bind=conn, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        conn.close()
+
+
+@pytest.fixture
+def client(db):
+    from app.main import app
+
+    def override_db():
+        yield db
+
+    app.dependency_overrides[database.get_db] = override_db
+    app.dependency_overrides[database.get_read_db] = override_db
+    app.dependency_overrides[oauth2.get_current_user] = lambda: CachedUser(id=0, username="test", status="active")
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.fixture(scope="session")
+def has_trigram(connection) -> bool:
+    """Whether pg_trgm can be used (installed, or available to install)."""
+    available = connection.execute(text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).first()
+    connection.rollback()
+    return available is not None
+
+
+@pytest.fixture(scope="session")
+def seeded(connection, has_trigram):
+    """Connection whose search_path starts with the seeded scratch schema."""
+    transaction = connection.begin()
+    try:
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        connection.execute(text(f"SET LOCAL search_path TO {SCHEMA}, public"))
+        if has_trigram:
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        tables = models.Base.metadata.sorted_tables
+        enums = {column.type.name: column.type for table in tables for column in table.columns
+                 if isinstance(column.type, Enum) and column.type.native_enum}
+        for enum in enums.values():
+            enum.create(connection, checkfirst=False)
+        for table in tables:
+            connection.execute(CreateTable(table))
+        for table in tables:
+            for index in table.indexes:
+                if has_trigram or not _is_trigram(index):
+                    connection.execute(CreateIndex(index))
+        for statement in SEED.split(";\n"):
+            if statement.strip():
+                connection.execute(text(statement), {"vehicles": VEHICLES, "drivers": DRIVERS,
+                                                     "records": RECORDS, "days": DAYS})
+        for category in rollups.CATEGORIES:
+            rollups.apply_delta(connection, category)
+        fuel_state.recompute(connection, range(1, VEHICLES + 1))
+        for table in tables:
+            connection.execute(text(f"ANALYZE {SCHEMA}.{table.name}"))
+        yield connection
+    finally:
+        transaction.rollback()
@@ -0,0 +1,80 @@
+import base64
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Response
+
+from app import models, pagination
+from app.routers.panne import PANNE_KEYSET
+from app.routers.trip import TRIP_KEYSET
+
+START = datetime(2031, 6, 1, 8, 30, tzinfo=timezone.utc)
+
+
+def _cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    row = SimpleNamespace(start_time=START, id=4711)
+    for direction in ("next", "prev"):
+        assert TRIP_KEYSET.decode(TRIP_KEYSET.encode(row, direction)) == (direction, [START, 4711])
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    base64.urlsafe_b64encode(b"\xff\xfe not json").decode(),
+    _cursor(["trip", "next", [START.isoformat(), 1]]),                  # not an object
+    _cursor({"k": "panne", "d": "next", "v": [START.isoformat(), 1]}),  # issued for another list
+    _cursor({"k": "trip", "d": "sideways", "v": [START.isoformat(), 1]}),
+    _cursor({"k": "trip", "d": "next", "v": [START.isoformat()]}),      # a value missing
+    _cursor({"k": "trip", "d": "next", "v": [START.isoformat(), "1"]}),  # id is not an integer
+    _cursor({"k": "trip", "d": "next", "v": ["yesterday", 1]}),
+    _cursor({"k": "trip", "d": "next", "v": [12, 1]}),
+    _cursor({"k": "trip", "d": "next"}),
+])
+def test_tampered_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as raised:
+        TRIP_KEYSET.decode(cursor)
+    assert raised.value.status_code == 400
+
+
+def test_tampered_cursor_is_400_from_the_endpoint(client):
+    response = client.get("/trip/", params={"cursor": "not a cursor!"})
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid cursor")
+
+
+def test_rows_sharing_a_sort_key_are_paged_once_each(db):
+    vehicle = models.Vehicle(plate_number="PAGING-1", vin="VIN-PAGING", color="grey")
+    category = models.CategoryPanne(panne_name="paging test")
+    db.add_all([vehicle, category])
+    db.flush()
+    pannes = [models.Panne(vehicle_id=vehicle.id, category_panne_id=category.id, panne_date=START) for _ in range(7)]
+    db.add_all(pannes)
+    db.flush()
+    expected = sorted((panne.id for panne in pannes), reverse=True)
+    query = db.query(models.Panne).filter(models.Panne.category_panne_id == category.id)
+
+    def page(cursor=None):
+        response = Response()
+        rows = pagination.paginate(query, PANNE_KEYSET, response, limit=3, cursor=cursor)
+        return [row.id for row in rows], response.headers
+
+    # Forwards: newest first, ties broken by id, no row skipped or repeated
+    seen, cursor, pages = [], None, []
+    while True:
+        ids, headers = page(cursor)
+        seen += ids
+        pages.append((ids, headers.get(pagination.PREV_CURSOR_HEADER)))
+        cursor = headers.get(pagination.NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+    assert seen == expected
+    assert [len(ids) for ids, _ in pages] == [3, 3, 1]
+
+    # Backwards from the last page gives the same pages back
+    for (ids, _), (_, prev_cursor) in zip(pages, pages[1:]):
+        assert page(prev_cursor)[0] == ids
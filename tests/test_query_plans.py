@@ -0,0 +1,183 @@
+# EXPLAIN the routers' hot queries against the seeded database (conftest.py)
+# and fail when one is planned as a sequential scan of a table holding more
+# than SEQ_SCAN_MAX_ROWS rows, or does not use the indexes meant for it: the
+# date-range and foreign-key indexes of migration 5c7d9e1f2a34, the (date, id)
+# keyset indexes that later replaced its single-column date ones, the rollup
+# and fuel state primary keys, and the trip period index.
+#
+# The statements are built by the code the routers run (the list keysets and
+# pagination, aggregation with the routers' series, the dashboard query
+# builders, fuel_state, availability, rollups), so a change there that loses
+# an index fails here. The list searches (app/search.py) must use the pg_trgm
+# indexes on search_text (and on the vehicle plate); those cases are skipped
+# where pg_trgm is missing.
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app import aggregation, availability, fuel_state, models, rollups, search
+from app.routers import analytics_api, dashboard_data_api
+from app.routers.fuel import FUEL_KEYSET
+from app.routers.maintenance import MAINTENANCE_KEYSET
+from app.routers.panne import PANNE_KEYSET
+from app.routers.reparation import REPARATION_KEYSET
+from app.routers.trip import TRIP_KEYSET
+
+# Small lookup tables (fuel types, categories, garages) may be scanned
+SEQ_SCAN_MAX_ROWS = 1000
+# Rows per list page; paginate() fetches one more
+LIMIT = 10
+
+DAY = datetime(2025, 3, 1, tzinfo=timezone.utc)
+NEXT_DAY = datetime(2025, 3, 2, tzinfo=timezone.utc)
+MONTH_END = datetime(2025, 4, 1, tzinfo=timezone.utc)
+# The analytics and dashboard handlers pass naive bounds (datetime.combine / utcnow)
+NAIVE_DAY, NAIVE_MONTH_END = DAY.replace(tzinfo=None), MONTH_END.replace(tzinfo=None)
+CURSOR = [DAY, 10 ** 9]   # a decoded cursor: (date, id) of the last row served
+
+Fuel, Maintenance, Panne, Reparation, Trip, Vehicle = (
+    models.Fuel, models.Maintenance, models.Panne, models.Reparation, models.Trip, models.Vehicle)
+rollup = models.DailyCostRollup
+_session = Session()   # only builds ORM queries; never connects
+
+
+def listed(keyset, query, values=None):
+    """The statement paginate() fetches for a list page."""
+    return keyset.page(query, values).limit(LIMIT + 1).statement
+
+
+def query(model):
+    return _session.query(model)
+
+
+# name -> (indexes the plan must use, statement, tables it may scan whole)
+HOT_QUERIES = {
+    # List pages: the routers' keysets through pagination, with the routers' filters
+    "fuel list, cursor page": (
+        ["ix_fuel_created_at_id"], listed(FUEL_KEYSET, query(Fuel), CURSOR), ()),
+    "fuel list of a vehicle": (
+        ["ix_fuel_vehicle_id_created_at"], listed(FUEL_KEYSET, query(Fuel).filter(Fuel.vehicle_id == 7)), ()),
+    "maintenance list, cursor page": (
+        ["ix_maintenance_maintenance_date_id"], listed(MAINTENANCE_KEYSET, query(Maintenance), CURSOR), ()),
+    "panne list, cursor page": (
+        ["ix_panne_panne_date_id"], listed(PANNE_KEYSET, query(Panne), CURSOR), ()),
+    "panne list of a vehicle": (
+        ["ix_panne_vehicle_id"], listed(PANNE_KEYSET, query(Panne).filter(Panne.vehicle_id == 7)), ()),
+    "reparation list, cursor page": (
+        ["ix_reparation_repair_date_id"], listed(REPARATION_KEYSET, query(Reparation), CURSOR), ()),
+    "trip list, first page": (
+        ["ix_trip_start_time_id"], listed(TRIP_KEYSET, query(Trip)), ()),
+    "trip list, cursor page": (
+        ["ix_trip_start_time_id"], listed(TRIP_KEYSET, query(Trip), CURSOR), ()),
+    "trip list of a vehicle": (
+        ["ix_trip_vehicle_id_end_time"], listed(TRIP_KEYSET, query(Trip).filter(Trip.vehicle_id == 7)), ()),
+    "trip list of a driver": (
+        ["ix_trip_driver_id_end_time"], listed(TRIP_KEYSET, query(Trip).filter(Trip.driver_id == 7)), ()),
+    # 1 trip in 100 has a given status: walking the keyset index finds a page sooner than ix_trip_status
+    "trip list by status": (
+        ["ix_trip_start_time_id"], listed(TRIP_KEYSET, query(Trip).filter(Trip.status == "In Progress")), ()),
+
+    # Charts: aggregation with the routers' series
+    "expense summary by day": (
+        ["daily_cost_rollup_pkey", "ix_vehicle_purchase_date"],
+        aggregation.build_time_series_query(analytics_api.EXPENSE_SERIES, NAIVE_DAY, NAIVE_MONTH_END, "day"), ()),
+    "monthly activity": (
+        ["ix_trip_start_time_id", "ix_maintenance_maintenance_date_id", "ix_panne_panne_date_id"],
+        aggregation.build_time_series_query(dashboard_data_api.ACTIVITY_SERIES, NAIVE_DAY, NAIVE_MONTH_END, "month"), ()),
+
+    # Dashboard
+    "repairs this month (rollup)": (
+        ["daily_cost_rollup_pkey"],
+        dashboard_data_api.rollup_total(rollup.record_count, "reparation", DAY.date(), MONTH_END.date()), ()),
+    "fuel volume this month (rollup)": (
+        ["daily_cost_rollup_pkey"],
+        dashboard_data_api.rollup_total(rollup.fuel_quantity, "fuel", DAY.date(), MONTH_END.date()), ()),
+    "planned trips": (
+        ["ix_trip_planned_start_time"], dashboard_data_api.PLANNED_TRIPS_COUNT, ()),
+    "upcoming trips": (
+        ["ix_trip_planned_start_time"], dashboard_data_api.upcoming_trips_query(NAIVE_DAY), ()),
+    "top drivers": (
+        ["ix_trip_completed_end_time"], dashboard_data_api.top_drivers_query(NAIVE_DAY, 3), ()),
+
+    # Fuel eligibility and the state its writes maintain
+    "fuel eligibility of a vehicle": (
+        ["ix_vehicle_id", "vehicle_fuel_state_pkey"], fuel_state.eligibility_query(Vehicle.id == 7), ()),
+    "fuel state recompute": (
+        ["ix_fuel_vehicle_id_created_at", "ix_trip_vehicle_id_end_time"],
+        fuel_state._recompute_statement(Vehicle.id == 7), ()),
+
+    # Availability: every vehicle / driver is listed, the busy ones come from the period index
+    "free vehicles": (
+        ["ix_trip_period_scheduled"], availability.free_vehicles(DAY, NEXT_DAY), ("vehicle",)),
+    "free drivers": (
+        ["ix_trip_period_scheduled"], availability.free_drivers(DAY, NEXT_DAY), ("driver",)),
+
+    # Rollup deltas: the reparations of a panne (panne vehicle change / delete)
+    "reparation rollup of a panne": (
+        ["ix_reparation_panne_id"], rollups._grouped("reparation", Reparation.panne_id == 7), ()),
+
+    # What ON DELETE CASCADE runs when a vehicle / fuel type is deleted
+    "maintenance of a deleted vehicle": (
+        ["ix_maintenance_vehicle_id"], delete(Maintenance).where(Maintenance.vehicle_id == 7), ()),
+    "fuel of a deleted fuel type": (
+        ["ix_fuel_fuel_type_id"], delete(models.Fuel).where(Fuel.fuel_type_id == 2), ()),
+}
+
+# (spec, term, expected index): the ILIKE '%term%' branch of search.condition()
+SEARCHES = {
+    "driver search": (search.DRIVER, "No 1234", "ix_driver_search_text_trgm"),
+    "trip search": (search.TRIP, "from 4711", "ix_trip_search_text_trgm"),
+    "panne search": (search.PANNE, "panne 4711", "ix_panne_search_text_trgm"),
+    "maintenance search": (search.MAINTENANCE, "receipt 4711", "ix_maintenance_search_text_trgm"),
+    "reparation search": (search.REPARATION, "repair 4711", "ix_reparation_search_text_trgm"),
+    "vehicle plate search": (search.VEHICLE, "001234", "ix_vehicle_plate_number_trgm"),
+}
+
+
+def explain(connection, statement) -> dict:
+    """The root plan node of EXPLAIN (FORMAT JSON) for a SQLAlchemy statement."""
+    compiled = statement.compile(dialect=connection.dialect)
+    cursor = connection.connection.cursor()
+    try:
+        sql = cursor.mogrify(str(compiled), compiled.params).decode()
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql)
+        return cursor.fetchone()[0][0]["Plan"]
+    finally:
+        cursor.close()
+
+
+def nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from nodes(child)
+
+
+def large_sequential_scans(connection, plan: dict, allowed=()):
+    scanned = [node["Relation Name"] for node in nodes(plan)
+               if node["Node Type"] == "Seq Scan" and node["Relation Name"] not in allowed]
+    return [table for table in scanned
+            if connection.exec_driver_sql(f"SELECT reltuples FROM pg_class WHERE oid = '{table}'::regclass").scalar()
+            > SEQ_SCAN_MAX_ROWS]
+
+
+def assert_uses_indexes(connection, statement, indexes, allowed_scans=()):
+    plan = explain(connection, statement)
+    assert not large_sequential_scans(connection, plan, allowed_scans), plan
+    used = {node.get("Index Name") for node in nodes(plan)}
+    assert not set(indexes) - used, plan
+
+
+@pytest.mark.parametrize("indexes, statement, allowed_scans", HOT_QUERIES.values(), ids=HOT_QUERIES.keys())
+def test_hot_query_uses_index(seeded, indexes, statement, allowed_scans):
+    assert_uses_indexes(seeded, statement, indexes, allowed_scans)
+
+
+@pytest.mark.parametrize("spec, term, index", SEARCHES.values(), ids=SEARCHES.keys())
+def test_search_uses_trigram_index(seeded, has_trigram, spec, term, index):
+    if not has_trigram:
+        pytest.skip("pg_trgm is not available on this server")
+    table = spec.text.table if spec.text is not None else spec.related[0].fk.table
+    assert_uses_indexes(seeded, select(table.c.id).where(search.condition(spec, term)), [index])
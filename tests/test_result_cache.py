@@ -0,0 +1,42 @@
+import asyncio
+
+from app import database, result_cache
+from app.database import SessionLocal
+
+TABLE = "result_cache_test"
+
+
+def _counting_function():
+    calls = []
+
+    @result_cache.cached(TABLE)
+    async def compute(db, n):
+        calls.append(n)
+        return n
+
+    return compute, calls
+
+
+def test_replica_result_is_cached_when_its_tables_were_not_written(monkeypatch):
+    monkeypatch.setattr(database, "is_replica", lambda db: True)
+    compute, calls = _counting_function()
+    db = SessionLocal()
+    assert asyncio.run(compute(db, 1)) == asyncio.run(compute(db, 1)) == 1
+    assert calls == [1]
+
+
+def test_replica_result_is_not_cached_right_after_a_write(monkeypatch):
+    compute, calls = _counting_function()
+    db = SessionLocal()
+    result_cache.bump(TABLE)
+
+    monkeypatch.setattr(database, "is_replica", lambda db: True)
+    asyncio.run(compute(db, 2))
+    asyncio.run(compute(db, 2))
+    assert calls == [2, 2]
+
+    # The primary has the write: its result is stored
+    monkeypatch.setattr(database, "is_replica", lambda db: False)
+    asyncio.run(compute(db, 2))
+    asyncio.run(compute(db, 2))
+    assert calls == [2, 2, 2]
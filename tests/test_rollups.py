@@ -0,0 +1,56 @@
+from datetime import date, datetime, timezone
+
+from sqlalchemy import select
+
+from app import models, rollups
+
+REPAIR_DATE = datetime(2031, 5, 4, 10, tzinfo=timezone.utc)
+
+
+def _reparation_rollup(db, vehicle_id: int):
+    rollup = models.DailyCostRollup
+    return db.execute(select(rollup.total_cost, rollup.record_count).where(
+        rollup.day == date(2031, 5, 4), rollup.vehicle_id == vehicle_id, rollup.category == "reparation",
+    )).first()
+
+
+def _vehicles(db, count: int):
+    """`count` vehicles complete enough for VehicleOut."""
+    make, model = models.VehicleMake(vehicle_make="Test"), models.VehicleModel(vehicle_model="Test")
+    kind, transmission = models.VehicleType(vehicle_type="Test"), models.VehicleTransmission(vehicle_transmission="Test")
+    fuel_type = models.FuelType(fuel_type="rollup test")
+    db.add_all([make, model, kind, transmission, fuel_type])
+    db.flush()
+    vehicles = [models.Vehicle(plate_number=f"ROLLUP-{n}", vin=f"VIN-{n}", color="grey", year=2030, make=make.id,
+                               model=model.id, vehicle_type=kind.id, vehicle_transmission=transmission.id,
+                               vehicle_fuel_type=fuel_type.id, purchase_date=REPAIR_DATE)
+                for n in range(count)]
+    db.add_all(vehicles)
+    return vehicles
+
+
+def test_panne_moved_to_another_vehicle_takes_its_reparations_along(db, client):
+    first, second = _vehicles(db, 2)
+    category = models.CategoryPanne(panne_name="rollup test")
+    db.add(category)
+    db.flush()
+    panne = models.Panne(vehicle_id=first.id, category_panne_id=category.id, panne_date=REPAIR_DATE)
+    db.add(panne)
+    db.flush()
+    for cost in (100.0, 50.0):
+        reparation = models.Reparation(panne_id=panne.id, cost=cost, receipt="rollup test", repair_date=REPAIR_DATE)
+        db.add(reparation)
+        db.flush()
+        rollups.add(db, "reparation", reparation.id)
+    db.commit()
+    assert tuple(_reparation_rollup(db, first.id)) == (150.0, 2)
+
+    response = client.put(f"/panne/{panne.id}", json={"vehicle_id": second.id})
+    assert response.status_code == 200
+    assert tuple(_reparation_rollup(db, first.id)) == (0.0, 0)
+    assert tuple(_reparation_rollup(db, second.id)) == (150.0, 2)
+
+    # An unknown vehicle is a 404 and leaves the rollup as it was
+    response = client.put(f"/panne/{panne.id}", json={"vehicle_id": 10 ** 9})
+    assert response.status_code == 404
+    assert tuple(_reparation_rollup(db, second.id)) == (150.0, 2)
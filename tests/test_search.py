@@ -0,0 +1,16 @@
+from app import models, search
+from app.database import SessionLocal
+
+
+def test_blank_term_is_no_search():
+    query = SessionLocal().query(models.Trip)
+    for term in (None, "", "   ", "\t\n"):
+        assert search.normalize(term) is None
+        assert search.apply(query, search.TRIP, term) == (query, None)
+
+
+def test_term_is_stripped():
+    query = SessionLocal().query(models.Trip)
+    filtered, ranking = search.apply(query, search.TRIP, "  AB-12 ")
+    assert ranking is not None
+    assert "%AB-12%" in filtered.statement.compile().params.values()
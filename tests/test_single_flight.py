@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from app.single_flight import SingleFlight
+
+
+async def _gather_same_key(flight: SingleFlight, compute, callers: int = 5):
+    return await asyncio.gather(*(flight.do("key", compute) for _ in range(callers)), return_exceptions=True)
+
+
+def test_concurrent_callers_share_one_computation():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)   # the other callers arrive while this runs
+        return {"answer": 42}
+
+    results = asyncio.run(_gather_same_key(flight, compute))
+    assert calls == [1]
+    assert results == [{"answer": 42}] * 5
+    assert all(result is results[0] for result in results)
+    assert flight.stats()["by_key"] == {"'key'": {"leaders": 1, "coalesced": 4}}
+
+
+def test_leader_exception_reaches_every_waiter():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = asyncio.run(_gather_same_key(flight, compute))
+    assert calls == [1]
+    assert all(isinstance(result, ValueError) and str(result) == "boom" for result in results)
+
+
+@pytest.mark.parametrize("fails", [False, True])
+def test_key_is_released_afterwards(fails):
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if fails:
+            raise ValueError("boom")
+        return len(calls)
+
+    async def twice():
+        await _gather_same_key(flight, compute)
+        assert flight.stats()["in_flight"] == 0
+        # A later call computes afresh instead of getting the finished result
+        return await flight.do("key", compute)
+
+    if fails:
+        with pytest.raises(ValueError):
+            asyncio.run(twice())
+    else:
+        assert asyncio.run(twice()) == 2
+    assert calls == [1, 1]
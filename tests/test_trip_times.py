@@ -0,0 +1,76 @@
+# Trip start/end times and availability windows with and without a UTC
+# offset: naive values are taken as UTC, so mixing the two validates instead
+# of raising TypeError.
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app import bulk, database, schemas
+from app.routers.availability import get_availability
+from app.routers.trip import TRIP_BULK
+
+TRIP = dict(vehicle_id=1, driver_id=1, start_location="a", end_location="b")
+UTC = timezone.utc
+
+
+def test_create_with_aware_start_and_naive_end():
+    trip = schemas.TripCreate(**TRIP, start_time="2026-01-01T10:00:00Z", end_time="2026-01-01T12:00:00")
+    assert trip.start_time == datetime(2026, 1, 1, 10, tzinfo=UTC)
+    assert trip.end_time == datetime(2026, 1, 1, 12, tzinfo=UTC)
+
+
+def test_create_with_naive_start_after_aware_end_is_rejected():
+    with pytest.raises(ValidationError, match=schemas.TRIP_ENDS_BEFORE_START):
+        schemas.TripCreate(**TRIP, start_time="2026-01-01T10:00:00", end_time="2026-01-01T12:00:00+03:00")
+
+
+def test_update_naive_end_against_stored_start():
+    # PUT /trip/{id} compares the payload with the stored timestamptz start_time
+    stored_start = datetime(2026, 1, 1, 10, tzinfo=UTC)
+    update = schemas.TripUpdate(end_time="2026-01-01T09:00:00")
+    assert update.model_dump(exclude_unset=True) == {"end_time": datetime(2026, 1, 1, 9, tzinfo=UTC)}
+    assert schemas.ends_before_start(stored_start, update.end_time)
+    assert not schemas.ends_before_start(stored_start, schemas.TripUpdate(end_time="2026-01-01T11:00:00").end_time)
+
+
+def test_bulk_rows_with_mixed_offsets_are_validated_per_line():
+    body = (
+        b'{"vehicle_id": 1, "driver_id": 1, "start_location": "a", "end_location": "b",'
+        b' "start_time": "2026-01-01T10:00:00Z", "end_time": "2026-01-01T12:00:00"}\n'
+        b'{"vehicle_id": 1, "driver_id": 1, "start_location": "a", "end_location": "b",'
+        b' "start_time": "2026-01-01T10:00:00", "end_time": "2026-01-01T09:00:00Z"}\n'
+    )
+    report = bulk._Report()
+    rows = bulk._validate(TRIP_BULK, bulk.Upload("ndjson", body), report)
+    assert [line for line, _ in rows] == [1]
+    assert list(report.errors) == [2]
+    assert schemas.TRIP_ENDS_BEFORE_START in report.errors[2][0]
+
+
+def test_availability_window_with_mixed_offsets():
+    # GET /availability compares its bounds before querying: a naive end before an aware start is a 400
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(get_availability(start=datetime(2026, 1, 1, 10, tzinfo=UTC), end=datetime(2026, 1, 1, 9),
+                                     exclude_trip_id=None, db=None))
+    assert raised.value.status_code == 400
+
+
+def test_availability_answers_a_mixed_offset_window(connection):
+    async def available():
+        engine = create_async_engine(database.async_engine.url, poolclass=NullPool)
+        try:
+            async with AsyncSession(engine) as db:
+                return await get_availability(start=datetime(2026, 1, 1, 10), end=datetime(2026, 1, 1, 12, tzinfo=UTC),
+                                              exclude_trip_id=None, db=db)
+        finally:
+            await engine.dispose()
+
+    response = asyncio.run(available())
+    assert response.start == datetime(2026, 1, 1, 10, tzinfo=UTC)
+    assert response.end == datetime(2026, 1, 1, 12, tzinfo=UTC)
@@ -0,0 +1,23 @@
+from app import models
+
+
+def _user(name: str) -> models.User:
+    return models.User(username=name, email=f"{name}@example.com", password="not-a-hash", status="active")
+
+
+def test_update_to_a_taken_email_is_409(db, client):
+    first, second = _user("first-user"), _user("second-user")
+    db.add_all([first, second])
+    db.commit()   # a savepoint: the rollback after a 409 keeps them
+
+    response = client.put(f"/user/{second.id}", json={"email": first.email})
+    assert response.status_code == 409
+    assert response.json() == {"detail": "Email already registered"}
+
+    response = client.put(f"/user/{second.id}", json={"username": first.username})
+    assert response.status_code == 409
+    assert response.json() == {"detail": "Username already taken"}
+
+    response = client.put(f"/user/{second.id}", json={"email": "second-renamed@example.com"})
+    assert response.status_code == 200
+    assert response.json()["email"] == "second-renamed@example.com"